@@ -3,8 +3,6 @@ import csv
 import logging
 import sys
 
-from sigfig import round as sigfig
-
 from numbers_parser import (
     Document,
     ErrorCell,
@@ -15,7 +13,7 @@ from numbers_parser import (
     _get_version,
 )
 from numbers_parser import __name__ as numbers_parser_name
-from numbers_parser.constants import MAX_SIGNIFICANT_DIGITS
+from numbers_parser.cell import _round_significant_digits
 from numbers_parser.experimental import ExperimentalFeatures, enable_experimental_feature
 
 logger = logging.getLogger(numbers_parser_name)
@@ -101,15 +99,15 @@ def print_table_names(filename) -> None:
             print(f"{filename}: {sheet.name}: {table.name}")
 
 
-def cell_as_string(args, cell):
+def cell_as_string(args, cell, formatted_value=None):
     if isinstance(cell, ErrorCell) and not (args.formulas):
         return "#REF!"
     if args.formulas and cell.formula is not None:
         return cell.formula
-    if args.formatting and cell.formatted_value is not None:
-        return cell.formatted_value
+    if formatted_value is not None:
+        return formatted_value
     if isinstance(cell, NumberCell):
-        return sigfig(cell.value, sigfigs=MAX_SIGNIFICANT_DIGITS, warn=False)
+        return _round_significant_digits(cell.value)
     if cell.value is None:
         return ""
     return str(cell.value)
@@ -123,8 +121,16 @@ def print_table(args, filename) -> None:
         for table in sheet.tables:
             if args.table is not None and table.name not in args.table:
                 continue
-            for row in table.rows():
-                cells = [cell_as_string(args, cell) for cell in row]
+            rows = table.rows()
+            if args.formatting:
+                formatted_rows = table._formatted_values(rows)
+            else:
+                formatted_rows = [[None] * len(row) for row in rows]
+            for row, formatted_row in zip(rows, formatted_rows, strict=True):
+                cells = [
+                    cell_as_string(args, cell, value)
+                    for cell, value in zip(row, formatted_row, strict=True)
+                ]
                 if not args.brief:
                     sys.stdout.write(f"{filename}: {sheet.name}: {table.name}: ")
                 writer.writerow(cells)
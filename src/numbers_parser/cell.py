@@ -1,20 +1,32 @@
 from __future__ import annotations
 
+import gc
 import logging
 import math
 import re
+from bisect import bisect_right
+from copy import copy
 from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timedelta
+from decimal import Decimal
 from enum import IntEnum
 from fractions import Fraction
+from functools import lru_cache, partial
 from hashlib import sha1
+from numbers import Integral, Real
+from operator import attrgetter, methodcaller
 from os.path import basename
-from struct import pack, unpack
-from typing import Any, NamedTuple
+from struct import pack, unpack, unpack_from
+from typing import TYPE_CHECKING, Any, NamedTuple
 from warnings import warn
 
 from sigfig import round as sigfig
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 from numbers_parser import __name__ as numbers_parser_name
 from numbers_parser.constants import (
     CHECKBOX_FALSE_VALUE,
@@ -36,6 +48,9 @@ from numbers_parser.constants import (
     EMPTY_STORAGE_BUFFER,
     EPOCH,
     MAX_BASE,
+    MAX_FORMAT_MEMO_SIZE,
+    MAX_REPLAYED_SHIFTS,
+    MAX_SHIFT_LOG_SIZE,
     MAX_SIGNIFICANT_DIGITS,
     PACKAGE_ID,
     SECONDS_IN_DAY,
@@ -58,15 +73,16 @@ from numbers_parser.constants import (
 from numbers_parser.currencies import CURRENCIES, CURRENCY_SYMBOLS
 from numbers_parser.exceptions import UnsupportedError, UnsupportedWarning
 from numbers_parser.generated import TSKArchives_pb2 as TSKArchives
-from numbers_parser.generated import TSPMessages_pb2 as TSPMessages
 from numbers_parser.generated import TSTArchives_pb2 as TSTArchives
 from numbers_parser.generated.TSWPArchives_pb2 import (
     ParagraphStylePropertiesArchive as ParagraphStyle,
 )
 from numbers_parser.numbers_cache import Cacheable, cache
-from numbers_parser.numbers_uuid import NumbersUUID
 from numbers_parser.xrefs import xl_range
 
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
 logger = logging.getLogger(numbers_parser_name)
 debug = logger.debug
 
@@ -333,6 +349,14 @@ class Style:
             _cell_style_obj_id=model.cell_style_object_id(cell),
         )
 
+    def _copy(self) -> Style:
+        """Return a copy of a shared style that can be modified independently."""
+        style = copy(self)
+        style.__dict__.pop("_interned", None)
+        if isinstance(self.bg_color, list):
+            style.__dict__["bg_color"] = list(self.bg_color)
+        return style
+
     def __post_init__(self):
         self.bg_color = rgb_color(self.bg_color)
         self.font_color = rgb_color(self.font_color)
@@ -354,6 +378,13 @@ class Style:
         Detect changes to cell styles and flag the style for
         possible updates when saving the document.
         """
+        if "_interned" in self.__dict__ and not name.startswith("_"):
+            warn(
+                "shared cell style cannot be modified; use Table.set_cell_style() instead",
+                UnsupportedWarning,
+                stacklevel=2,
+            )
+            return
         if name in ["bg_color", "font_color"]:
             value = rgb_color(value)
         if name == "alignment":
@@ -362,10 +393,35 @@ class Style:
             self.__dict__["_update_text_style"] = True
         if name in Style._cell_attrs():
             self.__dict__["_update_cell_style"] = True
+            self.__dict__["_cell_key"] = None
 
         if name not in ["_update_text_style", "_update_cell_style"]:
             self.__dict__[name] = value
 
+    @property
+    def _cell_style_key(self) -> tuple:
+        """
+        Return a hashable key for the attributes stored in a cell style
+        archive. The key is computed when first needed after the style's
+        cell attributes change and reused until they change again.
+        """
+        key = self.__dict__.get("_cell_key")
+        if key is None:
+            bg_color = tuple(self.bg_color) if isinstance(self.bg_color, list) else self.bg_color
+            bg_image = self.bg_image.filename if self.bg_image is not None else None
+            key = (
+                self.alignment.vertical,
+                self.first_indent,
+                self.left_indent,
+                self.right_indent,
+                self.text_inset,
+                self.text_wrap,
+                bg_color,
+                bg_image,
+            )
+            self.__dict__["_cell_key"] = key
+        return key
+
 
 def rgb_color(color) -> RGB:
     """Raise a TypeError if a color is not a valid RGB value."""
@@ -590,6 +646,64 @@ class CellStorageFlags:
         return [x.name for x in fields(self)]
 
 
+class CoordinateShifts:
+    """
+    Rows and columns inserted into or deleted from a table. Cells apply the
+    shifts to their row and column when they are next read, so inserting or
+    deleting does not renumber every cell that moves.
+
+    Cells only replay the shifts of their own table. When a cell has too many
+    shifts to replay, or the log grows too long, every cell in the table is
+    renumbered from its position in the table data and the log is cleared.
+    Shifts must be recorded before the table data is changed.
+    """
+
+    # A clock shared by all tables so that a cell can order its creation
+    # against the shifts of whichever table it is later added to
+    epoch = 0
+
+    def __init__(self, data: list | None = None) -> None:
+        self._data = data
+        self._epochs = []
+        self._shifts = []
+
+    def shift(self, axis: str, start: int, delta: int) -> None:
+        """Move cells in ``axis`` at or after ``start`` by ``delta`` rows or columns."""
+        if len(self._shifts) >= MAX_SHIFT_LOG_SIZE:
+            self.renumber()
+        CoordinateShifts.epoch += 1
+        self._epochs.append(CoordinateShifts.epoch)
+        self._shifts.append((axis, start, delta))
+
+    def renumber(self) -> None:
+        """Set every cell's row and column from its position in the table and clear the log."""
+        if self._data is None:
+            return
+        epoch = CoordinateShifts.epoch
+        for row, cells in enumerate(self._data):
+            for col, cell in enumerate(cells):
+                cell._row = row
+                cell._col = col
+                cell._epoch = epoch
+        self._epochs = []
+        self._shifts = []
+
+    def update(self, cell: Cell) -> None:
+        """Apply the shifts recorded since a cell was last positioned to its row and column."""
+        index = bisect_right(self._epochs, cell._epoch)
+        if len(self._shifts) - index > MAX_REPLAYED_SHIFTS and self._data is not None:
+            self.renumber()
+            return
+        (row, col) = (cell._row, cell._col)
+        for axis, start, delta in self._shifts[index:]:
+            if axis == "rows":
+                if row >= start:
+                    row += delta
+            elif col >= start:
+                col += delta
+        (cell._row, cell._col) = (row, col)
+
+
 class Cell(CellStorageFlags, Cacheable):
     """
     .. NOTE::
@@ -598,17 +712,19 @@ class Cell(CellStorageFlags, Cacheable):
     """
 
     def __init__(self, row: int, col: int, value) -> None:
+        # Storage flags are left as the class defaults, which are all unset,
+        # until they are decoded from a cell's storage buffer
         self._value = value
-        self.row = row
-        self.col = col
+        self._row = row
+        self._col = col
+        self._epoch = CoordinateShifts.epoch
         self._is_bulleted = False
-        self._formula_id = None
         self._storage = None
         self._style = None
         self._d128 = None
         self._double = None
         self._seconds = None
-        super().__init__()
+        self._merge = None
 
     def __str__(self) -> str:
         table_name = self._model.table_name(self._table_id)
@@ -618,6 +734,36 @@ class Cell(CellStorageFlags, Cacheable):
         cell_str += f"value={self._value}, flags={self._flags:08x}, extras={self._extras:04x}"
         return ", ".join([cell_str, super().__str__()])
 
+    @property
+    def row(self) -> int:
+        """int: The cell's row number (zero indexed)."""
+        if self._epoch != CoordinateShifts.epoch:
+            self._update_coordinates()
+        return self._row
+
+    @row.setter
+    def row(self, row: int) -> None:
+        self._update_coordinates()
+        self._row = row
+
+    @property
+    def col(self) -> int:
+        """int: The cell's column number (zero indexed)."""
+        if self._epoch != CoordinateShifts.epoch:
+            self._update_coordinates()
+        return self._col
+
+    @col.setter
+    def col(self, col: int) -> None:
+        self._update_coordinates()
+        self._col = col
+
+    def _update_coordinates(self) -> None:
+        # Cells not yet added to a table have no shifts to apply
+        if hasattr(self, "_model"):
+            self._model.coordinate_shifts(self._table_id).update(self)
+        self._epoch = CoordinateShifts.epoch
+
     @property
     def image_filename(self):
         warn(
@@ -668,6 +814,59 @@ class Cell(CellStorageFlags, Cacheable):
             return table_formulas.formula(self._formula_id, self.row, self.col)
         return None
 
+    @property
+    def is_merged(self) -> bool:
+        """bool: ``True`` if the cell is the top-left cell of a merged range."""
+        return isinstance(self._merge, MergeAnchor)
+
+    @property
+    def size(self) -> tuple[int, int] | None:
+        """
+        Tuple[int, int] | None: The number of rows and columns of a merged cell,
+        ``(1, 1)`` for unmerged cells and ``None`` for cells eliminated by a merge.
+        """
+        if isinstance(self._merge, MergeAnchor):
+            return self._merge.size
+        if isinstance(self._merge, MergeReference):
+            return None
+        return (1, 1)
+
+    @property
+    def rect(self) -> tuple[int, int, int, int] | None:
+        """
+        Tuple[int, int, int, int] | None: The merge range containing a cell eliminated
+        by a merge as ``(row_start, col_start, row_end, col_end)``, or ``None``.
+        """
+        if isinstance(self._merge, MergeReference):
+            return self._merge.rect
+        return None
+
+    @property
+    def merge_range(self) -> str | None:
+        """
+        Str | None: The merge range containing a cell eliminated by a merge
+        in A1 notation, or ``None``.
+        """
+        if isinstance(self._merge, MergeReference):
+            return xl_range(*self._merge.rect)
+        return None
+
+    @property
+    def row_start(self) -> int | None:
+        return self._merge.rect[0] if isinstance(self._merge, MergeReference) else None
+
+    @property
+    def col_start(self) -> int | None:
+        return self._merge.rect[1] if isinstance(self._merge, MergeReference) else None
+
+    @property
+    def row_end(self) -> int | None:
+        return self._merge.rect[2] if isinstance(self._merge, MergeReference) else None
+
+    @property
+    def col_end(self) -> int | None:
+        return self._merge.rect[3] if isinstance(self._merge, MergeReference) else None
+
     @property
     def is_bulleted(self) -> bool:
         """bool: ``True`` if the cell contains text bullets."""
@@ -756,7 +955,7 @@ class Cell(CellStorageFlags, Cacheable):
 
         """
         if self._style is None:
-            self._style = Style.from_storage(self, self._model)
+            self._style = self._model.cell_style(self)._copy()
         return self._style
 
     @style.setter
@@ -778,8 +977,11 @@ class Cell(CellStorageFlags, Cacheable):
                 :py:meth:`numbers_parser.Table.set_cell_border` instead.
 
         """
-        self._model.extract_strokes(self._table_id)
-        return self._border
+        cell_border = CellBorder()
+        for side in ["top", "right", "bottom", "left"]:
+            border = self._model.cell_border(self._table_id, self.row, self.col, side)
+            setattr(cell_border, side, border)
+        return cell_border
 
     @border.setter
     def border(self, _) -> None:
@@ -791,7 +993,17 @@ class Cell(CellStorageFlags, Cacheable):
 
     @classmethod
     def _empty_cell(cls, table_id: int, row: int, col: int, model: object):
-        return Cell._from_storage(table_id, row, col, EMPTY_STORAGE_BUFFER, model)
+        # Equivalent to decoding EMPTY_STORAGE_BUFFER, whose storage flags are all
+        # unset and so take the class defaults, without parsing the buffer
+        cell = EmptyCell(row, col)
+        cell._buffer = EMPTY_STORAGE_BUFFER
+        cell._model = model
+        cell._table_id = table_id
+        cell._extras = 0
+        cell._flags = 0
+        merge_cells = model.merge_cells(table_id)
+        cell._set_merge(merge_cells.get((row, col)))
+        return cell
 
     @classmethod
     def _merged_cell(cls, table_id: int, row: int, col: int, model: object):
@@ -804,40 +1016,28 @@ class Cell(CellStorageFlags, Cacheable):
 
     @classmethod
     def _from_value(cls, row: int, col: int, value):
-        # TODO: write needs to retain/init the border
-        if isinstance(value, str):
-            cell = TextCell(row, col, value)
-        elif isinstance(value, bool):
-            cell = BoolCell(row, col, value)
-        elif isinstance(value, int):
-            cell = NumberCell(row, col, value)
-        elif isinstance(value, float):
-            rounded_value = sigfig(value, sigfigs=MAX_SIGNIFICANT_DIGITS, warn=False)
-            if rounded_value != value:
-                warn(
-                    f"'{value}' rounded to {MAX_SIGNIFICANT_DIGITS} significant digits",
-                    RuntimeWarning,
-                    stacklevel=2,
-                )
-            cell = NumberCell(row, col, rounded_value)
-        elif isinstance(value, datetime):
-            cell = DateCell(row, col, value)
-        elif isinstance(value, timedelta):
-            cell = DurationCell(row, col, value)
-        else:
-            msg = "Can't determine cell type from type " + type(value).__name__
-            raise ValueError(msg)  # noqa: TRY004
+        cell_class = VALUE_CELL_CLASSES.get(type(value))
+        if cell_class is not None:
+            return cell_class(row, col, value)
+        (cell_class, convert) = _value_cell_class(type(value))
+        return cell_class(row, col, value if convert is None else convert(value))
 
-        return cell
+    @classmethod
+    def _from_typed_value(cls, row: int, col: int, value, cell_type: CellType):
+        """Create a cell of a known type, converting the value to that type if needed."""
+        (cell_class, convert) = _value_cell_class(type(value), cell_type)
+        return cell_class(row, col, value if convert is None else convert(value))
 
     @classmethod
-    def _from_storage(  # noqa: PLR0912
+    def _from_storage(  # noqa: PLR0912, PLR0915
         cls,
         table_id: int,
         row: int,
         col: int,
         buffer: bytearray,
         model: object,
+        *,
+        decoded: tuple[float | None, datetime | None] | None = None,
     ) -> None:
         d128 = None
         double = None
@@ -853,7 +1053,9 @@ class Cell(CellStorageFlags, Cacheable):
         flags = unpack("<i", buffer[8:12])[0]
 
         if flags & 0x1:
-            d128 = _unpack_decimal128(buffer[offset : offset + 16])
+            d128 = (
+                _unpack_decimal128(buffer[offset : offset + 16]) if decoded is None else decoded[0]
+            )
             offset += 16
         if flags & 0x2:
             double = unpack("<d", buffer[offset : offset + 8])[0]
@@ -919,7 +1121,10 @@ class Cell(CellStorageFlags, Cacheable):
         elif cell_type == TSTArchives.textCellType:
             cell = TextCell(row, col, model.table_string(table_id, storage_flags._string_id))
         elif cell_type == TSTArchives.dateCellType:
-            cell = DateCell(row, col, EPOCH + timedelta(seconds=seconds))
+            if decoded is None:
+                cell = DateCell(row, col, EPOCH + timedelta(seconds=seconds))
+            else:
+                cell = DateCell(row, col, decoded[1])
             cell._datetime = cell._value
         elif cell_type == TSTArchives.boolCellType:
             cell = BoolCell(row, col, double > 0.0)
@@ -959,57 +1164,14 @@ class Cell(CellStorageFlags, Cacheable):
             setattr(self, flag, getattr(storage_flags, flag))
 
     def _set_merge(self, merge_ref) -> None:
-        if isinstance(merge_ref, MergeAnchor):
-            self.is_merged = True
-            self.size = merge_ref.size
-            self.merge_range = None
-            self.rect = None
-            self._border = CellBorder()
-        elif isinstance(merge_ref, MergeReference):
-            self.is_merged = False
-            self.size = None
-            self.row_start = merge_ref.rect[0]
-            self.col_start = merge_ref.rect[1]
-            self.row_end = merge_ref.rect[2]
-            self.col_end = merge_ref.rect[3]
-            self.merge_range = xl_range(*merge_ref.rect)
-            self.rect = merge_ref.rect
-            top_merged = self.row > self.row_start
-            right_merged = self.col < self.col_end
-            bottom_merged = self.row < self.row_end
-            left_merged = self.col > self.col_start
-            self._border = CellBorder(top_merged, right_merged, bottom_merged, left_merged)
-        else:
-            self.is_merged = False
-            self.size = (1, 1)
-            self.merge_range = None
-            self.rect = None
-            if getattr(self, "_border", None) is None:
-                self._border = CellBorder()
+        self._merge = merge_ref or None
 
     def _to_buffer(self) -> bytearray:  # noqa: PLR0912, PLR0915
-        """Create a storage buffer for a cell using v5 (modern) layout."""
-        if self._style is not None:
-            if self._style._text_style_obj_id is not None:
-                self._text_style_id = self._model._table_styles.lookup_key(
-                    self._table_id,
-                    TSPMessages.Reference(identifier=self._style._text_style_obj_id),
-                )
-                self._model.add_component_reference(
-                    self._style._text_style_obj_id,
-                    component_id=self._model._table_styles.id(self._table_id),
-                )
-
-            if self._style._cell_style_obj_id is not None:
-                self._cell_style_id = self._model._table_styles.lookup_key(
-                    self._table_id,
-                    TSPMessages.Reference(identifier=self._style._cell_style_obj_id),
-                )
-                self._model.add_component_reference(
-                    self._style._cell_style_obj_id,
-                    component_id=self._model._table_styles.id(self._table_id),
-                )
-
+        """
+        Create a storage buffer for a cell using v5 (modern) layout. String and
+        style keys must already have been set using
+        ``_NumbersModel.update_string_keys`` and ``_NumbersModel.update_style_keys``.
+        """
         length = 12
         if isinstance(self, NumberCell):
             flags = 1
@@ -1023,7 +1185,7 @@ class Cell(CellStorageFlags, Cacheable):
             flags = 8
             length += 4
             cell_type = TSTArchives.textCellType
-            value = pack("<i", self._model.table_string_key(self._table_id, self.value))
+            value = pack("<i", self._string_key)
         elif isinstance(self, DateCell):
             flags = 4
             length += 8
@@ -1170,164 +1332,50 @@ class Cell(CellStorageFlags, Cacheable):
 
         return (image_data, preferred_filename)
 
-    def _custom_format(self) -> str:  # noqa: PLR0911
+    def _custom_format_id(self) -> int | None:
         if self._text_format_id is not None and self._type == CellType.TEXT:
-            custom_format = self._model.table_format(self._table_id, self._text_format_id)
-        elif self._currency_format_id is not None:
-            custom_format = self._model.table_format(self._table_id, self._currency_format_id)
-        elif self._bool_format_id is not None and self._type == CellType.BOOL:
-            custom_format = self._model.table_format(self._table_id, self._bool_format_id)
-        elif self._num_format_id is not None:
-            custom_format = self._model.table_format(self._table_id, self._num_format_id)
-        else:
-            return str(self.value)
-
-        debug(
-            "custom_format: @[%d,%d]: format_type=%s, ",
-            self.row,
-            self.col,
-            custom_format.format_type,
+            return self._text_format_id
+        if self._currency_format_id is not None:
+            return self._currency_format_id
+        if self._bool_format_id is not None and self._type == CellType.BOOL:
+            return self._bool_format_id
+        return self._num_format_id
+
+    def _has_format(self) -> bool:
+        """Return ``True`` if any format has been applied to the cell."""
+        return (
+            self._num_format_id is not None
+            or self._currency_format_id is not None
+            or self._date_format_id is not None
+            or self._duration_format_id is not None
+            or self._text_format_id is not None
+            or self._bool_format_id is not None
         )
 
-        if custom_format.HasField("custom_uid"):
-            format_uuid = NumbersUUID(custom_format.custom_uid).hex
-            format_map = self._model.custom_format_map()
-            custom_format = format_map[format_uuid].default_format
-            if custom_format.requires_fraction_replacement:
-                formatted_value = _format_fraction(self._d128, custom_format)
-            elif custom_format.format_type == FormatType.CUSTOM_TEXT:
-                formatted_value = _decode_text_format(
-                    custom_format,
-                    self._model.table_string(self._table_id, self._string_id),
-                )
-            else:
-                formatted_value = _decode_number_format(
-                    custom_format,
-                    self._d128,
-                    format_map[format_uuid].name,
-                    format_map[format_uuid].conditions,
-                )
-        elif custom_format.format_type == FormatType.DECIMAL:
-            return _format_decimal(self._d128, custom_format)
-        elif custom_format.format_type == FormatType.CURRENCY:
-            return _format_currency(self._d128, custom_format)
-        elif custom_format.format_type == FormatType.BOOLEAN:
-            return "TRUE" if self.value else "FALSE"
-        elif custom_format.format_type == FormatType.PERCENT:
-            d128 = self._d128 or 0.0
-            return _format_decimal(d128 * 100, custom_format, percent=True)
-        elif custom_format.format_type == FormatType.BASE:
-            return _format_base(self._d128, custom_format)
-        elif custom_format.format_type == FormatType.FRACTION:
-            return _format_fraction(self._d128, custom_format)
-        elif custom_format.format_type == FormatType.SCIENTIFIC:
-            return _format_scientific(self._d128, custom_format)
-        elif custom_format.format_type == FormatType.CHECKBOX:
-            return CHECKBOX_TRUE_VALUE if self.value else CHECKBOX_FALSE_VALUE
-        elif custom_format.format_type == FormatType.RATING:
-            return STAR_RATING_VALUE * int(self._d128)
-        else:
-            formatted_value = str(self.value)
-        return formatted_value
+    def _formatter_key(self) -> tuple[int, str] | None:
+        """
+        Return the format ID and kind of the compiled formatter that produces
+        the cell's formatted value, or ``None`` if no formatter applies.
+        """
+        if self._duration_format_id is not None and self._double is not None:
+            return (self._duration_format_id, "duration")
+        if self._date_format_id is not None and self._seconds is not None:
+            return (self._date_format_id, "date")
+        format_id = self._custom_format_id()
+        return (format_id, "number") if format_id is not None else None
+
+    def _custom_format(self) -> str:
+        format_id = self._custom_format_id()
+        if format_id is None:
+            return str(self.value)
+        return self._model.table_formatter(self._table_id, format_id, "number")(self)
 
     def _date_format(self) -> str:
-        date_format = self._model.table_format(self._table_id, self._date_format_id)
-        if date_format.HasField("custom_uid"):
-            format_uuid = NumbersUUID(date_format.custom_uid).hex
-            format_map = self._model.custom_format_map()
-            custom_format = format_map[format_uuid].default_format
-            custom_format_string = custom_format.custom_format_string
-            if custom_format.format_type == FormatType.CUSTOM_DATE:
-                formatted_value = _decode_date_format(custom_format_string, self._datetime)
-            else:
-                warn(
-                    f"Unexpected custom format type {custom_format.format_type}",
-                    UnsupportedWarning,
-                    stacklevel=3,
-                )
-                return ""
-        else:
-            formatted_value = _decode_date_format(date_format.date_time_format, self._datetime)
-        return formatted_value
+        return self._model.table_formatter(self._table_id, self._date_format_id, "date")(self)
 
     def _duration_format(self) -> str:
-        duration_format = self._model.table_format(self._table_id, self._duration_format_id)
-        debug(
-            "duration_format: @[%d,%d]: table_id=%d, duration_format_id=%d, duration_style=%s",
-            self.row,
-            self.col,
-            self._table_id,
-            self._duration_format_id,
-            duration_format.duration_style,
-        )
-
-        duration_style = duration_format.duration_style
-        unit_largest = duration_format.duration_unit_largest
-        unit_smallest = duration_format.duration_unit_smallest
-        if duration_format.use_automatic_duration_units:
-            unit_smallest, unit_largest = _auto_units(self._double, duration_format)
-
-        d = self._double
-        dd = int(self._double)
-        dstr = []
-
-        def unit_in_range(largest, smallest, unit_type):
-            return largest <= unit_type and smallest >= unit_type
-
-        def pad_digits(d, largest, smallest, unit_type):
-            return (largest == unit_type and smallest == unit_type) or d >= 10
-
-        if unit_largest == DurationUnits.WEEK:
-            dd = int(d / SECONDS_IN_WEEK)
-            if unit_smallest != DurationUnits.WEEK:
-                d -= SECONDS_IN_WEEK * dd
-            dstr.append(str(dd) + _unit_format("week", dd, duration_style))
-
-        if unit_in_range(unit_largest, unit_smallest, DurationUnits.DAY):
-            dd = int(d / SECONDS_IN_DAY)
-            if unit_smallest > DurationUnits.DAY:
-                d -= SECONDS_IN_DAY * dd
-            dstr.append(str(dd) + _unit_format("day", dd, duration_style))
-
-        if unit_in_range(unit_largest, unit_smallest, DurationUnits.HOUR):
-            dd = int(d / SECONDS_IN_HOUR)
-            if unit_smallest > DurationUnits.HOUR:
-                d -= SECONDS_IN_HOUR * dd
-            dstr.append(str(dd) + _unit_format("hour", dd, duration_style))
-
-        if unit_in_range(unit_largest, unit_smallest, DurationUnits.MINUTE):
-            dd = int(d / 60)
-            if unit_smallest > DurationUnits.MINUTE:
-                d -= 60 * dd
-            if duration_style == DurationStyle.COMPACT:
-                pad = pad_digits(dd, unit_smallest, unit_largest, DurationUnits.MINUTE)
-                dstr.append(("" if pad else "0") + str(dd))
-            else:
-                dstr.append(str(dd) + _unit_format("minute", dd, duration_style))
-
-        if unit_in_range(unit_largest, unit_smallest, DurationUnits.SECOND):
-            dd = int(d)
-            if unit_smallest > DurationUnits.SECOND:
-                d -= dd
-            if duration_style == DurationStyle.COMPACT:
-                pad = pad_digits(dd, unit_smallest, unit_largest, DurationUnits.SECOND)
-                dstr.append(("" if pad else "0") + str(dd))
-            else:
-                dstr.append(str(dd) + _unit_format("second", dd, duration_style))
-
-        if unit_smallest >= DurationUnits.MILLISECOND:
-            dd = round(1000 * d)
-            if duration_style == DurationStyle.COMPACT:
-                padding = "0" if dd >= 10 else "00"
-                padding = "" if dd >= 100 else padding
-                dstr.append(f"{padding}{dd}")
-            else:
-                dstr.append(str(dd) + _unit_format("millisecond", dd, duration_style, "ms"))
-        duration_str = (":" if duration_style == 0 else " ").join(dstr)
-        if duration_style == DurationStyle.COMPACT:
-            duration_str = re.sub(r":(\d\d\d)$", r".\1", duration_str)
-
-        return duration_str
+        format_id = self._duration_format_id
+        return self._model.table_formatter(self._table_id, format_id, "duration")(self)
 
     def _set_formatting(
         self,
@@ -1384,6 +1432,7 @@ class TextCell(Cell):
     def __init__(self, row: int, col: int, value: str) -> None:
         self._type = CellType.TEXT
         super().__init__(row, col, value)
+        self._string_key = None
 
     @property
     def value(self) -> str:
@@ -1473,6 +1522,9 @@ class EmptyCell(Cell):
     def formatted_value(self) -> str:
         return ""
 
+    def _formatter_key(self) -> None:
+        return None
+
 
 class BoolCell(Cell):
     """
@@ -1549,18 +1601,279 @@ class MergedCell(Cell):
         return None
 
 
+# Cell classes for values whose exact type needs no conversion
+VALUE_CELL_CLASSES = {
+    str: TextCell,
+    bool: BoolCell,
+    int: NumberCell,
+    datetime: DateCell,
+    timedelta: DurationCell,
+}
+
+
+def _column_values(values) -> list:
+    """
+    Return a column of values as a list of Python values.
+
+    NumPy arrays, pandas series and objects supporting the buffer protocol are
+    converted in a single step rather than value by value. NumPy dates and
+    durations are converted to ``datetime`` and ``timedelta``. Missing values
+    in NumPy arrays and pandas series, ``NaT`` and ``NaN``, are converted to
+    ``None``; ``NaN`` in other iterables is written as a number.
+    """
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    if np is not None and isinstance(values, np.ndarray):
+        if values.ndim != 1:
+            msg = "column values must be one-dimensional"
+            raise ValueError(msg)
+        if values.dtype.kind == "M":
+            values = values.astype("datetime64[us]")
+        elif values.dtype.kind == "m":
+            values = values.astype("timedelta64[us]")
+        elif values.dtype.kind == "f" and np.isnan(values).any():
+            values = np.where(np.isnan(values), None, values.astype(object))
+        elif values.dtype.kind == "O":
+            return [None if isinstance(x, float) and math.isnan(x) else x for x in values]
+        return values.tolist()
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return list(values)
+    if view.ndim != 1:
+        msg = "column values must be one-dimensional"
+        raise ValueError(msg)
+    return view.tolist()
+
+
+def _value_cell_class(  # noqa: PLR0911
+    value_type: type,
+    cell_type: CellType | None = None,
+) -> tuple[type[Cell], Callable | None]:
+    """
+    Return the cell class for values of a type, and a function that converts
+    the values for storage or ``None`` if they are stored unchanged. If
+    ``cell_type`` is ``None``, the cell class is determined by the value type.
+    """
+    if cell_type is None:
+        if issubclass(value_type, str):
+            return (TextCell, None)
+        if issubclass(value_type, bool):
+            return (BoolCell, None)
+        if issubclass(value_type, int):
+            return (NumberCell, None)
+        if issubclass(value_type, float):
+            return (NumberCell, _round_float_value)
+        if issubclass(value_type, datetime):
+            return (DateCell, None)
+        if issubclass(value_type, timedelta):
+            return (DurationCell, None)
+        if issubclass(value_type, Integral):
+            return (NumberCell, int)
+        if issubclass(value_type, (Real, Decimal)):
+            return (NumberCell, _round_float_value)
+        msg = "Can't determine cell type from type " + value_type.__name__
+        raise ValueError(msg)
+
+    if cell_type == CellType.NUMBER:
+        if value_type is int:
+            return (NumberCell, None)
+        if issubclass(value_type, Integral):
+            return (NumberCell, int)
+        return (NumberCell, _number_value)
+    if cell_type == CellType.TEXT:
+        return (TextCell, None if value_type is str else str)
+    if cell_type == CellType.BOOL and issubclass(value_type, Integral):
+        return (BoolCell, None if value_type is bool else bool)
+    if cell_type == CellType.DATE and issubclass(value_type, datetime):
+        return (DateCell, None)
+    if cell_type == CellType.DURATION and issubclass(value_type, timedelta):
+        return (DurationCell, None)
+    if cell_type in (CellType.BOOL, CellType.DATE, CellType.DURATION):
+        msg = f"Can't write value of type {value_type.__name__} as a {cell_type.name} cell"
+        raise ValueError(msg)
+    msg = f"Can't write values as {cell_type.name} cells"
+    raise ValueError(msg)
+
+
+def _cell_prototype(
+    value_type: type,
+    cell_type: CellType | None,
+    table_id: int,
+    model: object,
+    style: Style | None,
+) -> tuple[type[Cell], Callable | None, dict, str]:
+    """
+    Return the cell class and value conversion for values of a type, the
+    attributes of a new cell of that class apart from its coordinates and
+    value, and the name of an attribute holding the value. ``None``
+    values are written as empty cells without a style or merge.
+    """
+    if value_type is type(None):
+        (cell_class, convert) = (EmptyCell, None)
+        prototype = Cell._empty_cell(table_id, 0, 0, model)
+        prototype._set_merge(None)
+    else:
+        (cell_class, convert) = _value_cell_class(value_type, cell_type)
+        prototype = cell_class(0, 0, None)
+        prototype._table_id = table_id
+        prototype._model = model
+        prototype._style = style
+    attrs = {k: v for k, v in prototype.__dict__.items() if k != "_cache"}
+    value_attrs = {CellType.NUMBER: "_d128", CellType.DATE: "_datetime"}
+    return (cell_class, convert, attrs, value_attrs.get(prototype._type, "_value"))
+
+
+def _write_cells(
+    data: list[list[Cell]],
+    row: int,
+    col: int,
+    values: list[list],
+    *,
+    table_id: int,
+    model: object,
+    style: Style | None = None,
+    cell_type: CellType | None = None,
+) -> bool:
+    """
+    Write a block of values into a table's cells, returning ``True`` if any
+    formula was overwritten.
+
+    The cell class and value conversion are resolved once for each type of
+    value rather than for every value. Values of ``None`` leave the existing
+    cell unchanged, or create an empty cell where there is none. Merges are
+    not set.
+    """
+    # Cells of each type are created by copying the attributes of a prototype
+    # cell, which is much cheaper than running the cell constructors for
+    # every value. Only the coordinates and value differ. Garbage collection
+    # is paused as it would otherwise run repeatedly without freeing anything.
+    prototypes = {}
+    replaced_formula = False
+    new_cell = object.__new__
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for row_num, row_values in enumerate(values, start=row):
+            data_row = data[row_num]
+            for col_num, value in enumerate(row_values, start=col):
+                if value is None and data_row[col_num] is not None:
+                    continue
+                value_type = type(value)
+                try:
+                    (cell_class, convert, attrs, value_attr) = prototypes[value_type]
+                except KeyError:
+                    prototypes[value_type] = _cell_prototype(
+                        value_type,
+                        cell_type,
+                        table_id,
+                        model,
+                        style,
+                    )
+                    (cell_class, convert, attrs, value_attr) = prototypes[value_type]
+                cell_value = value if convert is None else convert(value)
+                cell_attrs = attrs.copy()
+                cell_attrs["_value"] = cell_value
+                cell_attrs["_row"] = row_num
+                cell_attrs["_col"] = col_num
+                cell_attrs[value_attr] = cell_value
+                cell = new_cell(cell_class)
+                cell.__dict__ = cell_attrs
+                old_cell = data_row[col_num]
+                if old_cell is not None and old_cell._formula_id is not None:
+                    replaced_formula = True
+                data_row[col_num] = cell
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return replaced_formula
+
+
+def _number_value(value) -> float:
+    """Convert a value to a rounded float, raising ``ValueError`` if it is not a number."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        msg = f"Can't write value of type {type(value).__name__} as a NUMBER cell"
+        raise ValueError(msg) from None
+    return _round_float_value(number)
+
+
+def _round_float_value(value: float) -> float:
+    """Round a float to the supported number of digits, warning if the value changes."""
+    value = float(value)
+    # Shortest representations of up to 16 characters cannot need rounding
+    if len(repr(value)) <= MAX_SIGNIFICANT_DIGITS + 1:
+        return value
+    rounded_value = _round_significant_digits(value)
+    if math.isfinite(value) and rounded_value != value:
+        warn(
+            f"'{value}' rounded to {MAX_SIGNIFICANT_DIGITS} significant digits",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+    return rounded_value
+
+
+def _float_digits(value: float) -> tuple[str, int]:
+    """
+    Return the significant digits and exponent of the shortest decimal
+    representation of a positive finite float, such that the value is
+    ``int(digits) * 10**exponent``.
+    """
+    mantissa, _, exponent = float.__repr__(value).partition("e")
+    integer, _, fraction = mantissa.partition(".")
+    return (integer + fraction).lstrip("0"), int(exponent or 0) - len(fraction)
+
+
+def _round_significant_digits(value: float) -> float:
+    """
+    Round a number to ``MAX_SIGNIFICANT_DIGITS`` significant digits.
+
+    The result is identical to ``sigfig.round(value, sigfigs=MAX_SIGNIFICANT_DIGITS)``,
+    which rounds the shortest decimal representation of the value half away from
+    zero, without the overhead of parsing the value as a ``Decimal``. Integers are
+    rounded to integers and non-finite values are returned unchanged.
+    """
+    if isinstance(value, int):
+        digits = str(abs(value))
+        exponent = 0
+    elif math.isfinite(value) and value != 0.0:
+        # A representation of at most 16 characters, including a decimal point
+        # or exponent, has no more than 15 significant digits
+        if len(float.__repr__(value)) <= MAX_SIGNIFICANT_DIGITS + 1:
+            return value
+        digits, exponent = _float_digits(abs(value))
+    else:
+        return value
+    if len(digits.rstrip("0")) <= MAX_SIGNIFICANT_DIGITS:
+        return value
+
+    dropped = len(digits) - MAX_SIGNIFICANT_DIGITS
+    coefficient = int(digits[:MAX_SIGNIFICANT_DIGITS])
+    if digits[MAX_SIGNIFICANT_DIGITS] >= "5":
+        coefficient += 1
+    if isinstance(value, int):
+        rounded = coefficient * 10**dropped
+    else:
+        rounded = float(f"{coefficient}e{exponent + dropped}")
+    return -rounded if value < 0 else rounded
+
+
 def _pack_decimal128(value: float) -> bytearray:
     buffer = bytearray(16)
-    exp = math.floor(math.log10(math.e) * math.log(abs(value))) if value != 0.0 else 0
-    exp += DECIMAL128_BIAS - 16
-    mantissa = abs(int(value / math.pow(10, exp - DECIMAL128_BIAS)))
+    if value == 0:
+        exp = DECIMAL128_BIAS - 16
+        mantissa = 0
+    else:
+        # The mantissa is scaled to 17 digits from the exact decimal digits
+        # of the value rather than by floating point division
+        digits, exp = _float_digits(float(abs(value)))
+        mantissa = int(digits) * 10 ** (17 - len(digits))
+        exp += DECIMAL128_BIAS - 17 + len(digits)
     buffer[15] |= exp >> 7
     buffer[14] |= (exp & 0x7F) << 1
-    i = 0
-    while mantissa >= 1:
-        buffer[i] = mantissa & 0xFF
-        i += 1
-        mantissa = int(mantissa / 256)
+    buffer[:8] = mantissa.to_bytes(8, "little")
     if value < 0:
         buffer[15] |= 0x80
     return buffer
@@ -1574,17 +1887,169 @@ def _unpack_decimal128(buffer: bytearray) -> float:
     sign = 1 if buffer[15] & 0x80 else 0
     if sign == 1:
         mantissa = -mantissa
-    value = mantissa * 10**exp
-    return float(value)
+    # Integer division is correctly rounded, unlike multiplying by 10**exp
+    if exp < 0:
+        return mantissa / 10**-exp
+    return float(mantissa * 10**exp)
 
 
-def _decode_date_format(date_format, value):
-    """Parse a custom date format string and return a formatted datetime value."""
+_DECIMAL128_MANTISSA_MASK = (1 << 113) - 1
+# Largest power of ten that is exactly representable as a double
+_MAX_EXACT_POWER_OF_TEN = 22
+_DATE_MIN_SECONDS = (datetime.min - EPOCH).total_seconds()  # noqa: DTZ901
+_DATE_MAX_SECONDS = (datetime.max - EPOCH).total_seconds()  # noqa: DTZ901
+
+
+def _storage_value_offsets(buffer: bytes) -> tuple[int | None, int | None]:
+    """Return the offsets of the decimal128 and seconds fields in a cell storage buffer."""
+    flags = int.from_bytes(buffer[8:12], "little")
+    if not flags & 0x4:
+        return (12 if flags & 0x1 else None, None)
+    seconds_offset = 12 + (16 if flags & 0x1 else 0) + (8 if flags & 0x2 else 0)
+    return (12 if flags & 0x1 else None, seconds_offset)
+
+
+def _unpack_decimal128_values(buffers: list[bytes], offsets: list[int]) -> list[float]:
+    """
+    Decode many decimal128 values in one pass.
+
+    Each value is decoded from the 16 bytes at ``offsets[i]`` in ``buffers[i]`` and
+    the result is identical to calling ``_unpack_decimal128`` on each value in turn.
+    When NumPy is available, values whose mantissa fits in a double and whose
+    exponent is not positive are decoded with array arithmetic; all others use
+    the scalar path.
+    """
+    if np is not None and len(buffers) > 1:
+        return _unpack_decimal128_numpy(buffers, offsets)
+
+    values = []
+    for buffer, offset in zip(buffers, offsets, strict=True):
+        mantissa = int.from_bytes(buffer[offset : offset + 15], "little")
+        mantissa &= _DECIMAL128_MANTISSA_MASK
+        exp = (int.from_bytes(buffer[offset + 14 : offset + 16], "little") >> 1) & 0x3FFF
+        if buffer[offset + 15] & 0x80:
+            mantissa = -mantissa
+        exp -= DECIMAL128_BIAS
+        values.append(mantissa / 10**-exp if exp < 0 else float(mantissa * 10**exp))
+    return values
+
+
+def _unpack_decimal128_numpy(buffers: list[bytes], offsets: list[int]) -> list[float]:
+    data = bytearray()
+    for buffer, offset in zip(buffers, offsets, strict=True):
+        data += buffer[offset : offset + 16]
+    words = np.frombuffer(data, dtype="<u8").reshape(-1, 2)
+    lo = words[:, 0]
+    hi = words[:, 1]
+    exp = ((hi >> np.uint64(49)) & np.uint64(0x3FFF)).astype(np.int64) - DECIMAL128_BIAS
+    negative = (hi >> np.uint64(63)).astype(bool)
+    exact = (
+        ((hi & np.uint64((1 << 49) - 1)) == 0)
+        & (lo < np.uint64(1 << 53))
+        & (exp <= 0)
+        & (exp >= -_MAX_EXACT_POWER_OF_TEN)
+    )
+
+    # Both the mantissa and the power of ten are exact doubles so the division
+    # is correctly rounded, just as the scalar integer division is
+    scale = 10.0 ** -np.where(exact, exp, 0).astype(np.float64)
+    mantissa = lo.astype(np.int64)
+    mantissa = np.where(negative, -mantissa, mantissa)
+    values = (mantissa.astype(np.float64) / scale).tolist()
+
+    if not exact.all():
+        for i in np.flatnonzero(~exact).tolist():
+            values[i] = _unpack_decimal128(buffers[i][offsets[i] : offsets[i] + 16])
+    return values
+
+
+def _unpack_date_values(buffers: list[bytes], offsets: list[int]) -> list[datetime]:
+    """
+    Decode many date cell values in one pass.
+
+    Each value is the double at ``offsets[i]`` in ``buffers[i]`` counting seconds
+    from the Numbers epoch. The result is identical to ``EPOCH + timedelta(seconds=...)``
+    for each value. When NumPy is available, whole-second dates are converted with
+    ``datetime64`` arithmetic and fractional seconds use the scalar path.
+    """
+    seconds = [
+        unpack_from("<d", buffer, offset)[0]
+        for buffer, offset in zip(buffers, offsets, strict=True)
+    ]
+    if np is None or len(seconds) < 2:
+        return [EPOCH + timedelta(seconds=s) for s in seconds]
+
+    array_seconds = np.array(seconds, dtype=np.float64)
+    whole = (
+        np.isfinite(array_seconds)
+        & (array_seconds == np.floor(array_seconds))
+        & (array_seconds >= _DATE_MIN_SECONDS)
+        & (array_seconds <= _DATE_MAX_SECONDS)
+    )
+    epoch = np.datetime64(EPOCH, "s")
+    whole_seconds = np.where(whole, array_seconds, 0.0).astype(np.int64)
+    values = (epoch + whole_seconds.astype("timedelta64[s]")).tolist()
+
+    if not whole.all():
+        for i in np.flatnonzero(~whole).tolist():
+            values[i] = EPOCH + timedelta(seconds=seconds[i])
+    return values
+
+
+def _unpack_storage_values(buffers: list[bytes]) -> list[tuple[float | None, datetime | None]]:
+    """
+    Bulk-decode the number and date values of many cell storage buffers.
+
+    Returns a ``(d128, date)`` tuple for each buffer, suitable for passing to
+    :py:meth:`Cell._from_storage`. ``date`` is only decoded for date cells.
+    """
+    d128_buffers = []
+    d128_offsets = []
+    d128_index = []
+    date_buffers = []
+    date_offsets = []
+    date_index = []
+    for i, buffer in enumerate(buffers):
+        d128_offset, seconds_offset = _storage_value_offsets(buffer)
+        if d128_offset is not None:
+            d128_buffers.append(buffer)
+            d128_offsets.append(d128_offset)
+            d128_index.append(i)
+        if seconds_offset is not None and buffer[1] == TSTArchives.dateCellType:
+            date_buffers.append(buffer)
+            date_offsets.append(seconds_offset)
+            date_index.append(i)
+
+    d128_values = [None] * len(buffers)
+    decoded = _unpack_decimal128_values(d128_buffers, d128_offsets)
+    for i, value in zip(d128_index, decoded, strict=True):
+        d128_values[i] = value
+    date_values = [None] * len(buffers)
+    decoded = _unpack_date_values(date_buffers, date_offsets)
+    for i, value in zip(date_index, decoded, strict=True):
+        date_values[i] = value
+    return list(zip(d128_values, date_values, strict=True))
+
+
+def _unsupported_date_field(field: str) -> Callable[[datetime], str]:
+    def format_field(_value: datetime) -> str:
+        warn(f"Unsupported field code '{field}'", UnsupportedWarning, stacklevel=4)
+        return ""
+
+    return format_field
+
+
+@lru_cache(maxsize=256)
+def _compile_date_format(date_format: str) -> Callable[[datetime], str]:
+    """
+    Parse a custom date format string once and return a function that
+    formats datetime values using it.
+    """
     chars = [*date_format]
     index = 0
     in_string = False
-    result = ""
-    field = ""
+    parts = []
+    literal = ""
     while index < len(chars):
         current_char = chars[index]
         next_char = chars[index + 1] if index < len(chars) - 1 else None
@@ -1592,7 +2057,7 @@ def _decode_date_format(date_format, value):
             if next_char is None:
                 break
             if chars[index + 1] == "'":
-                result += "'"
+                literal += "'"
                 index += 2
             elif in_string:
                 in_string = False
@@ -1601,36 +2066,41 @@ def _decode_date_format(date_format, value):
                 in_string = True
                 index += 1
         elif in_string:
-            result += current_char
+            literal += current_char
             index += 1
         elif current_char.isalpha():
+            if literal:
+                parts.append(literal)
+                literal = ""
             remaining_str = date_format[index:]
-            matched_field = None
-
-            for field in DATETIME_FIELD_MAP:
-                # Greedily match the longest possible valid field
-                if remaining_str.startswith(field):
-                    matched_field = field
-                    break
+            # Greedily match the longest possible valid field
+            matched_field = next((x for x in DATETIME_FIELD_MAP if remaining_str.startswith(x)), "")
 
             if matched_field:
-                s = DATETIME_FIELD_MAP[field]
-                if callable(s):
-                    result += s(value)
-                else:
-                    result += value.strftime(s)
+                s = DATETIME_FIELD_MAP[matched_field]
+                parts.append(s if callable(s) else methodcaller("strftime", s))
                 index += len(matched_field)
             else:
                 unknown_field = ""
                 while index < len(chars) and chars[index].isalpha():
                     unknown_field += chars[index]
                     index += 1
-                warn(f"Unsupported field code '{unknown_field}'", UnsupportedWarning, stacklevel=4)
+                parts.append(_unsupported_date_field(unknown_field))
         else:
-            result += current_char
+            literal += current_char
             index += 1
+    if literal:
+        parts.append(literal)
 
-    return result
+    if all(isinstance(x, str) for x in parts):
+        result = "".join(parts)
+        return lambda _value: result
+    return lambda value: "".join([x if isinstance(x, str) else x(value) for x in parts])
+
+
+def _decode_date_format(date_format, value):
+    """Parse a custom date format string and return a formatted datetime value."""
+    return _compile_date_format(date_format)(value)
 
 
 def _decode_text_format(text_format, value: str):
@@ -1678,7 +2148,7 @@ def _decode_number_format(  # noqa: PLR0912
     custom_format_string = number_format.custom_format_string
     sign = "-" if value < 0 else ""
     for condition in conditions:
-        value_sigfig = sigfig(value, sigfigs=MAX_SIGNIFICANT_DIGITS, warn=False)
+        value_sigfig = _round_significant_digits(value)
         if (
             (
                 condition.condition_type == NumberFormatConditionType.EQUAL
@@ -1976,7 +2446,7 @@ def _format_fraction(value: float, number_format) -> str:
 
 
 def _format_scientific(value: float, number_format) -> str:
-    formatted_value = sigfig(value, sigfigs=MAX_SIGNIFICANT_DIGITS, warn=False)
+    formatted_value = _round_significant_digits(value)
     return f"{formatted_value:.{number_format.decimal_places}E}"
 
 
@@ -2027,6 +2497,205 @@ def _auto_units(cell_value, number_format):
     return unit_smallest, unit_largest
 
 
+def _format_duration(duration_format, value: float) -> str:
+    """Format a duration in seconds using a duration format archive."""
+    duration_style = duration_format.duration_style
+    unit_largest = duration_format.duration_unit_largest
+    unit_smallest = duration_format.duration_unit_smallest
+    if duration_format.use_automatic_duration_units:
+        unit_smallest, unit_largest = _auto_units(value, duration_format)
+
+    d = value
+    dd = int(value)
+    dstr = []
+
+    def unit_in_range(largest, smallest, unit_type):
+        return largest <= unit_type and smallest >= unit_type
+
+    def pad_digits(d, largest, smallest, unit_type):
+        return (largest == unit_type and smallest == unit_type) or d >= 10
+
+    if unit_largest == DurationUnits.WEEK:
+        dd = int(d / SECONDS_IN_WEEK)
+        if unit_smallest != DurationUnits.WEEK:
+            d -= SECONDS_IN_WEEK * dd
+        dstr.append(str(dd) + _unit_format("week", dd, duration_style))
+
+    if unit_in_range(unit_largest, unit_smallest, DurationUnits.DAY):
+        dd = int(d / SECONDS_IN_DAY)
+        if unit_smallest > DurationUnits.DAY:
+            d -= SECONDS_IN_DAY * dd
+        dstr.append(str(dd) + _unit_format("day", dd, duration_style))
+
+    if unit_in_range(unit_largest, unit_smallest, DurationUnits.HOUR):
+        dd = int(d / SECONDS_IN_HOUR)
+        if unit_smallest > DurationUnits.HOUR:
+            d -= SECONDS_IN_HOUR * dd
+        dstr.append(str(dd) + _unit_format("hour", dd, duration_style))
+
+    if unit_in_range(unit_largest, unit_smallest, DurationUnits.MINUTE):
+        dd = int(d / 60)
+        if unit_smallest > DurationUnits.MINUTE:
+            d -= 60 * dd
+        if duration_style == DurationStyle.COMPACT:
+            pad = pad_digits(dd, unit_smallest, unit_largest, DurationUnits.MINUTE)
+            dstr.append(("" if pad else "0") + str(dd))
+        else:
+            dstr.append(str(dd) + _unit_format("minute", dd, duration_style))
+
+    if unit_in_range(unit_largest, unit_smallest, DurationUnits.SECOND):
+        dd = int(d)
+        if unit_smallest > DurationUnits.SECOND:
+            d -= dd
+        if duration_style == DurationStyle.COMPACT:
+            pad = pad_digits(dd, unit_smallest, unit_largest, DurationUnits.SECOND)
+            dstr.append(("" if pad else "0") + str(dd))
+        else:
+            dstr.append(str(dd) + _unit_format("second", dd, duration_style))
+
+    if unit_smallest >= DurationUnits.MILLISECOND:
+        dd = round(1000 * d)
+        if duration_style == DurationStyle.COMPACT:
+            padding = "0" if dd >= 10 else "00"
+            padding = "" if dd >= 100 else padding
+            dstr.append(f"{padding}{dd}")
+        else:
+            dstr.append(str(dd) + _unit_format("millisecond", dd, duration_style, "ms"))
+    duration_str = (":" if duration_style == 0 else " ").join(dstr)
+    if duration_style == DurationStyle.COMPACT:
+        duration_str = re.sub(r":(\d\d\d)$", r".\1", duration_str)
+
+    return duration_str
+
+
+class _FormatterMemoInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _FormatterMemo:
+    """
+    Format cells using a function of one raw cell value, remembering the
+    formatted values of recently seen raw values. At most ``maxsize`` values
+    are kept, discarding the oldest first.
+    """
+
+    __slots__ = ("_cell_value", "_format_value", "_values", "hits", "maxsize", "misses")
+
+    def __init__(
+        self,
+        format_value: Callable[[Any], str],
+        cell_value: str,
+        maxsize: int = MAX_FORMAT_MEMO_SIZE,
+    ) -> None:
+        self._format_value = format_value
+        self._cell_value = attrgetter(cell_value)
+        self._values = {}
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, cell: Cell) -> str:
+        value = self._cell_value(cell)
+        formatted_value = self._values.get(value)
+        if formatted_value is not None:
+            self.hits += 1
+            return formatted_value
+
+        self.misses += 1
+        formatted_value = self._format_value(value)
+        # Zero is not remembered as 0.0 and -0.0 share a key but not a format
+        if value != 0 and self.maxsize > 0:
+            if len(self._values) >= self.maxsize:
+                del self._values[next(iter(self._values))]
+            self._values[value] = formatted_value
+        return formatted_value
+
+    def cache_info(self) -> _FormatterMemoInfo:
+        return _FormatterMemoInfo(self.hits, self.misses, self.maxsize, len(self._values))
+
+
+def _unsupported_formatter(format_type: int) -> Callable[[Cell], str]:
+    def format_cell(_cell: Cell) -> str:
+        warn(f"Unexpected custom format type {format_type}", UnsupportedWarning, stacklevel=4)
+        return ""
+
+    return format_cell
+
+
+def _custom_formatter(custom_format, kind: str) -> Callable[[Cell], str]:
+    """
+    Compile a custom format archive into a function that formats a cell's
+    value. ``kind`` is ``"date"`` for date cells or ``"number"`` for
+    number, currency, boolean and text cells.
+    """
+    name = custom_format.name
+    conditions = custom_format.conditions
+    default_format = custom_format.default_format
+    format_type = default_format.format_type
+    debug("custom_formatter: name=%s, format_type=%s", name, format_type)
+
+    if kind == "date":
+        if format_type != FormatType.CUSTOM_DATE:
+            return _unsupported_formatter(format_type)
+        date_formatter = _compile_date_format(default_format.custom_format_string)
+        return _FormatterMemo(date_formatter, "_datetime")
+    if default_format.requires_fraction_replacement:
+        return _FormatterMemo(partial(_format_fraction, number_format=default_format), "_d128")
+    if format_type == FormatType.CUSTOM_TEXT:
+
+        def format_text(cell: Cell) -> str:
+            text = cell._model.table_string(cell._table_id, cell._string_id)
+            return _decode_text_format(default_format, text)
+
+        return format_text
+
+    def format_number(value: float) -> str:
+        return _decode_number_format(default_format, value, name, conditions)
+
+    return _FormatterMemo(format_number, "_d128")
+
+
+def _table_formatter(table_format, kind: str) -> Callable[[Cell], str]:  # noqa: PLR0911
+    """
+    Compile a table format archive that does not reference a custom format
+    into a function that formats a cell's value.
+    """
+    debug("table_formatter: kind=%s, format_type=%s", kind, table_format.format_type)
+    if kind == "date":
+        date_formatter = _compile_date_format(table_format.date_time_format)
+        return _FormatterMemo(date_formatter, "_datetime")
+    if kind == "duration":
+        return _FormatterMemo(partial(_format_duration, table_format), "_double")
+
+    format_type = table_format.format_type
+    if format_type == FormatType.DECIMAL:
+        return _FormatterMemo(partial(_format_decimal, number_format=table_format), "_d128")
+    if format_type == FormatType.CURRENCY:
+        return _FormatterMemo(partial(_format_currency, number_format=table_format), "_d128")
+    if format_type == FormatType.BOOLEAN:
+        return lambda cell: "TRUE" if cell.value else "FALSE"
+    if format_type == FormatType.PERCENT:
+
+        def format_percent(value: float) -> str:
+            return _format_decimal((value or 0.0) * 100, table_format, percent=True)
+
+        return _FormatterMemo(format_percent, "_d128")
+    if format_type == FormatType.BASE:
+        return _FormatterMemo(partial(_format_base, number_format=table_format), "_d128")
+    if format_type == FormatType.FRACTION:
+        return _FormatterMemo(partial(_format_fraction, number_format=table_format), "_d128")
+    if format_type == FormatType.SCIENTIFIC:
+        return _FormatterMemo(partial(_format_scientific, number_format=table_format), "_d128")
+    if format_type == FormatType.CHECKBOX:
+        return lambda cell: CHECKBOX_TRUE_VALUE if cell.value else CHECKBOX_FALSE_VALUE
+    if format_type == FormatType.RATING:
+        return lambda cell: STAR_RATING_VALUE * int(cell._d128)
+    return lambda cell: str(cell.value)
+
+
 @dataclass()
 class Formatting:
     allow_none: bool = False
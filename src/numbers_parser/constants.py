@@ -56,6 +56,11 @@ MAX_COL_COUNT = 1000
 MAX_HEADER_COUNT = 5
 MAX_SIGNIFICANT_DIGITS = 15
 MAX_BASE = 36
+MAX_FORMAT_MEMO_SIZE = 4096
+# Row and column shifts a cell replays before its table is renumbered
+MAX_REPLAYED_SHIFTS = 16
+# Row and column shifts kept before a table is renumbered
+MAX_SHIFT_LOG_SIZE = 1024
 
 # Root object IDs
 DOCUMENT_ID = 1
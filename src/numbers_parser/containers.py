@@ -1,5 +1,6 @@
 import math
 import re
+from collections import defaultdict
 from pathlib import Path
 
 from numbers_parser.constants import DOCUMENT_ID, PACKAGE_ID, SUPPORTED_NUMBERS_VERSIONS
@@ -43,6 +44,8 @@ class ItemsList:
 class ObjectStore(IWorkHandler):
     def __init__(self, filepath: Path) -> int:
         self._objects = {}
+        # Object IDs for each archive type, in the order they were stored
+        self._refs = defaultdict(dict)
         self._file_store = {}
         self._object_to_filename_map = {}
         self._dirty = {}
@@ -56,7 +59,10 @@ class ObjectStore(IWorkHandler):
         self._iwork.save(filepath, self._file_store, package)
 
     def store_object(self, filename: str, identifier: int, archive: object) -> None:
+        if identifier in self._objects and type(self._objects[identifier]) is not type(archive):
+            self._refs[type(self._objects[identifier]).__name__].pop(identifier)
         self._objects[identifier] = archive
+        self._refs[type(archive).__name__][identifier] = None
         self._object_to_filename_map[identifier] = filename
 
     def store_file(self, filename: str, blob: bytes) -> None:
@@ -97,6 +103,7 @@ class ObjectStore(IWorkHandler):
             self._file_store[iwa_pathname].chunks[0].archives.append(iwa_segment)
 
         self._objects[new_id] = cls(**object_dict)
+        self._refs[cls.__name__][new_id] = None
         self._object_to_filename_map[new_id] = iwa_pathname
         return new_id, self._objects[new_id]
 
@@ -139,6 +146,7 @@ class ObjectStore(IWorkHandler):
         # Delete unreferenced archives. In principal we could delete unreferenced files,
         # but deleting tables/sheets is unsupported so this never happens.
         for obj_id in unreferenced_ids:
+            self._refs[type(self._objects[obj_id]).__name__].pop(obj_id)
             del self._objects[obj_id]
             filename = self._object_to_filename_map.pop(obj_id)
             iwa_file = self._file_store[filename]
@@ -160,6 +168,5 @@ class ObjectStore(IWorkHandler):
     def __len__(self) -> int:
         return len(self._objects)
 
-    # Don't cache: new tables and sheets can be added at runtime
     def find_refs(self, ref_name) -> list:
-        return [k for k, v in self._objects.items() if type(v).__name__ == ref_name]
+        return list(self._refs.get(ref_name, ()))
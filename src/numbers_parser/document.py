@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import Counter
 from pathlib import Path
 from typing import TYPE_CHECKING
 from warnings import warn
@@ -11,12 +12,16 @@ from numbers_parser.cell import (
     ControlFormattingType,
     CustomFormatting,
     CustomFormattingType,
+    EmptyCell,
     Formatting,
     FormattingType,
     MergedCell,
     Style,
     TextCell,
     UnsupportedWarning,
+    _column_values,
+    _unpack_storage_values,
+    _write_cells,
 )
 from numbers_parser.constants import (
     CUSTOM_FORMATTING_ALLOWED_CELLS,
@@ -27,17 +32,20 @@ from numbers_parser.constants import (
     MAX_COL_COUNT,
     MAX_HEADER_COUNT,
     MAX_ROW_COUNT,
+    MAX_TILE_SIZE,
 )
 from numbers_parser.containers import ItemsList
 from numbers_parser.model import _NumbersModel
 from numbers_parser.numbers_cache import Cacheable
-from numbers_parser.xrefs import xl_cell_to_rowcol, xl_range
+from numbers_parser.xrefs import RefContext, TableAxis, xl_cell_to_rowcol, xl_range
 
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Iterator
+    from collections.abc import Iterable, Iterator
     from datetime import datetime, timedelta
 
-__all__ = ["Document", "Sheet", "Table"]
+    from numbers_parser.constants import CellType
+
+__all__ = ["Document", "Sheet", "Table", "TableWriter"]
 
 
 class Document:
@@ -124,6 +132,83 @@ class Document:
         """
         return self._model.custom_formats
 
+    def recalculate(self) -> int:
+        """
+        Recalculate the values of formulas that depend on written cells.
+
+        Numbers stores the last calculated value of each formula, and these
+        values are not updated when cells are written using
+        :py:meth:`~numbers_parser.Table.write`. ``recalculate()`` evaluates
+        only the formulas that depend, directly or indirectly, on the cells
+        written since the document was loaded or last recalculated, so a
+        saved document contains up to date values.
+
+        Arithmetic, comparison and text operators are supported along with
+        the functions ``ABS``, ``AND``, ``AVERAGE``, ``CONCATENATE``,
+        ``COUNT``, ``COUNTA``, ``COUNTBLANK``, ``FALSE``, ``IF``, ``IFERROR``,
+        ``INT``, ``ISBLANK``, ``ISERROR``, ``LEN``, ``LOWER``, ``MAX``,
+        ``MIN``, ``MOD``, ``NOT``, ``OR``, ``POWER``, ``PRODUCT``, ``ROUND``,
+        ``SQRT``, ``SUM``, ``TRUE`` and ``UPPER``. Formulas that cannot be
+        evaluated keep their stored value.
+
+        Returns
+        -------
+        int:
+            The number of formula cells whose value changed.
+
+        Warns
+        -----
+        UnsupportedWarning:
+            If a formula uses unsupported functions, evaluates to an error,
+            or is part of a circular reference.
+
+        Example
+        -------
+
+        .. code:: python
+
+            >>> table.cell("C2").formula
+            'A2+B2'
+            >>> table.write("A2", 10)
+            >>> doc.recalculate()
+            1
+            >>> table.cell("C2").value
+            15.0
+
+        """
+        return self._model.recalculator.recalculate()
+
+    def formulas(self) -> dict[tuple[str, str], dict[tuple[int, int], str]]:
+        """
+        Return the formulas of all tables in the document.
+
+        Table and sheet names used by cross-table references are resolved
+        once for the whole document, which is much faster than reading
+        :py:attr:`~numbers_parser.Cell.formula` for each cell.
+
+        Returns
+        -------
+        Dict[Tuple[str, str], Dict[Tuple[int, int], str]]:
+            A dict mapping each table's sheet name and table name to the
+            formulas of that table, as returned by
+            :py:meth:`~numbers_parser.Table.formulas`.
+
+        Example
+        -------
+
+        .. code:: python
+
+            >>> doc.formulas()[("Sheet 1", "Table 1")]
+            {(1, 2): 'A2+B2', (2, 2): 'A3+B3'}
+
+        """
+        context = RefContext(self._model)
+        return {
+            (sheet.name, table.name): table._formulas(context)
+            for sheet in self.sheets
+            for table in sheet.tables
+        }
+
     def save(self, filename: str | Path, package: bool = False) -> None:
         """
         Save the document in the specified filename.
@@ -153,6 +238,8 @@ class Document:
                         UnsupportedWarning,
                         stacklevel=2,
                     )
+                elif table._writer is not None:
+                    table._writer.close()
                 else:
                     self._model.recalculate_table_data(table._table_id, table._data)
         self._model.save(Path(filename), package)
@@ -431,6 +518,72 @@ class Sheet:
             num_header_cols,
         )
 
+    def add_table_writer(
+        self,
+        table_name: str | None = None,
+        x: float | None = None,
+        y: float | None = None,
+        *,
+        num_cols: int | None = DEFAULT_COLUMN_COUNT,
+        num_header_rows: int | None = 1,
+        num_header_cols: int | None = 1,
+    ) -> TableWriter:
+        """
+        Add a new table to the current sheet whose rows are written one at a time.
+
+        Rows appended to the :py:class:`~numbers_parser.TableWriter` are encoded
+        into the table's storage as they are written and are not kept in memory,
+        making it suitable for generating very large tables:
+
+        .. code:: python
+
+            with sheet.add_table_writer("Readings", num_cols=3) as writer:
+                writer.append_row(["Sensor", "Time", "Value"])
+                for reading in readings:
+                    writer.append_row([reading.sensor, reading.time, reading.value])
+            doc.save("readings.numbers")
+
+        The table is named and positioned in the same way as
+        :py:meth:`~numbers_parser.Sheet.add_table`.
+
+        Parameters
+        ----------
+        table_name: str, optional
+            The name of the new table.
+        x: float, optional
+            The x offset for the table in points.
+        y: float, optional
+            The y offset for the table in points.
+        num_cols: int, optional, default: 10
+            The number of columns for the new table.
+        num_header_rows: int, optional, default: 1
+            The number of header rows for the new table.
+        num_header_cols: int, optional, default: 1
+            The number of header columns for the new table.
+
+        Returns
+        -------
+        TableWriter
+            The writer for the newly created table.
+
+        Raises
+        ------
+            IndexError: If the table name already exists.
+
+        """
+        from_table_id = self._tables[-1]._table_id
+        table = self._add_table(
+            table_name,
+            from_table_id,
+            x,
+            y,
+            1,
+            num_cols,
+            num_header_rows,
+            num_header_cols,
+        )
+        return TableWriter(table)
+
     def _add_table(
         self,
         table_name,
@@ -472,6 +625,7 @@ class Table(Cacheable):
         super().__init__()
         self._model = model
         self._table_id = table_id
+        self._writer = None
         self.num_rows = self._model.number_of_rows(self._table_id)
         self.num_cols = self._model.number_of_columns(self._table_id)
         # Cache all data now to facilitate write(). Performance impact
@@ -480,17 +634,30 @@ class Table(Cacheable):
         self._model.set_table_data(table_id, self._data)
         merge_cells = self._model.merge_cells(table_id)
 
+        # Locate all cell storage first so that number and date values
+        # can be decoded for the whole table in a single pass
+        storage = []
+        for row in range(self.num_rows):
+            for col in range(self.num_cols):
+                if not merge_cells.is_merge_reference((row, col)):
+                    buffer = self._model.storage_buffer(table_id, row, col)
+                    if buffer is not None:
+                        storage.append((row, col, buffer))
+        decoded = _unpack_storage_values([buffer for _, _, buffer in storage])
+        storage_cells = {}
+        for (row, col, buffer), values in zip(storage, decoded, strict=True):
+            cell = Cell._from_storage(table_id, row, col, buffer, model, decoded=values)
+            storage_cells[(row, col)] = cell
+
         for row in range(self.num_rows):
             self._data.append([])
             for col in range(self.num_cols):
-                if merge_cells.is_merge_reference((row, col)):
+                if (row, col) in storage_cells:
+                    cell = storage_cells[(row, col)]
+                elif merge_cells.is_merge_reference((row, col)):
                     cell = Cell._merged_cell(table_id, row, col, model)
                 else:
-                    buffer = self._model.storage_buffer(table_id, row, col)
-                    if buffer is None:
-                        cell = Cell._empty_cell(table_id, row, col, model)
-                    else:
-                        cell = Cell._from_storage(table_id, row, col, buffer, model)
+                    cell = Cell._empty_cell(table_id, row, col, model)
                 self._data[row].append(cell)
 
     @property
@@ -650,6 +817,47 @@ class Table(Cacheable):
         """
         return self._model.col_width(self._table_id, col, width)
 
+    def row_at_offset(self, offset: float) -> int | None:
+        """
+        The row at a vertical offset from the top of the table.
+
+        .. code-block:: python
+
+            # Row displayed 100pt below the top of the table
+            row = table.row_at_offset(100)
+
+        Parameters
+        ----------
+        offset: float
+            The offset from the top of the table in points.
+
+        Returns
+        -------
+        int | None:
+            The row number (zero indexed) or ``None`` if the offset is
+            outside the table.
+
+        """
+        return self._model.row_at_offset(self._table_id, offset)
+
+    def col_at_offset(self, offset: float) -> int | None:
+        """
+        The column at a horizontal offset from the left of the table.
+
+        Parameters
+        ----------
+        offset: float
+            The offset from the left of the table in points.
+
+        Returns
+        -------
+        int | None:
+            The column number (zero indexed) or ``None`` if the offset is
+            outside the table.
+
+        """
+        return self._model.col_at_offset(self._table_id, offset)
+
     @property
     def coordinates(self) -> tuple[float]:
         """Tuple[float]: The table's x, y offsets in points."""
@@ -670,10 +878,174 @@ class Table(Cacheable):
             List of rows; each row is a list of :class:`Cell` objects, or string values.
 
         """
+        self._check_rows_kept(self.num_rows - 1)
         if values_only:
             return [[cell.value for cell in row] for row in self._data]
         return self._data
 
+    def _check_rows_kept(self, row: int) -> None:
+        """
+        Raise an error if a row was written by a
+        :py:class:`~numbers_parser.TableWriter` and is not kept in memory.
+        """
+        if self._writer is not None and row >= len(self._data):
+            msg = (
+                f"row {row} of table '{self.name}' was written by a table writer"
+                " and can only be read after saving and loading the document"
+            )
+            raise IndexError(msg)
+
+    def formulas(self) -> dict[tuple[int, int], str]:
+        """
+        Return the formulas of all cells in the Table that have one.
+
+        Each formula is the same as the cell's
+        :py:attr:`~numbers_parser.Cell.formula`, but all formulas are
+        rendered in a single pass that shares the table and sheet name
+        lookups needed by cross-table references.
+
+        Returns
+        -------
+        Dict[Tuple[int, int], str]:
+            A dict mapping the row and column of each formula cell to the
+            text of its formula.
+
+        Example
+        -------
+
+        .. code:: python
+
+            >>> table.formulas()
+            {(1, 2): 'A2+B2', (2, 2): 'A3+B3'}
+
+        """
+        return self._formulas(RefContext(self._model))
+
+    def _formulas(self, context: RefContext) -> dict[tuple[int, int], str]:
+        table_formulas = self._model.table_formulas(self._table_id)
+        return table_formulas.formulas(self._data, context)
+
+    def precedents(self, *args) -> list[Cell]:  # noqa: D417
+        """
+        Return the cells that a cell's formula refers to.
+
+        Ranges in the formula are expanded to the cells they cover, and
+        references to other tables return cells from those tables. The
+        references of all formulas in the document are indexed once, so
+        repeated queries do not render or parse any formulas.
+
+        Parameters
+        ----------
+        param1: int
+            The row number (zero indexed).
+        param2: int
+            The column number (zero indexed).
+
+        Returns
+        -------
+        List[Cell]:
+            The cells referred to by the formula, or an empty list if the
+            cell does not contain a formula.
+
+        Raises
+        ------
+        IndexError:
+            If the cell reference is invalid.
+
+        Example
+        -------
+
+        .. code:: python
+
+            >>> table.cell("C2").formula
+            'SUM(A2:B2)'
+            >>> [(cell.row, cell.col) for cell in table.precedents("C2")]
+            [(1, 0), (1, 1)]
+
+        """
+        cell = self.cell(*args)
+        dependencies = self._model.formula_dependencies
+        cells = {}
+        for extent in dependencies.precedents(self._table_id, cell.row, cell.col):
+            (table_id, row_start, row_end, col_start, col_end) = extent
+            data = self._model._table_data.get(table_id, [])
+            row_end = len(data) - 1 if row_start is None else min(row_end, len(data) - 1)
+            for row in range(row_start or 0, row_end + 1):
+                num_cols = len(data[row])
+                col_end = num_cols - 1 if col_start is None else min(col_end, num_cols - 1)
+                for col in range(col_start or 0, col_end + 1):
+                    cells[id(data[row][col])] = data[row][col]
+        return list(cells.values())
+
+    def dependents(self, *args) -> list[Cell]:  # noqa: D417
+        """
+        Return the formula cells that refer directly to a cell.
+
+        Formulas in all tables of the document are included, so dependents
+        may be cells in other tables. A formula depends on a cell if it
+        refers to the cell or to a range that contains the cell.
+
+        Parameters
+        ----------
+        param1: int
+            The row number (zero indexed).
+        param2: int
+            The column number (zero indexed).
+
+        Returns
+        -------
+        List[Cell]:
+            The cells whose formulas refer to the cell.
+
+        Raises
+        ------
+        IndexError:
+            If the cell reference is invalid.
+
+        Example
+        -------
+
+        .. code:: python
+
+            >>> [cell.formula for cell in table.dependents("A2")]
+            ['SUM(A2:B2)', 'A2*2']
+
+        """
+        cell = self.cell(*args)
+        dependencies = self._model.formula_dependencies
+        return [
+            self._model._table_data[table_id][row][col]
+            for table_id, row, col in dependencies.dependents(self._table_id, cell.row, cell.col)
+        ]
+
+    def styles(self) -> list[list[Style]]:
+        """
+        Return the styles of all cells in the Table.
+
+        Styles are resolved once for each distinct combination of cell style
+        and text style in the table, so reading the styles of a whole table
+        is much faster than resolving each cell's style separately.
+
+        Cells whose style has not been read or changed share one
+        :class:`Style` object for each distinct style, which cannot be
+        modified; use :py:attr:`~numbers_parser.Cell.style` or
+        :py:meth:`~numbers_parser.Table.set_cell_style` to change the style
+        of a cell.
+
+        Returns
+        -------
+        List[List[Style]]:
+            List of rows; each row is a list of :class:`Style` objects with
+            the same values as the cell's :py:attr:`~numbers_parser.Cell.style`.
+
+        """
+        self._check_rows_kept(self.num_rows - 1)
+        cell_style = self._model.cell_style
+        return [
+            [cell_style(cell) if cell._style is None else cell._style for cell in row]
+            for row in self._data
+        ]
+
     @property
     def merge_ranges(self) -> list[str]:
         """
@@ -755,6 +1127,7 @@ class Table(Cacheable):
         if col >= self.num_cols or col < 0:
             msg = f"column {col} out of range"
             raise IndexError(msg)
+        self._check_rows_kept(row)
 
         self._model.calculate_table_categories(self._table_id)
         row_mapper = self._model._table_categories_row_mapper[self._table_id]
@@ -825,7 +1198,8 @@ class Table(Cacheable):
             msg = f"column {max_col} out of range"
             raise IndexError(msg)
 
-        rows = self.rows()
+        self._check_rows_kept(max_row)
+        rows = self._data
         self._model.calculate_table_categories(self._table_id)
         row_mapper = self._model._table_categories_row_mapper[self._table_id]
         if row_mapper is not None:
@@ -839,6 +1213,59 @@ class Table(Cacheable):
             else:
                 yield tuple(row[min_col : max_col + 1])
 
+    def formatted_rows(
+        self,
+        min_row: int | None = None,
+        max_row: int | None = None,
+        min_col: int | None = None,
+        max_col: int | None = None,
+    ) -> Iterator[tuple[str]]:
+        """
+        Produces the formatted values of cells from a table, by row.
+
+        Each value is the same as the cell's
+        :py:attr:`~numbers_parser.Cell.formatted_value`. Cells are grouped
+        by their format so that each format is resolved once for the whole
+        range, which is much faster than formatting cells individually.
+
+        Parameters
+        ----------
+        min_row: int, optional
+            Starting row number (zero indexed), or ``0`` if ``None``.
+        max_row: int, optional
+            End row number (zero indexed), or all rows if ``None``.
+        min_col: int, optional
+            Starting column number (zero indexed) or ``0`` if ``None``.
+        max_col: int, optional
+            End column number (zero indexed), or all columns if ``None``.
+
+        Yields
+        ------
+        Tuple[str]:
+            Formatted values for the row
+
+        Raises
+        ------
+        IndexError:
+            If row or column values are out of range for the table
+
+        Example
+        -------
+
+        .. code:: python
+
+            writer = csv.writer(sys.stdout)
+            for row in table.formatted_rows(min_row=1):
+                writer.writerow(row)
+
+        """
+        rows = list(self.iter_rows(min_row, max_row, min_col, max_col))
+        for formatted_row in self._formatted_values(rows):
+            yield tuple(formatted_row)
+
+    def _formatted_values(self, rows: list[list[Cell]]) -> list[list[str]]:
+        return self._model.formatted_values(self._table_id, rows)
+
     def iter_cols(
         self,
         min_col: int | None = None,
@@ -902,7 +1329,8 @@ class Table(Cacheable):
             msg = f"column {max_col} out of range"
             raise IndexError(msg)
 
-        rows = self.rows()
+        self._check_rows_kept(max_row)
+        rows = self._data
         self._model.calculate_table_categories(self._table_id)
         row_mapper = self._model._table_categories_row_mapper[self._table_id]
         if row_mapper is not None:
@@ -916,7 +1344,7 @@ class Table(Cacheable):
             else:
                 yield tuple(row[col] for row in rows)
 
-    def _validate_cell_coords(self, *args):
+    def _cell_coords(self, *args):
         if isinstance(args[0], str):
             (row, col) = xl_cell_to_rowcol(args[0])
             values = args[1:]
@@ -925,7 +1353,10 @@ class Table(Cacheable):
         else:
             (row, col) = args[0:2]
             values = args[2:]
+        self._check_max_coords(row, col)
+        return (row, col, *tuple(values))
 
+    def _check_max_coords(self, row: int, col: int) -> None:
         if row >= MAX_ROW_COUNT:
             msg = f"{row} exceeds maximum row {MAX_ROW_COUNT - 1}"
             raise IndexError(msg)
@@ -933,14 +1364,56 @@ class Table(Cacheable):
             msg = f"{col} exceeds maximum column {MAX_COL_COUNT - 1}"
             raise IndexError(msg)
 
-        for _ in range(self.num_rows, row + 1):
-            self.add_row()
-
-        for _ in range(self.num_cols, col + 1):
-            self.add_column()
-
+    def _validate_cell_coords(self, *args):
+        (row, col, *values) = self._cell_coords(*args)
+        self._grow_to(row, col)
         return (row, col, *tuple(values))
 
+    def _validate_cell_range(self, *args):
+        # Returns the rows and columns covered by a cell, an A1 range or
+        # row and column slices, growing the table to include them
+        if len(args) > 0 and isinstance(args[0], str) and ":" in args[0]:
+            (start_cell_ref, end_cell_ref) = args[0].split(":")
+            (row_start, col_start) = xl_cell_to_rowcol(start_cell_ref)
+            (row_end, col_end) = xl_cell_to_rowcol(end_cell_ref)
+            rows = range(min(row_start, row_end), max(row_start, row_end) + 1)
+            cols = range(min(col_start, col_end), max(col_start, col_end) + 1)
+            values = args[1:]
+        elif len(args) >= 2 and (isinstance(args[0], slice) or isinstance(args[1], slice)):
+            rows = self._index_range(args[0], self.num_rows)
+            cols = self._index_range(args[1], self.num_cols)
+            values = args[2:]
+        else:
+            (row, col, *values) = self._cell_coords(*args)
+            rows = range(row, row + 1)
+            cols = range(col, col + 1)
+        if rows and cols:
+            self._check_max_coords(rows[-1], cols[-1])
+            self._grow_to(rows[-1], cols[-1])
+        return (rows, cols, *tuple(values))
+
+    @staticmethod
+    def _index_range(index: int | slice, size: int) -> range:
+        # Slices are clamped to the current table size and always ascend
+        if isinstance(index, slice):
+            indexes = range(*index.indices(size))
+            return indexes[::-1] if indexes.step < 0 else indexes
+        return range(index, index + 1)
+
+    def _grow_to(self, row: int, col: int, block: tuple[int, int] | None = None) -> bool:
+        # Resize in a single step to include a cell. If the table is grown for
+        # a block write starting at ``block``, new positions inside the block
+        # are left as None for the write to fill. Returns True if any were.
+        if row < self.num_rows and col < self.num_cols:
+            return False
+        block_rows = range(block[0], row + 1) if block is not None else range(0)
+        block_cols = range(block[1], col + 1) if block is not None else range(0)
+        if row >= self.num_rows:
+            self._insert_rows(self.num_rows, row + 1 - self.num_rows, block_cols)
+        if col >= self.num_cols:
+            self._insert_columns(self.num_cols, col + 1 - self.num_cols, block_rows, block_cols)
+        return block is not None
+
     def write(self, *args, style: Style | str | None = None) -> None:  # noqa: D417
         """
         Write a value to a cell and update the style/cell type.
@@ -986,36 +1459,271 @@ class Table(Cacheable):
             If the cell type cannot be determined from the type of `param3`.
 
         """
-        # TODO: write needs to retain/init the border
         (row, col, value) = self._validate_cell_coords(*args)
-        self._data[row][col] = Cell._from_value(row, col, value)
-        self._data[row][col]._update_value(value, self._data[row][col])
-
         merge_cells = self._model.merge_cells(self._table_id)
-        self._data[row][col]._table_id = self._table_id
-        self._data[row][col]._model = self._model
-        self._data[row][col]._set_merge(merge_cells.get((row, col)))
+        if self._write_value(row, col, value, merge_cells):
+            self._model.formula_dependencies.mark_dirty()
+        self._model.recalculator.mark_changed(self._table_id, self._data[row][col])
 
-        if row < self._model.num_header_rows(self._table_id) or col < self._model.num_header_cols(
-            self._table_id,
-        ):
-            self._model.name_ref_cache.mark_dirty()
+        self._header_changed(row, col)
 
         if style is not None:
             self.set_cell_style(row, col, style)
 
+    def _write_value(self, row: int, col: int, value, merge_cells, cell_type=None) -> bool:
+        # Returns True if the value replaced a formula
+        replaced_formula = self._data[row][col]._formula_id is not None
+        if cell_type is None:
+            cell = Cell._from_value(row, col, value)
+        else:
+            cell = Cell._from_typed_value(row, col, value, cell_type)
+        cell._update_value(cell._value, cell)
+        cell._table_id = self._table_id
+        cell._model = self._model
+        cell._set_merge(merge_cells.get((row, col)))
+        self._data[row][col] = cell
+        return replaced_formula
+
+    def write_block(self, *args, style: Style | str | None = None) -> None:  # noqa: D417
+        """
+        Write a two-dimensional block of values starting at a cell.
+
+        The table is grown once to fit the whole block rather than once per
+        cell, making this much faster than calling :py:meth:`numbers_parser.Table.write`
+        for each value. Like ``write()``, the top-left cell of the block can be
+        given using **Row-column** or **A1** notation:
+
+        .. code:: python
+
+            table.write_block(1, 0, [["Alice", 31], ["Bob", 27]])
+            table.write_block("A2", [["Alice", 31], ["Bob", 27]])
+
+        Parameters
+        ----------
+        row: int
+            The row number (zero indexed) of the top-left cell.
+        col: int
+            The column number (zero indexed) of the top-left cell.
+        values: Iterable[Iterable[str | int | float | bool | DateTime | Duration | None]]
+            The rows of values to write. Rows can be of different lengths and
+            cells with the value ``None`` are left unchanged.
+        style: Style | str | None
+            The name of a document custom style or a :py:class:`~numbers_parser.cell.Style`
+            object to apply to every written cell.
+
+        Warns
+        -----
+        RuntimeWarning:
+            If a value is a float that is rounded to the maximum number
+            of supported digits.
+
+        Raises
+        ------
+        IndexError:
+            If the block extends beyond the maximum table size or the
+            style name cannot be found in the document.
+        TypeError:
+            If the style parameter is an invalid type.
+        ValueError:
+            If the cell type cannot be determined from the type of a value.
+
+        """
+        (row, col, values) = self._cell_coords(*args)
+        self._write_block(row, col, [list(x) for x in values], style)
+
+    def _write_block(
+        self,
+        row: int,
+        col: int,
+        values: list[list],
+        style: Style | str | None,
+        cell_type: CellType | None = None,
+    ) -> None:
+        if len(values) == 0:
+            return
+        num_rows = len(values)
+        num_cols = max(len(x) for x in values)
+        if num_cols == 0:
+            return
+
+        self._check_max_coords(row + num_rows - 1, col + num_cols - 1)
+        unfilled = self._grow_to(row + num_rows - 1, col + num_cols - 1, (row, col))
+
+        replaced_formula = _write_cells(
+            self._data,
+            row,
+            col,
+            values,
+            table_id=self._table_id,
+            model=self._model,
+            style=self._resolve_style(style) if style is not None else None,
+            cell_type=cell_type,
+        )
+
+        if unfilled:
+            # Positions in the grown table past the end of shorter rows
+            for row_num, row_values in enumerate(values, start=row):
+                data_row = self._data[row_num]
+                for col_num in range(col + len(row_values), col + num_cols):
+                    if data_row[col_num] is None:
+                        data_row[col_num] = Cell._empty_cell(
+                            self._table_id,
+                            row_num,
+                            col_num,
+                            self._model,
+                        )
+
+        # Merges and changes for recalculation are only recorded if needed
+        merge_cells = self._model.merge_cells(self._table_id)
+        has_merges = len(merge_cells) > 0
+        recalculator = self._model.recalculator
+        changed_cells = [] if recalculator.is_recording() else None
+        if has_merges:
+            for row_num, row_values in enumerate(values, start=row):
+                data_row = self._data[row_num]
+                for col_num in range(col, col + len(row_values)):
+                    data_row[col_num]._set_merge(merge_cells.get((row_num, col_num)))
+        if changed_cells is not None:
+            for row_num, row_values in enumerate(values, start=row):
+                data_row = self._data[row_num]
+                changed_cells += [
+                    data_row[col_num]
+                    for col_num, value in enumerate(row_values, start=col)
+                    if value is not None
+                ]
+
+        if replaced_formula:
+            self._model.formula_dependencies.mark_dirty()
+        if changed_cells is not None:
+            recalculator.mark_cells_changed(self._table_id, changed_cells)
+        self._header_changed(row, col)
+
+    def write_column(
+        self,
+        col: int,
+        values,
+        start_row: int = 0,
+        style: Style | str | None = None,
+        cell_type: CellType | None = None,
+    ) -> None:
+        """
+        Write a sequence of values down a column.
+
+        .. code:: python
+
+            table.write_column(2, [1.5, 2.5, 3.5], start_row=1)
+
+        Values can be any iterable, including NumPy arrays, pandas series and
+        objects supporting the buffer protocol such as ``array.array``, which
+        are converted to Python values in a single step. Passing ``cell_type``
+        creates every cell as that type, converting values where needed:
+
+        .. code:: python
+
+            table.write_column(0, ["1.5", 2, Decimal("3.25")], cell_type=CellType.NUMBER)
+
+        Parameters
+        ----------
+        col: int
+            The column number (zero indexed).
+        values: Iterable[str | int | float | bool | DateTime | Duration | None]
+            The values to write. Cells with the value ``None`` are left unchanged,
+            as are missing values (``NaN`` and ``NaT``) in NumPy arrays and pandas
+            series.
+        start_row: int, optional, default: 0
+            The row number (zero indexed) of the first value.
+        style: Style | str | None
+            The name of a document custom style or a :py:class:`~numbers_parser.cell.Style`
+            object to apply to every written cell.
+        cell_type: CellType | None
+            The type of cell to create for every value, which must be one of
+            ``CellType.NUMBER``, ``CellType.TEXT``, ``CellType.BOOL``,
+            ``CellType.DATE`` or ``CellType.DURATION``. Values are converted
+            to numbers or text as needed; booleans can be written from
+            ``bool`` or integer values. If ``None``, the cell type is
+            determined from the type of each value.
+
+        Warns
+        -----
+        RuntimeWarning:
+            If a value is a float that is rounded to the maximum number
+            of supported digits.
+
+        Raises
+        ------
+        IndexError:
+            If the column extends beyond the maximum table size or the
+            style name cannot be found in the document.
+        TypeError:
+            If the style parameter is an invalid type.
+        ValueError:
+            If the cell type cannot be determined from the type of a value,
+            a value cannot be written as ``cell_type`` or the values are not
+            one-dimensional.
+
+        """
+        values = [[x] for x in _column_values(values)]
+        self._write_block(start_row, col, values, style, cell_type)
+
+    def _header_changed(self, row: int, col: int) -> None:
+        # Column names are in header rows and row names in header columns
+        if row < self._model.num_header_rows(self._table_id):
+            self._model.name_ref_cache.mark_dirty(self._table_id, TableAxis.COLUMN)
+        if col < self._model.num_header_cols(self._table_id):
+            self._model.name_ref_cache.mark_dirty(self._table_id, TableAxis.ROW)
+
     def set_cell_style(self, *args) -> None:
-        (row, col, style) = self._validate_cell_coords(*args)
+        """
+        Set the style of a cell or a range of cells.
+
+        Cell references can be row-column offsets or Excel/Numbers-style A1
+        notation. A range of cells can be an A1 range or slices of rows and
+        columns. The style is looked up once and shared by every cell in the
+        range:
+
+        .. code:: python
+
+            table.set_cell_style("C2", red_text)
+            table.set_cell_style("B2:D10", "Red Text")
+            table.set_cell_style(slice(1, None), 2, red_text)
+
+        :Args (row-column):
+            * **param1** (*int | slice*): The row number (zero indexed) or rows.
+            * **param2** (*int | slice*): The column number (zero indexed) or columns.
+            * **param3** (*Style | str*): The name of a document custom style or a
+              :py:class:`~numbers_parser.cell.Style` object.
+
+        :Args (A1):
+            * **param1** (*str*): A cell reference or range using Excel/Numbers-style
+              A1 notation.
+            * **param2** (*Style | str*): The name of a document custom style or a
+              :py:class:`~numbers_parser.cell.Style` object.
+
+        Raises
+        ------
+        IndexError:
+            If the style name cannot be found in the document.
+        TypeError:
+            If the style parameter is an invalid type.
+
+        """
+        (rows, cols, style) = self._validate_cell_range(*args)
+        style = self._resolve_style(style)
+        for row in rows:
+            data_row = self._data[row]
+            for col in cols:
+                data_row[col]._style = style
+
+    def _resolve_style(self, style: Style | str) -> Style:
         if isinstance(style, Style):
-            self._data[row][col]._style = style
-        elif isinstance(style, str):
+            return style
+        if isinstance(style, str):
             if style not in self._model.styles:
                 msg = f"style '{style}' does not exist"
                 raise IndexError(msg)
-            self._data[row][col]._style = self._model.styles[style]
-        else:
-            msg = "style must be a Style object or style name"
-            raise TypeError(msg)
+            return self._model.styles[style]
+        msg = "style must be a Style object or style name"
+        raise TypeError(msg)
 
     def categorized_data(self, values_only: bool = False) -> dict | None:
         """
@@ -1113,29 +1821,37 @@ class Table(Cacheable):
 
         if start_row is None:
             start_row = self.num_rows
+        self._insert_rows(start_row, num_rows)
+
+        if default is not None:
+            for row in range(start_row, start_row + num_rows):
+                for col in range(self.num_cols):
+                    self.write(row, col, default)
+
+    def _insert_rows(self, start_row: int, num_rows: int, unfilled_cols: range = range(0)) -> None:
+        # Cells in unfilled_cols are left as None for the caller to create
+        self._model.insert_border_lines(self._table_id, "rows", start_row, num_rows)
+        if start_row < self.num_rows:
+            self._model.coordinate_shifts(self._table_id).shift("rows", start_row, num_rows)
         self.num_rows += num_rows
         self._model.number_of_rows(self._table_id, self.num_rows)
+        self._model.name_ref_cache.mark_dirty(self._table_id)
 
+        if all(col in unfilled_cols for col in range(self.num_cols)):
+            self._data[start_row:start_row] = [[None] * self.num_cols for _ in range(num_rows)]
+            return
         rows = []
         for row in range(start_row, start_row + num_rows):
             rows.append(
                 [
-                    Cell._empty_cell(self._table_id, row, col, self._model)
+                    None
+                    if col in unfilled_cols
+                    else Cell._empty_cell(self._table_id, row, col, self._model)
                     for col in range(self.num_cols)
                 ],
             )
         self._data[start_row:start_row] = rows
 
-        for row in range(start_row, self.num_rows):
-            for col in range(self.num_cols):
-                self._data[row][col].row = row
-                self._data[row][col].col = col
-
-        if default is not None:
-            for row in range(start_row, start_row + num_rows):
-                for col in range(self.num_cols):
-                    self.write(row, col, default)
-
     def add_column(
         self,
         num_cols: int | None = 1,
@@ -1177,22 +1893,40 @@ class Table(Cacheable):
 
         if start_col is None:
             start_col = self.num_cols
+        self._insert_columns(start_col, num_cols)
+
+        if default is not None:
+            for row in range(self.num_rows):
+                for col in range(start_col, start_col + num_cols):
+                    self.write(row, col, default)
+
+    def _insert_columns(
+        self,
+        start_col: int,
+        num_cols: int,
+        unfilled_rows: range = range(0),
+        unfilled_cols: range = range(0),
+    ) -> None:
+        # Cells in both unfilled_rows and unfilled_cols are left as None for
+        # the caller to create
+        self._model.insert_border_lines(self._table_id, "columns", start_col, num_cols)
+        if start_col < self.num_cols:
+            self._model.coordinate_shifts(self._table_id).shift("columns", start_col, num_cols)
         self.num_cols += num_cols
         self._model.number_of_columns(self._table_id, self.num_cols)
+        self._model.name_ref_cache.mark_dirty(self._table_id)
 
+        new_cols = range(start_col, start_col + num_cols)
+        all_unfilled = all(col in unfilled_cols for col in new_cols)
         for row in range(self.num_rows):
-            cols = [
-                Cell._empty_cell(self._table_id, row, start_col + col, self._model)
-                for col in range(num_cols)
+            if all_unfilled and row in unfilled_rows:
+                self._data[row][start_col:start_col] = [None] * num_cols
+                continue
+            unfilled = unfilled_cols if row in unfilled_rows else range(0)
+            self._data[row][start_col:start_col] = [
+                None if col in unfilled else Cell._empty_cell(self._table_id, row, col, self._model)
+                for col in new_cols
             ]
-            self._data[row][start_col:start_col] = cols
-
-            for col in range(len(self._data[row])):
-                self._data[row][col].col = col
-
-            if default is not None:
-                for col in range(start_col, start_col + num_cols):
-                    self.write(row, col, default)
 
     def delete_row(
         self,
@@ -1227,18 +1961,21 @@ class Table(Cacheable):
             raise IndexError(msg)
 
         if start_row is not None:
+            shifts = self._model.coordinate_shifts(self._table_id)
+            shifts.shift("rows", start_row + num_rows, -num_rows)
             del self._data[start_row : start_row + num_rows]
         else:
             del self._data[-num_rows:]
+        self._model.delete_border_lines(
+            self._table_id,
+            "rows",
+            start_row if start_row is not None else self.num_rows - num_rows,
+            num_rows,
+        )
 
         self.num_rows -= num_rows
         self._model.number_of_rows(self._table_id, self.num_rows)
-
-        if start_row is not None:
-            for row in range(start_row, self.num_rows):
-                for col in range(self.num_cols):
-                    self._data[row][col].row = row
-                    self._data[row][col].col = col
+        self._model.name_ref_cache.mark_dirty(self._table_id)
 
     def delete_column(
         self,
@@ -1266,26 +2003,44 @@ class Table(Cacheable):
             msg = "Column number not in range for table"
             raise IndexError(msg)
 
+        self._model.delete_border_lines(
+            self._table_id,
+            "columns",
+            start_col if start_col is not None else self.num_cols - num_cols,
+            num_cols,
+        )
+        if start_col is not None:
+            shifts = self._model.coordinate_shifts(self._table_id)
+            shifts.shift("columns", start_col + num_cols, -num_cols)
         for row in range(self.num_rows):
             if start_col is not None:
                 del self._data[row][start_col : start_col + num_cols]
             else:
                 del self._data[row][-num_cols:]
-            for col in range(len(self._data[row])):
-                self._data[row][col].col = col
 
         self.num_cols -= num_cols
         self._model.number_of_columns(self._table_id, self.num_cols)
+        self._model.name_ref_cache.mark_dirty(self._table_id)
 
     def merge_cells(self, cell_range: str | list[str]) -> None:
         """
         Convert a cell range or list of cell ranges into merged cells.
 
+        All the ranges are validated before any cells are merged, so a list
+        containing an invalid or overlapping range leaves the table unchanged.
+
         Parameters
         ----------
         cell_range: str | List[str]
             Cell range(s) to merge in A1 notation
 
+        Raises
+        ------
+        IndexError:
+            If a cell range is outside the table.
+        ValueError:
+            If a cell range overlaps another range or an existing merge.
+
         Example
         --------
         .. code:: python
@@ -1297,32 +2052,36 @@ class Table(Cacheable):
             >>> table.merge_cells("B2:C2")
             >>> table.cell("B2").is_merged
             True
+            >>> table.merge_cells(["B4:C4", "B5:C5"])
 
         """
-        if isinstance(cell_range, list):
-            for x in cell_range:
-                self.merge_cells(x)
-        else:
-            (start_cell_ref, end_cell_ref) = cell_range.split(":")
+        cell_ranges = [cell_range] if isinstance(cell_range, str) else cell_range
+        rects = []
+        for x in cell_ranges:
+            (start_cell_ref, end_cell_ref) = x.split(":")
             (row_start, col_start) = xl_cell_to_rowcol(start_cell_ref)
             (row_end, col_end) = xl_cell_to_rowcol(end_cell_ref)
-            num_rows = row_end - row_start + 1
-            num_cols = col_end - col_start + 1
-
-            merge_cells = self._model.merge_cells(self._table_id)
-            merge_cells.add_anchor(row_start, col_start, (num_rows, num_cols))
-            for row in range(row_start + 1, row_end + 1):
-                for col in range(col_start + 1, col_end + 1):
-                    self._data[row][col] = Cell._merged_cell(self._table_id, row, col, self._model)
-                    merge_cells.add_reference(row, col, (row_start, col_start, row_end, col_end))
+            (row_start, row_end) = (min(row_start, row_end), max(row_start, row_end))
+            (col_start, col_end) = (min(col_start, col_end), max(col_start, col_end))
+            if row_end >= self.num_rows or col_end >= self.num_cols:
+                msg = f"merge range {x} out of range"
+                raise IndexError(msg)
+            rects.append((row_start, col_start, row_end, col_end))
 
-            for row, cells in enumerate(self._data):
-                for col, cell in enumerate(cells):
-                    cell._set_merge(merge_cells.get((row, col)))
+        merge_cells = self._model.merge_cells(self._table_id)
+        merge_cells.add_ranges(rects)
+        for row_start, col_start, row_end, col_end in rects:
+            anchor = self._data[row_start][col_start]
+            for row in range(row_start, row_end + 1):
+                data_row = self._data[row]
+                for col in range(col_start, col_end + 1):
+                    data_row[col] = Cell._merged_cell(self._table_id, row, col, self._model)
+            self._data[row_start][col_start] = anchor
+            anchor._set_merge(merge_cells.get((row_start, col_start)))
 
     def set_cell_border(self, *args) -> None:
         """
-        Set the borders for a cell.
+        Set the borders for a cell or a range of cells.
 
         Cell references can be row-column offsets or Excel/Numbers-style A1 notation. Borders
         can be applied to multiple sides of a cell by passing a list of sides. The name(s)
@@ -1339,15 +2098,24 @@ class Table(Cacheable):
             # Solid line starting at B7's left border and running for 3 rows
             table.set_cell_border("B7", "left", Border(8.0, RGB(29, 177, 0), "solid"), 3)
 
+        A range of cells can be an A1 range or slices of rows and columns, in which case
+        the border is applied to that side of every cell in the range:
+
+        .. code-block:: python
+
+            # Solid line under every cell in row 2 from B to E
+            table.set_cell_border("B2:E2", "bottom", Border(1.0, RGB(0, 0, 0), "solid"))
+
         :Args (row-column):
-            * **param1** (*int*): The row number (zero indexed).
-            * **param2** (*int*): The column number (zero indexed).
+            * **param1** (*int | slice*): The row number (zero indexed) or rows.
+            * **param2** (*int | slice*): The column number (zero indexed) or columns.
             * **param3** (*str | List[str]*): Which side(s) of the cell to apply the border to.
             * **param4** (:py:class:`Border`): The border to add.
             * **param5** (*int*, *optional*, default: 1): The length of the stroke to add.
 
         :Args (A1):
-            * **param1** (*str*): A cell reference using Excel/Numbers-style A1 notation.
+            * **param1** (*str*): A cell reference or range using Excel/Numbers-style A1
+              notation.
             * **param2** (*str | List[str]*): Which side(s) of the cell to apply the border to.
             * **param3** (:py:class:`Border`): The border to add.
             * **param4** (*int*, *optional*, default: 1): The length of the stroke to add.
@@ -1355,8 +2123,8 @@ class Table(Cacheable):
         Raises
         ------
         TypeError:
-            If an invalid number of arguments is passed or if the types of the arguments
-            are invalid.
+            If an invalid number of arguments is passed, if the types of the arguments
+            are invalid or if a stroke length is used with a range of cells.
 
         Warns
         -----
@@ -1364,7 +2132,7 @@ class Table(Cacheable):
             If any of the sides to which the border is applied have been merged.
 
         """
-        (row, col, *args) = self._validate_cell_coords(*args)
+        (rows, cols, *args) = self._validate_cell_range(*args)
         if len(args) == 2:
             (side, border_value) = args
             length = 1
@@ -1382,48 +2150,67 @@ class Table(Cacheable):
             msg = "border length must be an int"
             raise TypeError(msg)
 
-        if isinstance(side, list):
-            for s in side:
-                self.set_cell_border(row, col, s, border_value, length)
-            return
+        if len(args) == 3 and (len(rows) > 1 or len(cols) > 1):
+            msg = "border length cannot be used with a range of cells"
+            raise TypeError(msg)
 
-        cell = self._data[row][col]
-        if (
-            cell.is_merged
-            and ((side == "right" and cell.size[1] > 1) or (side == "bottom" and cell.size[0] > 1))
-        ) or (
-            isinstance(cell, MergedCell)
-            and (
-                (side == "top" and cell.row_start < row)
-                or (side == "right" and cell.col_end > col)
-                or (side == "bottom" and cell.row_end > row)
-                or (side == "left" and cell.col_start < col)
-            )
-        ):
-            warn(
-                f"{side} edge of [{row},{col}] is merged; border not set",
-                RuntimeWarning,
-                stacklevel=2,
-            )
-            return
+        sides = side if isinstance(side, list) else [side]
+        for side in sides:
+            if side not in ["top", "right", "bottom", "left"]:
+                msg = "side must be a valid border segment"
+                raise TypeError(msg)
 
         self._model.extract_strokes(self._table_id)
+        for side in sides:
+            self._set_range_border(rows, cols, side, border_value, length)
 
-        if side in ["top", "bottom"]:
-            for border_col_num in range(col, col + length):
-                self._model.set_cell_border(self._table_id, row, border_col_num, side, border_value)
-        elif side in ["left", "right"]:
-            for border_row_num in range(row, row + length):
-                self._model.set_cell_border(self._table_id, border_row_num, col, side, border_value)
-        else:
-            msg = "side must be a valid border segment"
-            raise TypeError(msg)
+    def _set_range_border(
+        self,
+        rows: range,
+        cols: range,
+        side: str,
+        border_value: Border,
+        length: int,
+    ) -> None:
+        # The edges along each row or column are set as runs of adjacent cells
+        # rather than one cell at a time. A single cell's run has the given length.
+        merge_cells = self._model.merge_cells(self._table_id)
+        horizontal = side in ["top", "bottom"]
+        single_cell = len(rows) == len(cols) == 1
+        for line in rows if horizontal else cols:
+            runs = []
+            for pos in cols if horizontal else rows:
+                (row, col) = (line, pos) if horizontal else (pos, line)
+                if merge_cells.is_merged_edge(row, col, side):
+                    warn(
+                        f"{side} edge of [{row},{col}] is merged; border not set",
+                        RuntimeWarning,
+                        stacklevel=3,
+                    )
+                elif runs and runs[-1][0] + runs[-1][1] == pos:
+                    runs[-1][1] += 1
+                else:
+                    runs.append([pos, 1])
+
+            for start, run_length in runs:
+                (row, col) = (line, start) if horizontal else (start, line)
+                stroke_length = length if single_cell else run_length
+                self._model.set_cell_border(
+                    self._table_id,
+                    row,
+                    col,
+                    side,
+                    border_value,
+                    stroke_length,
+                )
 
     def set_cell_formatting(self, *args: str, **kwargs) -> None:
         r"""
-        Set the data format for a cell.
+        Set the data format for a cell or a range of cells.
 
         Cell references can be **row-column** offsets or Excel/Numbers-style **A1** notation.
+        A range of cells can be an A1 range or slices of rows and columns, in which case
+        empty and merged cells in the range are left unformatted.
 
         .. code:: python
 
@@ -1580,7 +2367,7 @@ class Table(Cacheable):
 
 
         """
-        (row, col, *args) = self._validate_cell_coords(*args)
+        (rows, cols, *args) = self._validate_cell_range(*args)
         if len(args) == 1:
             format_type = args[0]
         elif len(args) > 1:
@@ -1590,12 +2377,18 @@ class Table(Cacheable):
             msg = "no type defined for cell format"
             raise TypeError(msg)
 
+        cells = [self._data[row][col] for row in rows for col in cols]
+        if len(cells) > 1:
+            cells = [cell for cell in cells if not isinstance(cell, (EmptyCell, MergedCell))]
+        if not cells:
+            return
         if format_type == "custom":
-            self._set_cell_custom_format(row, col, **kwargs)
+            self._set_cell_custom_format(cells, **kwargs)
         else:
-            self._set_cell_data_format(row, col, format_type, **kwargs)
+            self._set_cell_data_format(cells, format_type, **kwargs)
+        self._header_changed(rows[0], cols[0])
 
-    def _set_cell_custom_format(self, row: int, col: int, **kwargs) -> None:
+    def _set_cell_custom_format(self, cells: list[Cell], **kwargs) -> None:
         if "format" not in kwargs:
             msg = "no format provided for custom format"
             raise TypeError(msg)
@@ -1612,19 +2405,20 @@ class Table(Cacheable):
             msg = "format must be a CustomFormatting object or format name"
             raise TypeError(msg)
 
-        cell = self._data[row][col]
-        type_name = type(cell).__name__
         format_type_name = custom_format.type.name.lower()
-        if type_name not in CUSTOM_FORMATTING_ALLOWED_CELLS[format_type_name]:
-            msg = f"cannot use {format_type_name} formatting for cells of type {type_name}"
-            raise TypeError(
-                msg,
-            )
+        for cell in cells:
+            type_name = type(cell).__name__
+            if type_name not in CUSTOM_FORMATTING_ALLOWED_CELLS[format_type_name]:
+                msg = f"cannot use {format_type_name} formatting for cells of type {type_name}"
+                raise TypeError(
+                    msg,
+                )
 
-        format_id = self._model.custom_format_id(self._table_id, custom_format)
-        cell._set_formatting(format_id, custom_format.type)
+        format_id = self._model.custom_format_id(self._table_id, custom_format, len(cells))
+        for cell in cells:
+            cell._set_formatting(format_id, custom_format.type)
 
-    def _set_cell_data_format(self, row: int, col: int, format_type_name: str, **kwargs) -> None:
+    def _set_cell_data_format(self, cells: list[Cell], format_type_name: str, **kwargs) -> None:
         try:
             format_type = FormattingType[format_type_name.upper()]
             _ = FORMATTING_ALLOWED_CELLS[format_type_name]
@@ -1632,20 +2426,15 @@ class Table(Cacheable):
             msg = f"unsupported cell format type '{format_type_name}'"
             raise TypeError(msg) from None
 
-        cell = self._data[row][col]
-        type_name = type(cell).__name__
-        if type_name not in FORMATTING_ALLOWED_CELLS[format_type_name]:
-            msg = f"cannot use {format_type_name} formatting for cells of type {type_name}"
-            raise TypeError(
-                msg,
-            )
+        for cell in cells:
+            type_name = type(cell).__name__
+            if type_name not in FORMATTING_ALLOWED_CELLS[format_type_name]:
+                msg = f"cannot use {format_type_name} formatting for cells of type {type_name}"
+                raise TypeError(
+                    msg,
+                )
 
         formatting = Formatting(type=format_type, **kwargs)
-        if format_type_name in FORMATTING_ACTION_CELLS:
-            control_id = self._model.control_cell_archive(self._table_id, format_type, formatting)
-        else:
-            control_id = None
-
         is_currency = format_type == FormattingType.CURRENCY
         if format_type_name in ["slider", "stepper"]:
             if "control_format" in kwargs:
@@ -1661,20 +2450,204 @@ class Table(Cacheable):
                     ) from None
             else:
                 number_format_type = FormattingType.NUMBER
-            format_id = self._model.format_archive(self._table_id, number_format_type, formatting)
+            format_types = [number_format_type] * len(cells)
         elif format_type_name == "popup":
-            if cell.value == "" and not formatting.allow_none:
-                msg = "none value not allowed for popup"
-                raise IndexError(msg)
-            if cell.value != "" and cell.value not in formatting.popup_values:
-                msg = f"current cell value '{cell.value}' does not match any popup values"
-                raise IndexError(
-                    msg,
-                )
+            for cell in cells:
+                if cell.value == "" and not formatting.allow_none:
+                    msg = "none value not allowed for popup"
+                    raise IndexError(msg)
+                if cell.value != "" and cell.value not in formatting.popup_values:
+                    msg = f"current cell value '{cell.value}' does not match any popup values"
+                    raise IndexError(
+                        msg,
+                    )
+            format_types = [
+                FormattingType.TEXT if isinstance(cell, TextCell) else True for cell in cells
+            ]
+        else:
+            format_types = [format_type] * len(cells)
 
-            popup_format_type = FormattingType.TEXT if isinstance(cell, TextCell) else True
-            format_id = self._model.format_archive(self._table_id, popup_format_type, formatting)
+        if format_type_name in FORMATTING_ACTION_CELLS:
+            control_id = self._model.control_cell_archive(
+                self._table_id,
+                format_type,
+                formatting,
+                len(cells),
+            )
         else:
-            format_id = self._model.format_archive(self._table_id, format_type, formatting)
+            control_id = None
 
-        cell._set_formatting(format_id, format_type, control_id, is_currency=is_currency)
+        # Each distinct format is created once and shared by all its cells
+        format_ids = {
+            cell_format_type: self._model.format_archive(
+                self._table_id,
+                cell_format_type,
+                formatting,
+                refcount,
+            )
+            for cell_format_type, refcount in Counter(format_types).items()
+        }
+        for cell, cell_format_type in zip(cells, format_types, strict=True):
+            cell._set_formatting(
+                format_ids[cell_format_type],
+                format_type,
+                control_id,
+                is_currency=is_currency,
+            )
+
+
+class TableWriter:
+    """
+    Append rows to a new table, encoding them into the table's storage as they
+    are written rather than keeping a :py:class:`~numbers_parser.Cell` for each
+    value. Every ``MAX_TILE_SIZE`` rows, the completed tile is added to the
+    table so memory use is limited to the encoded storage.
+
+    The header rows of the table are also kept so that column names can be
+    used in formulas, but other rows can only be read once the document has
+    been saved and loaded again. The table must not be edited using
+    :py:class:`~numbers_parser.Table` methods.
+
+    .. NOTE::
+
+       Do not instantiate directly. Table writers are created by
+       :py:meth:`~numbers_parser.Sheet.add_table_writer`.
+    """
+
+    def __init__(self, table: Table) -> None:
+        self._table = table
+        self._model = table._model
+        self._table_id = table._table_id
+        self._num_cols = table.num_cols
+        self._num_header_rows = self._model.num_header_rows(self._table_id)
+        self._num_rows = 0
+        self._tile_idx = 0
+        self._row_infos = []
+        self._header_rows = []
+        self._closed = False
+        # Empty cells are never returned to the caller so one can be shared
+        self._empty_cell = Cell._empty_cell(self._table_id, 0, 0, self._model)
+        table._writer = self
+
+        # Replace the storage created for the initial table
+        base_data_store = self._model.objects[self._table_id].base_data_store
+        base_data_store.tiles.ClearField("tiles")
+        if self._num_cols > MAX_TILE_SIZE:
+            base_data_store.tiles.should_use_wide_rows = True
+        self._model.init_table_strings(self._table_id)
+
+    def __enter__(self) -> TableWriter:  # noqa: PYI034
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    @property
+    def table(self) -> Table:
+        """:class:`Table`: The table being written."""
+        return self._table
+
+    @property
+    def num_rows(self) -> int:
+        """int: The number of rows written to the table."""
+        return self._num_rows
+
+    def append_row(
+        self,
+        values: Iterable[str | int | float | bool | datetime | timedelta | None],
+    ) -> None:
+        """
+        Append a row of values to the table.
+
+        Parameters
+        ----------
+        values: Iterable[str | int | float | bool | DateTime | Duration | None]
+            The values for each column. Rows shorter than the table are padded
+            with empty cells and ``None`` values create empty cells.
+
+        Warns
+        -----
+        RuntimeWarning:
+            If a value is a float that is rounded to the maximum number
+            of supported digits.
+
+        Raises
+        ------
+        IndexError:
+            If the row has more values than the table has columns or the
+            table would exceed the maximum number of rows.
+        ValueError:
+            If the writer is closed or the cell type cannot be determined from
+            the type of a value.
+
+        """
+        if self._closed:
+            msg = "cannot append rows to a closed table writer"
+            raise ValueError(msg)
+        values = list(values)
+        if len(values) > self._num_cols:
+            msg = f"row has {len(values)} values but table has {self._num_cols} columns"
+            raise IndexError(msg)
+        row = self._num_rows
+        if row >= MAX_ROW_COUNT:
+            msg = f"{row} exceeds maximum row {MAX_ROW_COUNT - 1}"
+            raise IndexError(msg)
+
+        cells = []
+        for col, value in enumerate(values):
+            if value is None:
+                cells.append(self._empty_cell)
+                continue
+            cell = Cell._from_value(row, col, value)
+            cell._update_value(cell._value, cell)
+            cell._table_id = self._table_id
+            cell._model = self._model
+            cells.append(cell)
+        cells += [self._empty_cell] * (self._num_cols - len(cells))
+
+        if row < self._num_header_rows:
+            header_row = [
+                Cell._empty_cell(self._table_id, row, col, self._model)
+                if cell is self._empty_cell
+                else cell
+                for col, cell in enumerate(cells)
+            ]
+            self._header_rows.append(header_row)
+        self._model.update_string_keys(self._table_id, [cells])
+        row_info = self._model.row_info(cells, self._num_cols, row % MAX_TILE_SIZE)
+        self._row_infos.append(row_info)
+        self._num_rows += 1
+        if len(self._row_infos) == MAX_TILE_SIZE:
+            self._add_tile()
+
+    def _add_tile(self) -> None:
+        num_rows = len(self._row_infos)
+        self._model.add_tile(self._table_id, self._tile_idx, num_rows, self._row_infos)
+        self._row_infos = []
+        self._tile_idx += 1
+
+    def close(self) -> None:
+        """
+        Finish writing the table. No more rows can be appended after closing.
+        Writers are closed automatically when the document is saved.
+
+        Only the header rows of the closed table can be read using
+        :py:class:`~numbers_parser.Table` methods. Reading other rows raises
+        an ``IndexError`` until the document is saved and loaded again.
+        """
+        if self._closed:
+            return
+        if self._num_rows == 0:
+            self.append_row([])
+        # Like a full save, the last tile is added even when empty
+        self._add_tile()
+        self._closed = True
+
+        num_rows = self._num_rows
+        self._table.num_rows = num_rows
+        self._model.number_of_rows(self._table_id, num_rows)
+        self._model.set_row_headers(self._table_id, [num_rows] * num_rows)
+        self._model.set_column_headers(self._table_id, [num_rows] * self._num_cols)
+        self._table._data[:] = self._header_rows
+        self._model.name_ref_cache.mark_dirty(self._table_id)
+        self._model.objects.update_object_file_store()
@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import math
+import warnings
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import chain
+
+from numbers_parser.cell import (
+    BoolCell,
+    Cell,
+    DateCell,
+    DurationCell,
+    ErrorCell,
+    NumberCell,
+    TextCell,
+    _round_significant_digits,
+)
+from numbers_parser.constants import EPOCH
+from numbers_parser.exceptions import FormulaError, UnsupportedWarning
+from numbers_parser.formula import NODE_FUNCTION_MAP, merge_extents
+from numbers_parser.generated import TSCEArchives_pb2 as TSCEArchives
+from numbers_parser.generated.functionmap import FUNCTION_MAP
+
+NODE_TYPE_NAMES = {
+    k: v.name for k, v in TSCEArchives._ASTNODEARRAYARCHIVE_ASTNODETYPE.values_by_number.items()
+}
+
+
+@dataclass(frozen=True)
+class ErrorValue:
+    """An error value such as ``#DIV/0!`` produced while evaluating a formula."""
+
+    code: str
+
+    def __str__(self) -> str:
+        return self.code
+
+
+DIV_ZERO_ERROR = ErrorValue("#DIV/0!")
+REF_ERROR = ErrorValue("#REF!")
+VALUE_ERROR = ErrorValue("#VALUE!")
+
+
+class Reference:
+    """A reference to a cell or range whose values are read when needed."""
+
+    def __init__(self, model, extent: tuple) -> None:
+        self._model = model
+        self.extent = extent
+
+    def values(self) -> list:
+        (table_id, row_start, row_end, col_start, col_end) = self.extent
+        data = self._model._table_data.get(table_id, [])
+        # References to whole columns or rows exclude headers and footers
+        if row_start is None:
+            num_footer_rows = self._model.objects[table_id].number_of_footer_rows
+            row_start = self._model.num_header_rows(table_id)
+            row_end = len(data) - num_footer_rows - 1
+        if col_start is None:
+            col_start = self._model.num_header_cols(table_id)
+        values = []
+        for row in range(row_start, min(row_end, len(data) - 1) + 1):
+            cells = data[row]
+            last_col = len(cells) - 1 if col_end is None else min(col_end, len(cells) - 1)
+            values += [cell_value(cells[col]) for col in range(col_start, last_col + 1)]
+        return values
+
+    def value(self) -> object:
+        (_, row_start, row_end, col_start, col_end) = self.extent
+        if row_start is None or col_start is None or row_start != row_end or col_start != col_end:
+            return VALUE_ERROR
+        values = self.values()
+        return values[0] if values else None
+
+
+def cell_value(cell: Cell) -> object:
+    """Return the value of a cell as used in formula evaluation."""
+    if isinstance(cell, ErrorCell):
+        return VALUE_ERROR
+    return cell.value
+
+
+def scalar(value: object) -> object:
+    """Return a single value for an argument that may be a reference."""
+    if isinstance(value, Reference):
+        return value.value()
+    if isinstance(value, tuple):
+        return VALUE_ERROR
+    return value
+
+
+def to_number(value: object) -> object:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        return float(value) if value else 0
+    return value
+
+
+def to_bool(value: object) -> bool:
+    if isinstance(value, str):
+        if value.upper() not in ["TRUE", "FALSE"]:
+            raise ValueError
+        return value.upper() == "TRUE"
+    return bool(to_number(value))
+
+
+def to_text(value: object) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).upper()
+    if isinstance(value, float):
+        value = _round_significant_digits(value)
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+
+def _compare_key(value: object) -> tuple:
+    # Numbers sort before text, and text before booleans
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, str):
+        return (1, value.casefold())
+    return (0, value)
+
+
+def flatten(args: list) -> list:
+    """Return the values of all arguments, expanding references and lists."""
+    values = []
+    for arg in args:
+        if isinstance(arg, Reference):
+            values += arg.values()
+        elif isinstance(arg, tuple):
+            values += flatten(list(arg))
+        else:
+            values.append(arg)
+    return values
+
+
+def numeric_args(args: list) -> list:
+    """
+    Return the numeric values of arguments. Values in referenced cells that
+    are not numbers are ignored; values passed directly are converted.
+    """
+    values = []
+    for arg in args:
+        if isinstance(arg, (Reference, tuple)):
+            values += [
+                x
+                for x in flatten([arg])
+                if isinstance(x, (int, float, timedelta, ErrorValue)) and not isinstance(x, bool)
+            ]
+        elif arg is not None:
+            values.append(arg if isinstance(arg, (timedelta, ErrorValue)) else to_number(arg))
+    return values
+
+
+def _first_error(values: list) -> ErrorValue | None:
+    return next((x for x in values if isinstance(x, ErrorValue)), None)
+
+
+def _sum(args: list) -> object:
+    values = numeric_args(args)
+    start = timedelta(0) if any(isinstance(x, timedelta) for x in values) else 0
+    return _first_error(values) or sum(values, start)
+
+
+def _product(args: list) -> object:
+    values = numeric_args(args)
+    return _first_error(values) or math.prod(values)
+
+
+def _average(args: list) -> object:
+    values = numeric_args(args)
+    if not values:
+        return DIV_ZERO_ERROR
+    return _first_error(values) or _sum(values) / len(values)
+
+
+def _min(args: list) -> object:
+    values = numeric_args(args)
+    return _first_error(values) or min(values, default=0)
+
+
+def _max(args: list) -> object:
+    values = numeric_args(args)
+    return _first_error(values) or max(values, default=0)
+
+
+def _count(args: list) -> int:
+    return sum(
+        1
+        for x in flatten(args)
+        if isinstance(x, (int, float, datetime, timedelta)) and not isinstance(x, bool)
+    )
+
+
+def _counta(args: list) -> int:
+    return sum(1 for x in flatten(args) if x is not None and x != "")
+
+
+def _countblank(args: list) -> int:
+    return sum(1 for x in flatten(args) if x is None or x == "")
+
+
+def _if(args: list) -> object:
+    # Both branches are evaluated before IF as formulas are postfix
+    condition = scalar(args[0])
+    if isinstance(condition, ErrorValue):
+        return condition
+    if to_bool(condition):
+        return scalar(args[1]) if len(args) > 1 else True
+    return scalar(args[2]) if len(args) > 2 else False
+
+
+def _iferror(args: list) -> object:
+    value = scalar(args[0])
+    return scalar(args[1]) if isinstance(value, ErrorValue) else value
+
+
+def _and(args: list) -> object:
+    values = [x for x in flatten(args) if x is not None]
+    return _first_error(values) or all(to_bool(x) for x in values)
+
+
+def _or(args: list) -> object:
+    values = [x for x in flatten(args) if x is not None]
+    return _first_error(values) or any(to_bool(x) for x in values)
+
+
+def _round(value: object, digits: object = 0) -> float:
+    # Numbers rounds halves away from zero
+    value = Decimal(str(to_number(value)))
+    exponent = Decimal(1).scaleb(-int(to_number(digits)))
+    return float(value.quantize(exponent, rounding=ROUND_HALF_UP))
+
+
+def _scalar_function(func: callable) -> callable:
+    def evaluate(args: list) -> object:
+        values = [scalar(x) for x in args]
+        return _first_error(values) or func(*values)
+
+    return evaluate
+
+
+FUNCTIONS = {
+    "ABS": _scalar_function(lambda x: abs(to_number(x))),
+    "AND": _and,
+    "AVERAGE": _average,
+    "CONCATENATE": _scalar_function(lambda *args: "".join(to_text(x) for x in args)),
+    "COUNT": _count,
+    "COUNTA": _counta,
+    "COUNTBLANK": _countblank,
+    "FALSE": lambda _: False,
+    "IF": _if,
+    "IFERROR": _iferror,
+    "INT": _scalar_function(lambda x: math.floor(to_number(x))),
+    "ISBLANK": lambda args: scalar(args[0]) is None,
+    "ISERROR": lambda args: isinstance(scalar(args[0]), ErrorValue),
+    "LEN": _scalar_function(lambda x: len(to_text(x))),
+    "LOWER": _scalar_function(lambda x: to_text(x).lower()),
+    "MAX": _max,
+    "MIN": _min,
+    "MOD": _scalar_function(lambda x, y: to_number(x) % to_number(y)),
+    "NOT": _scalar_function(lambda x: not to_bool(x)),
+    "OR": _or,
+    "POWER": _scalar_function(lambda x, y: to_number(x) ** to_number(y)),
+    "PRODUCT": _product,
+    "ROUND": _scalar_function(_round),
+    "SQRT": _scalar_function(lambda x: math.sqrt(to_number(x))),
+    "SUM": _sum,
+    "TRUE": lambda _: True,
+    "UPPER": _scalar_function(lambda x: to_text(x).upper()),
+}
+
+
+def _binary_operator(func: callable) -> callable:
+    def evaluate(self, *_args) -> None:
+        arg2, arg1 = (scalar(x) for x in self.popn(2))
+        self.push(_first_error([arg1, arg2]) or self.apply(func, arg1, arg2))
+
+    return evaluate
+
+
+def _arithmetic(func: callable) -> callable:
+    def evaluate(arg1: object, arg2: object) -> object:
+        if not isinstance(arg1, (datetime, timedelta)):
+            arg1 = to_number(arg1)
+        if not isinstance(arg2, (datetime, timedelta)):
+            arg2 = to_number(arg2)
+        # Numbers added to or subtracted from dates are days
+        if isinstance(arg1, datetime) and isinstance(arg2, (int, float)):
+            arg2 = timedelta(days=arg2)
+        elif isinstance(arg2, datetime) and isinstance(arg1, (int, float)):
+            arg1 = timedelta(days=arg1)
+        return func(arg1, arg2)
+
+    return evaluate
+
+
+def _comparison(func: callable) -> callable:
+    def evaluate(arg1: object, arg2: object) -> bool:
+        if arg1 is None:
+            arg1 = "" if isinstance(arg2, str) else 0
+        if arg2 is None:
+            arg2 = "" if isinstance(arg1, str) else 0
+        return func(_compare_key(arg1), _compare_key(arg2))
+
+    return evaluate
+
+
+class FormulaEvaluator:
+    """
+    A stack machine that evaluates the AST of a formula for one cell. Node
+    types are dispatched to methods using the same names as
+    :py:class:`~numbers_parser.formula.Formula`.
+    """
+
+    def __init__(self, model, table_id: int, row: int, col: int) -> None:
+        self._model = model
+        self._table_id = table_id
+        self._stack = []
+        self.row = row
+        self.col = col
+
+    def evaluate(self, nodes) -> object:
+        for node in nodes:
+            node_type = NODE_TYPE_NAMES[node.AST_node_type]
+            if node_type == "REFERENCE_ERROR_WITH_UIDS":
+                self.push(REF_ERROR)
+            elif node_type not in NODE_FUNCTION_MAP:
+                msg = f"node type {node_type} is unsupported"
+                raise FormulaError(msg)
+            elif NODE_FUNCTION_MAP[node_type] is not None:
+                getattr(self, NODE_FUNCTION_MAP[node_type])(node)
+        if len(self._stack) != 1:
+            msg = "invalid formula"
+            raise FormulaError(msg)
+        value = scalar(self._stack[0])
+        return 0 if value is None else value
+
+    def apply(self, func: callable, *args) -> object:
+        try:
+            return func(*args)
+        except ZeroDivisionError:
+            return DIV_ZERO_ERROR
+        except (TypeError, ValueError, OverflowError):
+            return VALUE_ERROR
+
+    def pop(self) -> object:
+        return self._stack.pop()
+
+    def popn(self, num_args: int) -> tuple:
+        if len(self._stack) < num_args:
+            msg = "stack too small"
+            raise FormulaError(msg)
+        values = tuple(reversed(self._stack[len(self._stack) - num_args :]))
+        del self._stack[len(self._stack) - num_args :]
+        return values
+
+    def push(self, val: object) -> None:
+        self._stack.append(val)
+
+    add = _binary_operator(_arithmetic(lambda x, y: x + y))
+    sub = _binary_operator(_arithmetic(lambda x, y: x - y))
+    mul = _binary_operator(_arithmetic(lambda x, y: x * y))
+    div = _binary_operator(_arithmetic(lambda x, y: x / y))
+    power = _binary_operator(_arithmetic(lambda x, y: x**y))
+    concat = _binary_operator(lambda x, y: to_text(x) + to_text(y))
+    equals = _binary_operator(_comparison(lambda x, y: x == y))
+    not_equals = _binary_operator(_comparison(lambda x, y: x != y))
+    greater_than = _binary_operator(_comparison(lambda x, y: x > y))
+    greater_than_or_equal = _binary_operator(_comparison(lambda x, y: x >= y))
+    less_than = _binary_operator(_comparison(lambda x, y: x < y))
+    less_than_or_equal = _binary_operator(_comparison(lambda x, y: x <= y))
+
+    def array(self, node) -> None:
+        msg = "arrays are unsupported"
+        raise FormulaError(msg)
+
+    def boolean(self, node) -> None:
+        if node.HasField("AST_token_node_boolean"):
+            self.push(node.AST_token_node_boolean)
+        else:
+            self.push(node.AST_boolean_node_boolean)
+
+    def date(self, node) -> None:
+        dt = datetime(2001, 1, 1) + timedelta(seconds=node.AST_date_node_dateNum)  # noqa: DTZ001
+        self.push(dt)
+
+    def empty(self, node) -> None:
+        self.push(None)
+
+    def function(self, node) -> None:
+        node_index = node.AST_function_node_index
+        func_name = FUNCTION_MAP.get(node_index, f"function ID {node_index}")
+        if func_name not in FUNCTIONS:
+            msg = f"{func_name} is unsupported"
+            raise FormulaError(msg)
+        args = list(reversed(self.popn(node.AST_function_node_numArgs)))
+        self.push(self.apply(FUNCTIONS[func_name], args))
+
+    def list(self, node) -> None:
+        # A list of one value is a parenthesized expression
+        values = tuple(reversed(self.popn(node.AST_list_node_numArgs)))
+        self.push(values[0] if len(values) == 1 else values)
+
+    def negate(self, node) -> None:
+        arg = scalar(self.pop())
+        self.push(arg if isinstance(arg, ErrorValue) else self.apply(lambda x: -to_number(x), arg))
+
+    def number(self, node) -> None:
+        if node.AST_number_node_decimal_high == 0x3040000000000000:
+            self.push(node.AST_number_node_decimal_low)
+        else:
+            self.push(node.AST_number_node_number)
+
+    def percent(self, node) -> None:
+        arg = scalar(self.pop())
+        if isinstance(arg, ErrorValue):
+            self.push(arg)
+        else:
+            self.push(self.apply(lambda x: to_number(x) / 100, arg))
+
+    def range(self, node) -> None:
+        arg2, arg1 = self.popn(2)
+        if not isinstance(arg1, Reference) or not isinstance(arg2, Reference):
+            msg = "ranges of expressions are unsupported"
+            raise FormulaError(msg)
+        self.push(Reference(self._model, merge_extents(arg1.extent, arg2.extent)))
+
+    def string(self, node) -> None:
+        self.push(node.AST_string_node_string)
+
+    def xref(self, node) -> None:
+        extent = self._model.node_to_extent(self._table_id, self.row, self.col, node)
+        self.push(REF_ERROR if extent is None else Reference(self._model, extent))
+
+
+class Recalculator:
+    """
+    Tracks the cells written since a document with formulas was loaded and
+    recalculates the formulas that depend on them, in dependency order. Only formulas
+    downstream of a changed cell are evaluated, and evaluation stops at
+    formulas whose value does not change.
+    """
+
+    def __init__(self, model) -> None:
+        self._model = model
+        # Changed cells are kept by identity so that they do not need to be
+        # renumbered when rows or columns are inserted or deleted
+        self._changed_cells = {}
+
+    def is_recording(self) -> bool:
+        """Return ``True`` if written cells are recorded for recalculation."""
+        return self._model.formula_dependencies.has_formulas()
+
+    def mark_changed(self, table_id: int, cell: Cell) -> None:
+        if self.is_recording():
+            self._changed_cells[id(cell)] = (table_id, cell)
+
+    def mark_cells_changed(self, table_id: int, cells: list[Cell]) -> None:
+        if self.is_recording():
+            self._changed_cells.update((id(cell), (table_id, cell)) for cell in cells)
+
+    def recalculate(self) -> int:
+        dependencies = self._model.formula_dependencies
+        changed_cells = self._current_changed_cells()
+        order = self._evaluation_order(changed_cells)
+        stale = {key for cell in changed_cells for key in dependencies.dependents(*cell)}
+        num_updated = 0
+        for key in order:
+            if key not in stale:
+                continue
+            if self._update_cell(*key):
+                num_updated += 1
+                stale.update(dependencies.dependents(*key))
+        self._changed_cells = {}
+        return num_updated
+
+    def _current_changed_cells(self) -> set[tuple]:
+        """
+        Return the (table_id, row, col) of the changed cells that are still in
+        their tables and in tables that formulas refer to.
+        """
+        dependencies = self._model.formula_dependencies
+        changed_cells = set()
+        for table_id, cell in self._changed_cells.values():
+            if not dependencies.is_referenced(table_id):
+                continue
+            data = self._model._table_data[table_id]
+            (row, col) = (cell.row, cell.col)
+            if 0 <= row < len(data) and 0 <= col < len(data[row]) and data[row][col] is cell:
+                changed_cells.add((table_id, row, col))
+        return changed_cells
+
+    def _evaluation_order(self, changed_cells: set) -> list[tuple]:
+        """
+        Return the formula cells downstream of the changed cells ordered so
+        that each formula follows the formulas it refers to.
+        """
+        dependencies = self._model.formula_dependencies
+        dependents = {}
+        pending = list(chain.from_iterable(dependencies.dependents(*x) for x in changed_cells))
+        while pending:
+            key = pending.pop()
+            if key not in dependents:
+                dependents[key] = dependencies.dependents(*key)
+                pending += dependents[key]
+
+        num_precedents = dict.fromkeys(dependents, 0)
+        for keys in dependents.values():
+            for key in keys:
+                num_precedents[key] += 1
+        ready = [key for key, count in num_precedents.items() if count == 0]
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for dependent in dependents[key]:
+                num_precedents[dependent] -= 1
+                if num_precedents[dependent] == 0:
+                    ready.append(dependent)
+
+        for key in dependents.keys() - set(order):
+            self._warn(key, "circular reference")
+        return order
+
+    def _update_cell(self, table_id: int, row: int, col: int) -> bool:
+        cell = self._model._table_data[table_id][row][col]
+        nodes = self._model.formula_ast(table_id).get(cell._formula_id)
+        if nodes is None:
+            return False
+        try:
+            value = FormulaEvaluator(self._model, table_id, row, col).evaluate(nodes)
+        except FormulaError as e:
+            self._warn((table_id, row, col), str(e))
+            return False
+        if isinstance(value, ErrorValue):
+            self._warn((table_id, row, col), f"formula evaluates to {value}")
+            return False
+
+        new_cell = _cell_from_result(cell, value)
+        if type(new_cell) is type(cell) and new_cell.value == cell.value:
+            return False
+        self._model._table_data[table_id][row][col] = new_cell
+        return True
+
+    def _warn(self, key: tuple, msg: str) -> None:
+        (table_id, row, col) = key
+        table_name = self._model.table_name(table_id)
+        warnings.warn(
+            f"{table_name}@[{row},{col}]: cannot recalculate formula: {msg}",
+            UnsupportedWarning,
+            stacklevel=2,
+        )
+
+
+def _cell_from_result(cell: Cell, value: object) -> Cell:
+    """Return a new formula cell for a result that keeps a cell's formula and formats."""
+    # Raw values are set as they are for cells read from storage so that
+    # the cell's formats apply to the new value
+    if isinstance(value, bool):
+        new_cell = BoolCell(cell.row, cell.col, value)
+        new_cell._double = float(value)
+    elif isinstance(value, (int, float)):
+        value = _round_significant_digits(float(value))
+        if isinstance(cell, NumberCell):
+            new_cell = NumberCell(cell.row, cell.col, value, cell_type=cell._type)
+        else:
+            new_cell = NumberCell(cell.row, cell.col, value)
+        new_cell._d128 = value
+    elif isinstance(value, str):
+        new_cell = TextCell(cell.row, cell.col, value)
+    elif isinstance(value, datetime):
+        new_cell = DateCell(cell.row, cell.col, value)
+        new_cell._datetime = value
+        new_cell._seconds = (value - EPOCH).total_seconds()
+    else:
+        new_cell = DurationCell(cell.row, cell.col, value)
+        new_cell._double = value.total_seconds()
+    new_cell._copy_flags(cell)
+    new_cell._string_id = None
+    new_cell._rich_id = None
+    new_cell._style = cell._style
+    new_cell._model = cell._model
+    new_cell._table_id = cell._table_id
+    new_cell._merge = cell._merge
+    return new_cell
@@ -1,10 +1,12 @@
 import re
 import warnings
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from numbers_parser.exceptions import UnsupportedWarning
 from numbers_parser.generated import TSCEArchives_pb2 as TSCEArchives
 from numbers_parser.generated.functionmap import FUNCTION_MAP
+from numbers_parser.xrefs import RefContext
 
 FUNCTION_NAME_TO_ID = {v: k for k, v in FUNCTION_MAP.items()}
 
@@ -164,14 +166,7 @@ class Formula(list):
 
     def range(self, *args) -> None:
         arg2, arg1 = [str(x) for x in self.popn(2)]
-        func_range = "(" in arg1 or "(" in arg2
-        if "::" in arg1 and not func_range:
-            # Assumes references are not cross-table
-            arg1_parts = arg1.split("::")
-            arg2_parts = arg2.split("::")
-            self.push(f"{arg1_parts[0]}::{arg1_parts[1]}:{arg2_parts[1]}")
-        else:
-            self.push(f"{arg1}:{arg2}")
+        self.push(range_to_str(arg1, arg2))
 
     def string(self, *args) -> None:
         node = args[2]
@@ -226,6 +221,112 @@ NODE_FUNCTION_MAP = {
 }
 
 
+# Cell-relative references are compiled into numbered slots delimited by
+# characters that never appear in formula text
+SLOT_DELIMITER = "\x00"
+SLOT_RE = re.compile(f"{SLOT_DELIMITER}(\\d+){SLOT_DELIMITER}")
+
+
+class TemplateFormula(Formula):
+    """
+    A formula stack that leaves each cell reference as a numbered slot so
+    that the compiled formula can be rendered for any cell that shares it.
+    """
+
+    def __init__(self, model, table_id, row, col) -> None:
+        super().__init__(model, table_id, row, col)
+        self.slots = []
+
+    def add_slot(self, slot) -> str:
+        self.slots.append(slot)
+        return f"{SLOT_DELIMITER}{len(self.slots) - 1}{SLOT_DELIMITER}"
+
+    def range(self, *args) -> None:
+        arg2, arg1 = [str(x) for x in self.popn(2)]
+        if SLOT_DELIMITER in arg1 or SLOT_DELIMITER in arg2:
+            # Range text depends on how the references render for each cell
+            self.push(self.add_slot((arg1, arg2)))
+        else:
+            self.push(range_to_str(arg1, arg2))
+
+    def xref(self, *args) -> None:
+        self.push(self.add_slot(args[2]))
+
+
+class FormulaTemplate:
+    """
+    A formula compiled once for a formula key. Rendering the formula for a
+    cell only resolves the cell-relative references for that cell.
+    """
+
+    def __init__(self, model, table_id, formula: TemplateFormula) -> None:
+        self._model = model
+        self._table_id = table_id
+        self._parts = SLOT_RE.split(str(formula))
+        self._slots = [
+            tuple(SLOT_RE.split(x) for x in slot) if isinstance(slot, tuple) else slot
+            for slot in formula.slots
+        ]
+        self._reference_nodes = None
+
+    def render(self, row: int, col: int, context: RefContext | None = None) -> str:
+        if len(self._parts) == 1:
+            return self._parts[0]
+        if context is None:
+            context = RefContext(self._model)
+        return self._render_parts(self._parts, row, col, context)
+
+    def _render_parts(self, parts: list[str], row: int, col: int, context: RefContext) -> str:
+        # Split text alternates literal text with slot numbers
+        return "".join(
+            [
+                self._render_slot(int(part), row, col, context) if i % 2 else part
+                for i, part in enumerate(parts)
+            ],
+        )
+
+    def _render_slot(self, slot_num: int, row: int, col: int, context: RefContext) -> str:
+        slot = self._slots[slot_num]
+        if isinstance(slot, tuple):
+            arg1, arg2 = [self._render_parts(x, row, col, context) for x in slot]
+            return range_to_str(arg1, arg2)
+        return str(self._model.node_to_ref(self._table_id, row, col, slot, context))
+
+    def references(self, row: int, col: int) -> list[tuple]:
+        """
+        Return the extent of each cell or range that the formula refers to
+        when it is in the cell at ``row``, ``col``.
+        """
+        if self._reference_nodes is None:
+            self._reference_nodes = self._compile_reference_nodes()
+        extents = []
+        for nodes in self._reference_nodes:
+            node_extents = [
+                self._model.node_to_extent(self._table_id, row, col, node) for node in nodes
+            ]
+            if None not in node_extents:
+                extents.append(merge_extents(*node_extents))
+        return extents
+
+    def _compile_reference_nodes(self) -> list[tuple]:
+        # A range between two references is a single reference to the cells
+        # between them; any other range is a function of its references
+        ranges = []
+        in_range = set()
+        for slot in self._slots:
+            if not isinstance(slot, tuple) or any(len(x) != 3 or x[0] or x[2] for x in slot):
+                continue
+            slot_nums = [int(x[1]) for x in slot]
+            if not any(isinstance(self._slots[x], tuple) for x in slot_nums):
+                ranges.append(tuple(self._slots[x] for x in slot_nums))
+                in_range.update(slot_nums)
+        return ranges + [
+            (slot,)
+            for slot_num, slot in enumerate(self._slots)
+            if not isinstance(slot, tuple) and slot_num not in in_range
+        ]
+
+
 class TableFormulas:
     def __init__(self, model, table_id) -> None:
         self._model = model
@@ -234,10 +335,11 @@ class TableFormulas:
             k: v.name
             for k, v in TSCEArchives._ASTNODEARRAYARCHIVE_ASTNODETYPE.values_by_number.items()
         }
+        self._templates = {}
 
-    def formula(self, formula_key, row, col):
-        all_formulas = self._model.formula_ast(self._table_id)
-        if formula_key not in all_formulas:
+    def formula(self, formula_key, row, col, context: RefContext | None = None):
+        template = self.template(formula_key, row, col)
+        if template is None:
             table_name = self._model.table_name(self._table_id)
             warnings.warn(
                 f"{table_name}@[{row},{col}]: key #{formula_key} not found",
@@ -245,9 +347,45 @@ class TableFormulas:
                 stacklevel=2,
             )
             return "INVALID_KEY!(" + str(formula_key) + ")"
+        return template.render(row, col, context)
+
+    def references(self, formula_key, row, col) -> list[tuple]:
+        """Return the extents of the cells and ranges a formula refers to."""
+        template = self.template(formula_key, row, col)
+        if template is None:
+            return []
+        return template.references(row, col)
+
+    def template(self, formula_key, row, col) -> FormulaTemplate | None:
+        if formula_key not in self._templates:
+            all_formulas = self._model.formula_ast(self._table_id)
+            if formula_key not in all_formulas:
+                return None
+            self._templates[formula_key] = self.compile(all_formulas[formula_key], row, col)
+        return self._templates[formula_key]
+
+    def formulas(self, data: list, context: RefContext | None = None) -> dict[tuple[int, int], str]:
+        """
+        Return the formulas of all cells in a table's data that have one,
+        rendering them all with one shared reference context.
+        """
+        if context is None:
+            context = RefContext(self._model)
+        return {
+            (cell.row, cell.col): self.formula(cell._formula_id, cell.row, cell.col, context)
+            for cells in data
+            for cell in cells
+            if cell._formula_id is not None
+        }
 
-        formula = Formula(self._model, self._table_id, row, col)
-        for node in all_formulas[formula_key]:
+    def compile(self, nodes, row, col) -> FormulaTemplate:
+        """
+        Compile the AST nodes of a formula into a template. Any warnings for
+        unsupported formula features are reported once, for the cell at
+        ``row``, ``col``.
+        """
+        formula = TemplateFormula(self._model, self._table_id, row, col)
+        for node in nodes:
             node_type = self._formula_type_lookup[node.AST_node_type]
             if node_type == "REFERENCE_ERROR_WITH_UIDS":
                 formula.push("#REF!")
@@ -262,7 +400,136 @@ class TableFormulas:
                 func = getattr(formula, NODE_FUNCTION_MAP[node_type])
                 func(row, col, node)
 
-        return str(formula)
+        return FormulaTemplate(self._model, self._table_id, formula)
+
+
+class FormulaDependencies:
+    """
+    An index of the cells and ranges that each formula in a document refers
+    to, so that the precedents and dependents of a cell can be found without
+    rendering any formulas. Cells are identified by (table_id, row, col).
+    """
+
+    def __init__(self, model) -> None:
+        self._model = model
+        self._precedents = {}
+        self._cell_dependents = {}
+        self._range_dependents = {}
+        self._referenced_tables = None
+        self._has_formulas = None
+        self._dirty_cache = True
+
+    def mark_dirty(self):
+        self._dirty_cache = True
+
+    def mark_formulas_dirty(self):
+        """Mark the cache dirty after formulas may have been added to the document."""
+        self._referenced_tables = None
+        self._has_formulas = None
+        self._dirty_cache = True
+
+    def has_formulas(self) -> bool:
+        """
+        Return ``True`` if any table in the document has formulas. Unlike
+        :py:meth:`is_referenced`, this does not index the formulas' references.
+        """
+        if self._has_formulas is None:
+            self._has_formulas = any(
+                self._model.formula_ast(table_id) for table_id in self._model._table_data
+            )
+        return self._has_formulas
+
+    def refresh(self):
+        if self._dirty_cache:
+            self.calculate_dependencies()
+            self._dirty_cache = False
+
+    def calculate_dependencies(self):
+        self._precedents = {}
+        self._cell_dependents = defaultdict(set)
+        # Ranges are indexed by each column they span, or by None for
+        # ranges of whole rows
+        self._range_dependents = defaultdict(lambda: defaultdict(set))
+        for table_id, data in self._model._table_data.items():
+            table_formulas = self._model.table_formulas(table_id)
+            for cells in data:
+                for cell in cells:
+                    if cell._formula_id is None:
+                        continue
+                    key = (table_id, cell.row, cell.col)
+                    extents = table_formulas.references(cell._formula_id, cell.row, cell.col)
+                    self._precedents[key] = list(dict.fromkeys(extents))
+                    for extent in self._precedents[key]:
+                        self._add_dependent(extent, key)
+
+    def _add_dependent(self, extent: tuple, key: tuple) -> None:
+        (table_id, row_start, row_end, col_start, col_end) = extent
+        if None not in extent and row_start == row_end and col_start == col_end:
+            self._cell_dependents[(table_id, row_start, col_start)].add(key)
+        elif col_start is None:
+            self._range_dependents[(table_id, None)][extent].add(key)
+        else:
+            for col in range(col_start, col_end + 1):
+                self._range_dependents[(table_id, col)][extent].add(key)
+
+    def is_referenced(self, table_id: int) -> bool:
+        """
+        Return ``True`` if any formula refers to cells in a table.
+
+        Formulas are only added when tables are loaded, so the referenced
+        tables are not recalculated when cells are written. Writing over a
+        formula can leave a table marked as referenced which is harmless.
+        """
+        if self._referenced_tables is None:
+            self.refresh()
+            self._referenced_tables = {
+                extent[0] for extents in self._precedents.values() for extent in extents
+            }
+        return table_id in self._referenced_tables
+
+    def precedents(self, table_id: int, row: int, col: int) -> list[tuple]:
+        """
+        Return the extents of the cells and ranges the formula in a cell
+        refers to, in the order they appear in the formula.
+        """
+        self.refresh()
+        return self._precedents.get((table_id, row, col), [])
+
+    def dependents(self, table_id: int, row: int, col: int) -> list[tuple]:
+        """Return the formula cells that refer directly to a cell."""
+        self.refresh()
+        dependents = set(self._cell_dependents.get((table_id, row, col), ()))
+        for range_col in (col, None):
+            for extent, keys in self._range_dependents.get((table_id, range_col), {}).items():
+                if extent[1] is None or extent[1] <= row <= extent[2]:
+                    dependents.update(keys)
+        return sorted(dependents)
+
+
+def merge_extents(*extents: tuple) -> tuple:
+    """Return the smallest extent that covers all of the extents in a table."""
+    (table_id, row_start, row_end, col_start, col_end) = extents[0]
+    for extent in extents[1:]:
+        row_start, row_end = _merge_bounds(row_start, row_end, extent[1], extent[2])
+        col_start, col_end = _merge_bounds(col_start, col_end, extent[3], extent[4])
+    return (table_id, row_start, row_end, col_start, col_end)
+
+
+def _merge_bounds(start1: int, end1: int, start2: int, end2: int) -> tuple:
+    if start1 is None or start2 is None:
+        return (None, None)
+    return (min(start1, start2), max(end1, end2))
+
+
+def range_to_str(arg1: str, arg2: str) -> str:
+    """Format a range between two references or expressions."""
+    func_range = "(" in arg1 or "(" in arg2
+    if "::" in arg1 and not func_range:
+        # Assumes references are not cross-table
+        arg1_parts = arg1.split("::")
+        arg2_parts = arg2.split("::")
+        return f"{arg1_parts[0]}::{arg1_parts[1]}:{arg2_parts[1]}"
+    return f"{arg1}:{arg2}"
 
 
 def number_to_str(v: int) -> str:
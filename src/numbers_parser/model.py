@@ -3,13 +3,14 @@ from __future__ import annotations
 import logging
 import re
 from array import array
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 from hashlib import sha1
-from itertools import chain
+from itertools import accumulate, chain
 from math import floor
 from pathlib import Path
-from struct import pack
+from typing import TYPE_CHECKING
 from warnings import warn
 
 from numbers_parser.bullets import (
@@ -23,6 +24,7 @@ from numbers_parser.cell import (
     Border,
     BorderType,
     Cell,
+    CoordinateShifts,
     CustomFormatting,
     Formatting,
     FormattingType,
@@ -32,8 +34,11 @@ from numbers_parser.cell import (
     MergeReference,
     PaddingType,
     Style,
+    TextCell,
     VerticalJustification,
+    _custom_formatter,
     _decode_date_format,
+    _table_formatter,
 )
 from numbers_parser.constants import (
     ALLOWED_FORMATTING_PARAMETERS,
@@ -60,8 +65,9 @@ from numbers_parser.constants import (
     OwnerKind,
 )
 from numbers_parser.containers import ObjectStore
+from numbers_parser.evaluator import Recalculator
 from numbers_parser.exceptions import UnsupportedError, UnsupportedWarning
-from numbers_parser.formula import TableFormulas
+from numbers_parser.formula import FormulaDependencies, TableFormulas
 from numbers_parser.generated import TNArchives_pb2 as TNArchives
 from numbers_parser.generated import TSAArchives_pb2 as TSAArchives
 from numbers_parser.generated import TSCEArchives_pb2 as TSCEArchives
@@ -82,7 +88,10 @@ from numbers_parser.generated.TSWPArchives_pb2 import (
 from numbers_parser.iwafile import find_extension
 from numbers_parser.numbers_cache import Cacheable, cache
 from numbers_parser.numbers_uuid import NumbersUUID, uuid_to_hex
-from numbers_parser.xrefs import CellRange, ScopedNameRefCache
+from numbers_parser.xrefs import CellRange, ScopedNameRefCache, TableAxis, xl_range
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterable
 
 logger = logging.getLogger(__name__)
 debug = logger.debug
@@ -100,34 +109,358 @@ FONT_FAMILY_TO_NAME = create_font_name_map(FONT_NAME_TO_FAMILY)
 
 
 class MergeCells:
+    """
+    Index of the merged cell ranges in a table.
+
+    Merges are stored once per range rather than once per cell. Lookups use a
+    band index: the table is split into bands of rows at every merge boundary
+    and each band holds the sorted column intervals of the merges that span it,
+    so finding the merge containing a cell is two binary searches.
+    """
+
     def __init__(self) -> None:
-        self._references = defaultdict(lambda: False)
+        self._merges = {}
+        self._band_rows = None
+        self._bands = None
+
+    def __len__(self) -> int:
+        """Return the number of merged ranges."""
+        return len(self._merges)
+
+    def add_range(self, row_start: int, col_start: int, row_end: int, col_end: int) -> None:
+        """Add a merge range without checking for overlaps."""
+        size = (row_end - row_start + 1, col_end - col_start + 1)
+        self._merges[(row_start, col_start)] = (
+            MergeAnchor(size),
+            MergeReference(row_start, col_start, row_end, col_end),
+        )
+        self._band_rows = None
+
+    def add_ranges(self, ranges: list[tuple]) -> None:
+        """
+        Add many merge ranges at once.
+
+        All the ranges are checked for overlaps with each other and with the
+        existing merges before any are added. Ranges identical to an existing
+        merge are ignored.
+
+        Parameters
+        ----------
+        ranges: List[Tuple[int, int, int, int]]
+            The ``(row_start, col_start, row_end, col_end)`` of each merge.
+
+        Raises
+        ------
+        ValueError:
+            If any range overlaps another range or an existing merge.
+
+        """
+        new_ranges = []
+        for rect in dict.fromkeys(tuple(x) for x in ranges):
+            existing = self._merges.get(rect[:2])
+            if existing is None or existing[1].rect != rect:
+                new_ranges.append(rect)
+        if not new_ranges:
+            return
 
-    def add_reference(self, row: int, col: int, rect: tuple) -> None:
-        self._references[(row, col)] = MergeReference(*rect)
+        overlap = self._find_overlap(self.ranges() + new_ranges)
+        if overlap is not None:
+            (first, second) = (xl_range(*overlap[0]), xl_range(*overlap[1]))
+            msg = f"merge range {second} overlaps {first}"
+            raise ValueError(msg)
 
-    def add_anchor(self, row: int, col: int, size: tuple) -> None:
-        self._references[(row, col)] = MergeAnchor(size)
+        for rect in new_ranges:
+            self.add_range(*rect)
+
+    @staticmethod
+    def _find_overlap(ranges: list[tuple]) -> tuple | None:
+        """
+        Return the first pair of overlapping ranges, or None.
+
+        Sweeps down the rows keeping the column intervals of the ranges that
+        span the current row. Those intervals never overlap, so a new range
+        only needs checking against its neighbours in column order.
+        """
+        events = sorted(
+            [(rect[0], 1, rect) for rect in ranges] + [(rect[2] + 1, 0, rect) for rect in ranges],
+        )
+        col_starts = []
+        active = []
+        for _, is_start, rect in events:
+            (_, col_start, _, col_end) = rect
+            if not is_start:
+                index = bisect_left(col_starts, col_start)
+                del col_starts[index]
+                del active[index]
+                continue
+            index = bisect_right(col_starts, col_start)
+            if index > 0 and active[index - 1][3] >= col_start:
+                return (active[index - 1], rect)
+            if index < len(active) and active[index][1] <= col_end:
+                return (active[index], rect)
+            col_starts.insert(index, col_start)
+            active.insert(index, rect)
+        return None
+
+    def _build_index(self) -> None:
+        """Build the band index from the merge ranges."""
+        starts = defaultdict(list)
+        ends = defaultdict(list)
+        for anchor, (_, reference) in self._merges.items():
+            (row_start, _, row_end, _) = reference.rect
+            starts[row_start].append(anchor)
+            ends[row_end + 1].append(anchor)
+
+        self._band_rows = []
+        self._bands = []
+        active = {}
+        for row in sorted(starts.keys() | ends.keys()):
+            for anchor in ends.get(row, []):
+                del active[anchor]
+            for anchor in starts.get(row, []):
+                active[anchor] = self._merges[anchor][1].rect[3]
+            intervals = sorted((anchor[1], col_end, anchor) for anchor, col_end in active.items())
+            self._band_rows.append(row)
+            self._bands.append(([x[0] for x in intervals], intervals))
+
+    def _find(self, row: int, col: int) -> tuple | None:
+        """Return the anchor of the merge containing a cell, or None."""
+        if not self._merges:
+            return None
+        if self._band_rows is None:
+            self._build_index()
+        band = bisect_right(self._band_rows, row) - 1
+        if band < 0:
+            return None
+        (col_starts, intervals) = self._bands[band]
+        index = bisect_right(col_starts, col) - 1
+        if index < 0 or intervals[index][1] < col:
+            return None
+        return intervals[index][2]
 
     def is_merge_reference(self, row_col: tuple) -> bool:
-        # defaultdict will default this to False for missing entries
-        return isinstance(self._references[row_col], MergeReference)
+        """Return ``True`` if a cell is inside a merge but is not its anchor."""
+        anchor = self._find(*row_col)
+        return anchor is not None and anchor != tuple(row_col)
 
     def is_merge_anchor(self, row_col: tuple) -> bool:
-        # defaultdict will default this to False for missing entries
-        return isinstance(self._references[row_col], MergeAnchor)
+        """Return ``True`` if a cell is the top-left cell of a merge."""
+        return tuple(row_col) in self._merges
 
     def get(self, row_col: tuple) -> MergeAnchor | MergeReference:
-        return self._references[row_col]
+        """Return the merge anchor or reference for a cell, or ``False`` if not merged."""
+        anchor = self._find(*row_col)
+        if anchor is None:
+            return False
+        (merge_anchor, merge_reference) = self._merges[anchor]
+        return merge_anchor if anchor == tuple(row_col) else merge_reference
 
     def size(self, row_col: tuple) -> tuple:
-        return self._references[row_col].size
+        """Return the ``(num_rows, num_cols)`` of the merge anchored at a cell."""
+        return self.get(row_col).size
 
     def rect(self, row_col: tuple) -> tuple:
-        return self._references[row_col].rect
+        """Return the ``(row_start, col_start, row_end, col_end)`` of a merge reference cell."""
+        return self.get(row_col).rect
 
     def merge_cells(self):
-        return [k for k, v in self._references.items() if self.is_merge_anchor(k)]
+        """Return the anchor cell of every merge."""
+        return list(self._merges.keys())
+
+    def ranges(self) -> list[tuple]:
+        """Return the ``(row_start, col_start, row_end, col_end)`` of every merge."""
+        return [reference.rect for (_, reference) in self._merges.values()]
+
+    def is_merged_edge(self, row: int, col: int, side: str) -> bool:
+        """Return ``True`` if a cell edge is inside a merge and so has no border."""
+        if side == "top":
+            other = (row - 1, col)
+        elif side == "right":
+            other = (row, col + 1)
+        elif side == "bottom":
+            other = (row + 1, col)
+        else:
+            other = (row, col - 1)
+        anchor = self._find(row, col)
+        return anchor is not None and anchor == self._find(*other)
+
+
+class BorderRuns:
+    """Sorted, non-overlapping runs of identical borders along one grid line."""
+
+    def __init__(self, runs: list | None = None) -> None:
+        self._runs = runs or []
+        self._starts = [run[0] for run in self._runs]
+
+    def __bool__(self) -> bool:
+        return len(self._runs) > 0
+
+    def runs(self) -> list[tuple[int, int, Border]]:
+        """Return the ``(start, end, border)`` runs; ``end`` is exclusive."""
+        return list(self._runs)
+
+    def copy(self) -> BorderRuns:
+        return BorderRuns(list(self._runs))
+
+    def get(self, pos: int) -> Border | None:
+        index = bisect_right(self._starts, pos) - 1
+        if index >= 0 and pos < self._runs[index][1]:
+            return self._runs[index][2]
+        return None
+
+    def set(self, start: int, end: int, border: Border | None) -> None:
+        """Set the border for positions ``start`` to ``end - 1``; ``None`` clears them."""
+        # The window includes one unaffected run either side so that
+        # identical neighbours can be coalesced
+        lo = max(bisect_right(self._starts, start) - 2, 0)
+        hi = bisect_left(self._starts, end) + 1
+        pieces = []
+        for run_start, run_end, value in self._runs[lo:hi]:
+            if run_start < start:
+                pieces.append((run_start, min(run_end, start), value))
+            if run_end > end:
+                pieces.append((max(run_start, end), run_end, value))
+        if border is not None:
+            pieces.append((start, end, border))
+        pieces.sort(key=lambda x: x[0])
+        self._runs[lo:hi] = _coalesce_runs(pieces)
+        self._starts = [run[0] for run in self._runs]
+
+    def insert(self, pos: int, count: int) -> None:
+        """Open a gap of ``count`` positions at ``pos``."""
+        runs = []
+        for run_start, run_end, value in self._runs:
+            if run_end <= pos:
+                runs.append((run_start, run_end, value))
+            elif run_start >= pos:
+                runs.append((run_start + count, run_end + count, value))
+            else:
+                runs.append((run_start, pos, value))
+                runs.append((pos + count, run_end + count, value))
+        self._runs = runs
+        self._starts = [run[0] for run in self._runs]
+
+    def delete(self, pos: int, count: int) -> None:
+        """Remove positions ``pos`` to ``pos + count - 1``."""
+        end = pos + count
+        runs = []
+        for run_start, run_end, value in self._runs:
+            if run_end <= pos:
+                runs.append((run_start, run_end, value))
+            elif run_start >= end:
+                runs.append((run_start - count, run_end - count, value))
+            else:
+                if run_start < pos:
+                    runs.append((run_start, pos, value))
+                if run_end > end:
+                    runs.append((pos, run_end - count, value))
+        self._runs = _coalesce_runs(runs)
+        self._starts = [run[0] for run in self._runs]
+
+
+def _coalesce_runs(runs: list) -> list:
+    coalesced = []
+    for run in runs:
+        if coalesced and coalesced[-1][1] == run[0] and coalesced[-1][2] == run[2]:
+            coalesced[-1] = (coalesced[-1][0], run[1], run[2])
+        else:
+            coalesced.append(run)
+    return coalesced
+
+
+class TableBorders:
+    """
+    Run-length index of the borders in a table.
+
+    Borders are stored once per grid line rather than once per cell. Horizontal
+    line ``r`` is both the top edge of row ``r`` and the bottom edge of row ``r - 1``
+    and vertical line ``c`` is the left edge of column ``c`` and the right edge of
+    column ``c - 1``. Each line holds :py:class:`BorderRuns` indexed by column or
+    row respectively.
+    """
+
+    def __init__(self) -> None:
+        self._horizontal = defaultdict(BorderRuns)
+        self._vertical = defaultdict(BorderRuns)
+
+    def __bool__(self) -> bool:
+        return any(self._horizontal.values()) or any(self._vertical.values())
+
+    def _line(self, row: int, col: int, side: str) -> tuple[dict, int, int]:
+        if side == "top":
+            return (self._horizontal, row, col)
+        if side == "bottom":
+            return (self._horizontal, row + 1, col)
+        if side == "left":
+            return (self._vertical, col, row)
+        return (self._vertical, col + 1, row)
+
+    def get(self, row: int, col: int, side: str) -> Border | None:
+        (lines, line, pos) = self._line(row, col, side)
+        runs = lines.get(line)
+        return runs.get(pos) if runs is not None else None
+
+    def set(self, row: int, col: int, side: str, border: Border | None, length: int = 1) -> None:
+        (lines, line, pos) = self._line(row, col, side)
+        lines[line].set(pos, pos + length, border)
+
+    def horizontal_runs(self, row: int) -> BorderRuns:
+        return self._horizontal.get(row, BorderRuns())
+
+    def vertical_runs(self, col: int) -> BorderRuns:
+        return self._vertical.get(col, BorderRuns())
+
+    def insert_rows(self, row: int, count: int, num_rows: int) -> None:
+        self._horizontal = _insert_lines(self._horizontal, row, count, num_rows)
+        for runs in self._vertical.values():
+            runs.insert(row, count)
+
+    def insert_columns(self, col: int, count: int, num_cols: int) -> None:
+        self._vertical = _insert_lines(self._vertical, col, count, num_cols)
+        for runs in self._horizontal.values():
+            runs.insert(col, count)
+
+    def delete_rows(self, row: int, count: int) -> None:
+        self._horizontal = _delete_lines(self._horizontal, row, count)
+        for runs in self._vertical.values():
+            runs.delete(row, count)
+
+    def delete_columns(self, col: int, count: int) -> None:
+        self._vertical = _delete_lines(self._vertical, col, count)
+        for runs in self._horizontal.values():
+            runs.delete(col, count)
+
+
+def _insert_lines(lines: dict, pos: int, count: int, num_lines: int) -> dict:
+    # Inserted rows or columns have no borders, so lines from the insertion
+    # point move with the rows or columns after it. When appending, the line
+    # at the insertion point is the bottom or right edge of the table and
+    # stays with the last row or column.
+    new_lines = defaultdict(BorderRuns)
+    for line, runs in lines.items():
+        if line < pos or pos >= num_lines:
+            new_lines[line] = runs
+        else:
+            new_lines[line + count] = runs
+    return new_lines
+
+
+def _delete_lines(lines: dict, pos: int, count: int) -> dict:
+    # The lines either side of the deleted block are joined; borders from
+    # the line after the block take precedence
+    new_lines = defaultdict(BorderRuns)
+    for line, runs in lines.items():
+        if line < pos:
+            new_lines[line] = runs
+        elif line > pos + count:
+            new_lines[line - count] = runs
+    joined = lines[pos].copy() if pos in lines else BorderRuns()
+    if pos + count in lines:
+        for start, end, border in lines[pos + count].runs():
+            joined.set(start, end, border)
+    if joined:
+        new_lines[pos] = joined
+    return new_lines
 
 
 class DataLists(Cacheable):
@@ -172,8 +505,10 @@ class DataLists(Cacheable):
         return self._datalists[table_id]["by_key"][key]
 
     def value_key(self, value):
+        if isinstance(value, TSPMessages.Reference):
+            return value.identifier
         if hasattr(value, "DESCRIPTOR"):
-            return repr(value)
+            return value.SerializeToString(deterministic=True)
         return value
 
     def init(self, table_id: int) -> None:
@@ -186,33 +521,53 @@ class DataLists(Cacheable):
         self._datalists[table_id]["datalist"].nextListID = 1
         clear_field_container(self._datalists[table_id]["datalist"].entries)
 
-    def lookup_key(self, table_id: int, value) -> int:
+    def lookup_key(self, table_id: int, value, refcount: int = 1) -> int:
         """
         Return the key associated with a value for a particular table entry.
         If the value is not in the datalist, allocate a new entry with the
-        next available key.
+        next available key. The entry's reference count is increased by
+        ``refcount``.
+        """
+        return self.lookup_keys(table_id, [value], [refcount])[0]
+
+    def lookup_keys(self, table_id: int, values: Iterable, refcounts: Iterable[int]) -> list[int]:
+        """
+        Return the keys associated with a sequence of values for a particular
+        table entry, increasing each entry's reference count by the matching
+        value in ``refcounts``. New entries are allocated consecutive keys and
+        added to the datalist in a single step.
         """
         self.add_table(table_id)
-        value_key = self.value_key(value)
-        if value_key not in self._datalists[table_id]["by_value"]:
-            key = self._datalists[table_id]["next_key"]
-            self._datalists[table_id]["next_key"] += 1
-            self._datalists[table_id]["datalist"].nextListID += 1
-            attrs = {"key": key, self._value_attr: value, "refcount": 1}
-            entry = TSTArchives.TableDataList.ListEntry(**attrs)
-            self._datalists[table_id]["datalist"].entries.append(entry)
-            self._datalists[table_id]["by_key"][key] = entry
-            self._datalists[table_id]["key_index"][key] = (
-                len(self._datalists[table_id]["datalist"].entries) - 1
-            )
-            self._datalists[table_id]["by_value"][value_key] = key
-        else:
+        datalist = self._datalists[table_id]
+        entries = datalist["datalist"].entries
+        by_value = datalist["by_value"]
+        first_new_key = datalist["next_key"]
+        new_entries = []
+        keys = []
+        for value, refcount in zip(values, refcounts, strict=True):
             value_key = self.value_key(value)
-            key = self._datalists[table_id]["by_value"][value_key]
-            index = self._datalists[table_id]["key_index"][key]
-            self._datalists[table_id]["datalist"].entries[index].refcount += 1
+            key = by_value.get(value_key)
+            if key is None:
+                key = first_new_key + len(new_entries)
+                attrs = {"key": key, self._value_attr: value, "refcount": refcount}
+                new_entries.append(TSTArchives.TableDataList.ListEntry(**attrs))
+                by_value[value_key] = key
+            elif key >= first_new_key:
+                new_entries[key - first_new_key].refcount += refcount
+            else:
+                entries[datalist["key_index"][key]].refcount += refcount
+            keys.append(key)
+
+        if new_entries:
+            start = len(entries)
+            entries.extend(new_entries)
+            for index, entry in enumerate(entries[start:], start=start):
+                datalist["by_key"][entry.key] = entry
+                datalist["key_index"][entry.key] = index
+            datalist["next_key"] += len(new_entries)
+            datalist["datalist"].nextListID += len(new_entries)
 
-        return key
+        return keys
 
 
 class _NumbersModel(Cacheable):
@@ -229,14 +584,19 @@ class _NumbersModel(Cacheable):
             filepath = Path(DEFAULT_DOCUMENT)
         self.objects = ObjectStore(filepath)
         self._merge_cells = defaultdict(MergeCells)
+        self._table_borders = defaultdict(TableBorders)
+        self._cell_styles = {}
+        self._table_formatters = {}
         self._row_heights = {}
         self._col_widths = {}
+        self._header_size_index = {}
         self._table_formats = DataLists(self, "format_table", "format")
         self._table_styles = DataLists(self, "styleTable", "reference")
         self._table_strings = DataLists(self, "stringTable", "string")
         self._control_specs = DataLists(self, "control_cell_spec_table", "cell_spec")
         self._formulas = DataLists(self, "formula_table", "formula")
         self._table_data = {}
+        self._coordinate_shifts = defaultdict(CoordinateShifts)
         self._table_categories_data = {}
         self._table_categories_row_mapper = {}
         self._styles = None
@@ -246,6 +606,8 @@ class _NumbersModel(Cacheable):
         self._custom_format_archives = None
         self._custom_format_ids = None
         self.name_ref_cache = ScopedNameRefCache(self)
+        self.formula_dependencies = FormulaDependencies(self)
+        self.recalculator = Recalculator(self)
         self.missing_fonts = {}
         self.calculate_table_uuid_map()
 
@@ -270,8 +632,14 @@ class _NumbersModel(Cacheable):
         self.objects[sheet_id].name = value
         return None
 
+    def coordinate_shifts(self, table_id: int) -> CoordinateShifts:
+        """Return the row and column shifts not yet applied to a table's cells."""
+        return self._coordinate_shifts[table_id]
+
     def set_table_data(self, table_id: int, data: list) -> None:
         self._table_data[table_id] = data
+        self._coordinate_shifts[table_id] = CoordinateShifts(data)
+        self.formula_dependencies.mark_formulas_dirty()
 
     # Don't cache: new tables can be added at runtime
     def table_ids(self, sheet_id: int | None = None) -> list:
@@ -315,11 +683,13 @@ class _NumbersModel(Cacheable):
     def number_of_rows(self, table_id, num_rows=None):
         if num_rows is not None:
             self.objects[table_id].number_of_rows = num_rows
+            self.formula_dependencies.mark_dirty()
         return self.objects[table_id].number_of_rows
 
     def number_of_columns(self, table_id, num_cols=None):
         if num_cols is not None:
             self.objects[table_id].number_of_columns = num_cols
+            self.formula_dependencies.mark_dirty()
         return self.objects[table_id].number_of_columns
 
     def table_name(self, table_id, value=None):
@@ -529,14 +899,63 @@ class _NumbersModel(Cacheable):
         """Return the format associated with a format ID for a particular table."""
         return self._table_formats.lookup_value(table_id, key).format
 
+    @cache(num_args=2)
+    def custom_formatter(self, format_uuid: str, kind: str) -> Callable[[Cell], str]:
+        """Return a compiled formatter for a custom format UUID."""
+        return _custom_formatter(self.custom_format_map()[format_uuid], kind)
+
+    def table_formatter(self, table_id: int, key: int, kind: str) -> Callable[[Cell], str]:
+        """
+        Return a compiled formatter for a format ID in a particular table. The
+        formatter takes a cell and returns its formatted value.
+        """
+        formatter = self._table_formatters.get((table_id, key, kind))
+        if formatter is None:
+            table_format = self.table_format(table_id, key)
+            if table_format.HasField("custom_uid"):
+                format_uuid = NumbersUUID(table_format.custom_uid).hex
+                formatter = self.custom_formatter(format_uuid, kind)
+            else:
+                formatter = _table_formatter(table_format, kind)
+            self._table_formatters[(table_id, key, kind)] = formatter
+        return formatter
+
+    def formatted_values(self, table_id: int, rows: list[list[Cell]]) -> list[list[str]]:
+        """Return the formatted values of rows of cells, formatting cells in batches."""
+        formatted_rows = [[None] * len(row) for row in rows]
+        batches = defaultdict(list)
+        for formatted_row, row in zip(formatted_rows, rows, strict=True):
+            for col, cell in enumerate(row):
+                formatter_key = cell._formatter_key()
+                if formatter_key is None:
+                    formatted_row[col] = cell.formatted_value
+                else:
+                    batches[formatter_key].append((formatted_row, col, cell))
+
+        for (format_id, kind), cells in batches.items():
+            formatter = self.table_formatter(table_id, format_id, kind)
+            for formatted_row, col, cell in cells:
+                formatted_row[col] = formatter(cell)
+
+        return formatted_rows
+
     @cache(num_args=3)
-    def format_archive(self, table_id: int, format_type: FormattingType, formatting: Formatting):
-        """Create a table format from a Formatting spec and return the table format ID."""
+    def format_archive(
+        self,
+        table_id: int,
+        format_type: FormattingType,
+        formatting: Formatting,
+        refcount: int = 1,
+    ):
+        """
+        Create a table format from a Formatting spec and return the table format ID.
+        The format's reference count is increased by ``refcount``.
+        """
         attrs = {x: getattr(formatting, x) for x in ALLOWED_FORMATTING_PARAMETERS[format_type]}
         attrs["format_type"] = FORMAT_TYPE_MAP[format_type]
 
         format_archive = TSKArchives.FormatStructArchive(**attrs)
-        return self._table_formats.lookup_key(table_id, format_archive)
+        return self._table_formats.lookup_key(table_id, format_archive, refcount)
 
     def cell_popup_model(self, parent_id: int, formatting: Formatting):
         tsce_items = [{"cell_value_type": "NIL_TYPE"}]
@@ -574,8 +993,12 @@ class _NumbersModel(Cacheable):
         table_id: int,
         format_type: FormattingType,
         formatting: Formatting,
+        refcount: int = 1,
     ):
-        """Create control cell archive from a Formatting spec and return the table format ID."""
+        """
+        Create control cell archive from a Formatting spec and return the table format ID.
+        The archive's reference count is increased by ``refcount``.
+        """
         if format_type == FormattingType.TICKBOX:
             cell_spec = TSTArchives.CellSpecArchive(interaction_type=CellInteractionType.TOGGLE)
         elif format_type == FormattingType.RATING:
@@ -599,7 +1022,7 @@ class _NumbersModel(Cacheable):
                 chooser_control_popup_model=TSPMessages.Reference(identifier=popup_id),
                 chooser_control_start_w_first=not (formatting.allow_none),
             )
-        return self._control_specs.lookup_key(table_id, cell_spec)
+        return self._control_specs.lookup_key(table_id, cell_spec, refcount)
 
     def add_custom_decimal_format_archive(self, formatting: CustomFormatting) -> None:
         """Create a custom format from the format spec."""
@@ -693,15 +1116,23 @@ class _NumbersModel(Cacheable):
         custom_format_list.custom_formats.append(format_archive)
         custom_format_list.uuids.append(format_uuid)
 
-    def custom_format_id(self, table_id: int, formatting: CustomFormatting) -> int:
-        """Look up the custom format and return the format ID for the table."""
+    def custom_format_id(
+        self,
+        table_id: int,
+        formatting: CustomFormatting,
+        refcount: int = 1,
+    ) -> int:
+        """
+        Look up the custom format and return the format ID for the table. The
+        format's reference count is increased by ``refcount``.
+        """
         format_type = CUSTOM_FORMAT_TYPE_MAP[formatting.type]
         format_uuid = self._custom_format_uuids[formatting.name]
         custom_format = TSKArchives.FormatStructArchive(
             format_type=format_type,
             custom_uid=TSPMessages.UUID(lower=format_uuid.lower, upper=format_uuid.upper),
         )
-        return self._table_formats.lookup_key(table_id, custom_format)
+        return self._table_formats.lookup_key(table_id, custom_format, refcount)
 
     def add_custom_text_format_archive(self, formatting: CustomFormatting) -> None:
         format_string = formatting.format.replace("%s", CUSTOM_TEXT_PLACEHOLDER)
@@ -734,13 +1165,20 @@ class _NumbersModel(Cacheable):
         """Cache table strings reference and delete all existing keys/values."""
         self._table_strings.init(table_id)
 
-    def table_string_key(self, table_id: int, value: str) -> int:
+    def update_string_keys(self, table_id: int, data: list) -> None:
         """
-        Return the key associated with a string for a particular table. If
-        the string is not in the strings table, allocate a new entry with the
-        next available key.
+        Set the string table keys of every text cell, adding each distinct
+        string to the table's strings table once.
         """
-        return self._table_strings.lookup_key(table_id, value)
+        text_cells = [cell for cells in data for cell in cells if isinstance(cell, TextCell)]
+        if not text_cells:
+            return
+
+        refcounts = Counter(cell.value for cell in text_cells)
+        keys = self._table_strings.lookup_keys(table_id, refcounts.keys(), refcounts.values())
+        string_keys = dict(zip(refcounts.keys(), keys, strict=True))
+        for cell in text_cells:
+            cell._string_key = string_keys[cell.value]
 
     @cache(num_args=0)
     def owner_id_map(self):
@@ -835,15 +1273,7 @@ class _NumbersModel(Cacheable):
             col_start,
             col_end,
         )
-        size = (row_end - row_start + 1, col_end - col_start + 1)
-        for row in range(row_start, row_end + 1):
-            for col in range(col_start, col_end + 1):
-                self._merge_cells[table_id].add_reference(
-                    row,
-                    col,
-                    (row_start, col_start, row_end, col_end),
-                )
-        self._merge_cells[table_id].add_anchor(row_start, col_start, size)
+        self._merge_cells[table_id].add_range(row_start, col_start, row_end, col_end)
 
     @cache()
     def calculate_merges_using_formula_stores(self, table_id) -> int:
@@ -933,6 +1363,7 @@ class _NumbersModel(Cacheable):
             merge_count,
         )
 
+    @cache()
     def merge_cells(self, table_id):
         if self.calculate_merges_using_formula_stores(table_id) > 0:
             return self._merge_cells[table_id]
@@ -959,60 +1390,11 @@ class _NumbersModel(Cacheable):
             None,
         )
 
-    def node_to_ref(self, table_id: int, row: int, col: int, node):
-        def resolve_range(is_absolute, absolute_list, relative_list, offset, max_val):
-            if is_absolute:
-                return absolute_list[0].range_begin
-            if not relative_list and absolute_list[0].range_begin == max_val:
-                return max_val
-            return offset + relative_list[0].range_begin
-
-        def resolve_range_end(is_absolute, absolute_list, relative_list, offset, max_val):
-            if is_absolute:
-                return range_end(absolute_list[0])
-            if not relative_list and range_end(absolute_list[0]) == max_val:
-                return max_val
-            return offset + range_end(relative_list[0])
-
-        if node.HasField("AST_cross_table_reference_extra_info"):
-            table_uuid = NumbersUUID(node.AST_cross_table_reference_extra_info.table_id).hex
-            to_table_id = self.table_uuids_to_id(table_uuid)
-        else:
-            to_table_id = None
+    def node_to_ref(self, table_id: int, row: int, col: int, node, context=None):
+        to_table_id = self._node_table_id(node)
 
         if node.HasField("AST_colon_tract"):
-            row_begin = resolve_range(
-                node.AST_sticky_bits.begin_row_is_absolute,
-                node.AST_colon_tract.absolute_row,
-                node.AST_colon_tract.relative_row,
-                row,
-                0x7FFFFFFF,
-            )
-
-            row_end = resolve_range_end(
-                node.AST_sticky_bits.end_row_is_absolute,
-                node.AST_colon_tract.absolute_row,
-                node.AST_colon_tract.relative_row,
-                row,
-                0x7FFFFFFF,
-            )
-
-            col_begin = resolve_range(
-                node.AST_sticky_bits.begin_column_is_absolute,
-                node.AST_colon_tract.absolute_column,
-                node.AST_colon_tract.relative_column,
-                col,
-                0x7FFF,
-            )
-
-            col_end = resolve_range_end(
-                node.AST_sticky_bits.end_column_is_absolute,
-                node.AST_colon_tract.absolute_column,
-                node.AST_colon_tract.relative_column,
-                col,
-                0x7FFF,
-            )
-
+            row_begin, row_end, col_begin, col_end = self._colon_tract_bounds(row, col, node)
             return CellRange(
                 model=self,
                 row_start=None if row_begin == 0x7FFFFFFF else row_begin,
@@ -1025,6 +1407,7 @@ class _NumbersModel(Cacheable):
                 col_end_is_abs=node.AST_sticky_bits.end_column_is_absolute,
                 from_table_id=table_id,
                 to_table_id=to_table_id,
+                context=context,
             )
 
         row = node.AST_row.row if node.AST_row.absolute else row + node.AST_row.row
@@ -1036,6 +1419,7 @@ class _NumbersModel(Cacheable):
                 row_start_is_abs=node.AST_row.absolute,
                 from_table_id=table_id,
                 to_table_id=to_table_id,
+                context=context,
             )
 
         if node.HasField("AST_column") and not node.HasField("AST_row"):
@@ -1045,6 +1429,7 @@ class _NumbersModel(Cacheable):
                 col_start_is_abs=node.AST_column.absolute,
                 from_table_id=table_id,
                 to_table_id=to_table_id,
+                context=context,
             )
 
         return CellRange(
@@ -1055,8 +1440,100 @@ class _NumbersModel(Cacheable):
             col_start_is_abs=node.AST_column.absolute,
             from_table_id=table_id,
             to_table_id=to_table_id,
+            context=context,
         )
 
+    def node_to_extent(self, table_id: int, row: int, col: int, node) -> tuple | None:
+        """
+        Resolve the cells that a reference node refers to as a tuple of
+        (table_id, row_start, row_end, col_start, col_end). Row and column
+        bounds are None for references to whole columns or rows. Returns
+        None for references that cannot be resolved.
+        """
+        to_table_id = self._node_table_id(node)
+        if to_table_id is None:
+            if node.HasField("AST_cross_table_reference_extra_info"):
+                return None
+            to_table_id = table_id
+
+        if node.HasField("AST_colon_tract"):
+            row_begin, row_end, col_begin, col_end = self._colon_tract_bounds(row, col, node)
+            if row_begin == 0x7FFFFFFF:
+                row_begin = row_end = None
+            if col_begin == 0x7FFF:
+                col_begin = col_end = None
+        else:
+            row_begin = row_end = None
+            col_begin = col_end = None
+            if node.HasField("AST_row"):
+                row_begin = row_end = (
+                    node.AST_row.row if node.AST_row.absolute else row + node.AST_row.row
+                )
+            if node.HasField("AST_column"):
+                col_begin = col_end = (
+                    node.AST_column.column
+                    if node.AST_column.absolute
+                    else col + node.AST_column.column
+                )
+
+        if (row_begin is not None and row_begin < 0) or (col_begin is not None and col_begin < 0):
+            return None
+        return (to_table_id, row_begin, row_end, col_begin, col_end)
+
+    def _node_table_id(self, node) -> int | None:
+        if node.HasField("AST_cross_table_reference_extra_info"):
+            table_uuid = NumbersUUID(node.AST_cross_table_reference_extra_info.table_id).hex
+            return self.table_uuids_to_id(table_uuid)
+        return None
+
+    def _colon_tract_bounds(self, row: int, col: int, node) -> tuple[int, int, int, int]:
+        def resolve_range(is_absolute, absolute_list, relative_list, offset, max_val):
+            if is_absolute:
+                return absolute_list[0].range_begin
+            if not relative_list and absolute_list[0].range_begin == max_val:
+                return max_val
+            return offset + relative_list[0].range_begin
+
+        def resolve_range_end(is_absolute, absolute_list, relative_list, offset, max_val):
+            if is_absolute:
+                return range_end(absolute_list[0])
+            if not relative_list and range_end(absolute_list[0]) == max_val:
+                return max_val
+            return offset + range_end(relative_list[0])
+
+        row_begin = resolve_range(
+            node.AST_sticky_bits.begin_row_is_absolute,
+            node.AST_colon_tract.absolute_row,
+            node.AST_colon_tract.relative_row,
+            row,
+            0x7FFFFFFF,
+        )
+
+        row_end = resolve_range_end(
+            node.AST_sticky_bits.end_row_is_absolute,
+            node.AST_colon_tract.absolute_row,
+            node.AST_colon_tract.relative_row,
+            row,
+            0x7FFFFFFF,
+        )
+
+        col_begin = resolve_range(
+            node.AST_sticky_bits.begin_column_is_absolute,
+            node.AST_colon_tract.absolute_column,
+            node.AST_colon_tract.relative_column,
+            col,
+            0x7FFF,
+        )
+
+        col_end = resolve_range_end(
+            node.AST_sticky_bits.end_column_is_absolute,
+            node.AST_colon_tract.absolute_column,
+            node.AST_colon_tract.relative_column,
+            col,
+            0x7FFF,
+        )
+        return (row_begin, row_end, col_begin, col_end)
+
     @cache()
     def formula_ast(self, table_id: int):
         bds = self.objects[table_id].base_data_store
@@ -1097,6 +1574,13 @@ class _NumbersModel(Cacheable):
         return storage_buffers[row_offset][col]
 
     def recalculate_row_headers(self, table_id: int, data: list) -> None:
+        cell_counts = [
+            len(data) - sum([isinstance(x, MergedCell) for x in cells]) for cells in data
+        ]
+        self.set_row_headers(table_id, cell_counts)
+
+    def set_row_headers(self, table_id: int, cell_counts: list[int]) -> None:
+        """Rebuild the row headers of a table from the number of cells in each row."""
         current_row_heights = {}
         for row in range(self.number_of_rows(table_id)):
             current_row_heights[row] = self.row_height(table_id, row)
@@ -1105,8 +1589,7 @@ class _NumbersModel(Cacheable):
         buckets = self.objects[base_data_store.rowHeaders.buckets[0].identifier]
         clear_field_container(buckets.headers)
 
-        for row, cells in enumerate(data):
-            num_cols = len(data) - sum([isinstance(x, MergedCell) for x in cells])
+        for row, num_cols in enumerate(cell_counts):
             height = current_row_heights[row]
             header = TSTArchives.HeaderStorageBucket.Header(
                 index=row,
@@ -1115,8 +1598,18 @@ class _NumbersModel(Cacheable):
                 hidingState=0,
             )
             buckets.headers.append(header)
+        self._header_size_index.pop((table_id, TableAxis.ROW), None)
 
     def recalculate_column_headers(self, table_id: int, data: list) -> None:
+        # Transpose data to get columns
+        col_data = [list(x) for x in zip(*data)]
+        cell_counts = [
+            len(cells) - sum([isinstance(x, MergedCell) for x in cells]) for cells in col_data
+        ]
+        self.set_column_headers(table_id, cell_counts)
+
+    def set_column_headers(self, table_id: int, cell_counts: list[int]) -> None:
+        """Rebuild the column headers of a table from the number of cells in each column."""
         current_column_widths = {}
         for col in range(self.number_of_columns(table_id)):
             current_column_widths[col] = self.col_width(table_id, col)
@@ -1124,11 +1617,8 @@ class _NumbersModel(Cacheable):
         base_data_store = self.objects[table_id].base_data_store
         buckets = self.objects[base_data_store.columnHeaders.identifier]
         clear_field_container(buckets.headers)
-        # Transpose data to get columns
-        col_data = [list(x) for x in zip(*data)]
 
-        for col, cells in enumerate(col_data):
-            num_rows = len(cells) - sum([isinstance(x, MergedCell) for x in cells])
+        for col, num_rows in enumerate(cell_counts):
             width = current_column_widths[col]
             header = TSTArchives.HeaderStorageBucket.Header(
                 index=col,
@@ -1137,6 +1627,7 @@ class _NumbersModel(Cacheable):
                 hidingState=0,
             )
             buckets.headers.append(header)
+        self._header_size_index.pop((table_id, TableAxis.COLUMN), None)
 
     def recalculate_merged_cells(self, table_id: int) -> None:
         merge_cells = self.merge_cells(table_id)
@@ -1147,13 +1638,13 @@ class _NumbersModel(Cacheable):
             TSTArchives.MergeRegionMapArchive,
         )
 
-        merge_cells = self.merge_cells(table_id)
-        for row_col in merge_cells.merge_cells():
-            size = merge_cells.size(row_col)
-            cell_id = TSTArchives.CellID(packedData=(row_col[1] << 16 | row_col[0]))
-            table_size = TSTArchives.TableSize(packedData=(size[1] << 16 | size[0]))
-            cell_range = TSTArchives.CellRange(origin=cell_id, size=table_size)
-            merge_map.cell_range.append(cell_range)
+        cell_ranges = []
+        for row_start, col_start, row_end, col_end in merge_cells.ranges():
+            (num_rows, num_cols) = (row_end - row_start + 1, col_end - col_start + 1)
+            cell_id = TSTArchives.CellID(packedData=(col_start << 16 | row_start))
+            table_size = TSTArchives.TableSize(packedData=(num_cols << 16 | num_rows))
+            cell_ranges.append(TSTArchives.CellRange(origin=cell_id, size=table_size))
+        merge_map.cell_range.extend(cell_ranges)
 
         base_data_store = self.objects[table_id].base_data_store
         self.set_reference(base_data_store.merge_region_map, merge_map_id)
@@ -1165,28 +1656,34 @@ class _NumbersModel(Cacheable):
         tile_row_offset: int,
         row: int,
     ) -> TSTArchives.TileRowInfo:
+        return self.row_info(data[row], len(data[0]), row - tile_row_offset)
+
+    def row_info(
+        self,
+        cells: list[Cell],
+        num_cols: int,
+        tile_row_index: int,
+    ) -> TSTArchives.TileRowInfo:
+        """Encode the storage of a row of cells."""
         row_info = TSTArchives.TileRowInfo()
         row_info.storage_version = 5
-        row_info.tile_row_index = row - tile_row_offset
-        row_info.cell_count = 0
-        cell_storage = b""
+        row_info.tile_row_index = tile_row_index
 
-        offsets = [-1] * len(data[0])
+        offsets = array("h", [-1]) * num_cols
+        buffers = []
         current_offset = 0
-
-        for col in range(len(data[row])):
-            buffer = data[row][col]._to_buffer()
+        for col, cell in enumerate(cells):
+            buffer = cell._to_buffer()
             if buffer is not None:
-                cell_storage += buffer
+                buffers.append(buffer)
                 # Always use wide offsets
                 offsets[col] = current_offset >> 2
                 current_offset += len(buffer)
 
-                row_info.cell_count += 1
-
-        row_info.cell_offsets = pack(f"<{len(offsets)}h", *offsets)
+        row_info.cell_count = len(buffers)
+        row_info.cell_offsets = offsets.tobytes()
         row_info.cell_offsets_pre_bnc = DEFAULT_PRE_BNC_BYTES
-        row_info.cell_storage_buffer = cell_storage
+        row_info.cell_storage_buffer = b"".join(buffers)
         row_info.cell_storage_buffer_pre_bnc = DEFAULT_PRE_BNC_BYTES
         row_info.has_wide_offsets = True
         return row_info
@@ -1244,12 +1741,14 @@ class _NumbersModel(Cacheable):
         table_model.number_of_columns = len(data[0])
 
         self.init_table_strings(table_id)
+        self.update_string_keys(table_id, data)
         self.recalculate_row_headers(table_id, data)
         self.recalculate_column_headers(table_id, data)
         self.recalculate_merged_cells(table_id)
         self.update_paragraph_styles()
         self.update_cell_styles(table_id, data)
-        self.update_cell_borders(table_id, data)
+        self.update_style_keys(table_id, data)
+        self.update_cell_borders(table_id)
 
         self.objects.remove_unreferenced_objects()
         table_model.ClearField("base_column_row_uids")
@@ -1270,37 +1769,50 @@ class _NumbersModel(Cacheable):
                 num_rows = len(data) - row_start
                 row_end = row_start + num_rows
 
-            tile_dict = {
-                "maxColumn": 0,
-                "maxRow": 0,
-                "numCells": 0,
-                "numrows": num_rows,
-                "storage_version": 5,
-                "rowInfos": [],
-                "last_saved_in_BNC": True,
-                "should_use_wide_rows": True,
-            }
-            tile_id, tile = self.objects.create_object_from_dict(
-                "Index/Tables/Tile-{}",
-                tile_dict,
-                TSTArchives.Tile,
-            )
-            for row in range(row_start, row_end):
-                row_info = self.recalculate_row_info(table_id, data, row_start, row)
-                tile.rowInfos.append(row_info)
-
-            tile_ref = TSTArchives.TileStorage.Tile()
-            tile_ref.tileid = tile_idx
-            tile_ref.tile.MergeFrom(TSPMessages.Reference(identifier=tile_id))
-            base_data_store.tiles.tiles.append(tile_ref)
-            base_data_store.tiles.tile_size = MAX_TILE_SIZE
-
-            self.add_component_metadata(tile_id, "CalculationEngine", "Tables/Tile-{}")
+            row_infos = [
+                self.recalculate_row_info(table_id, data, row_start, row)
+                for row in range(row_start, row_end)
+            ]
+            self.add_tile(table_id, tile_idx, num_rows, row_infos)
 
             tile_idx += 1
 
         self.objects.update_object_file_store()
 
+    def add_tile(
+        self,
+        table_id: int,
+        tile_idx: int,
+        num_rows: int,
+        row_infos: list[TSTArchives.TileRowInfo],
+    ) -> None:
+        """Add a tile of encoded rows to a table's cell storage."""
+        tile_dict = {
+            "maxColumn": 0,
+            "maxRow": 0,
+            "numCells": 0,
+            "numrows": num_rows,
+            "storage_version": 5,
+            "rowInfos": [],
+            "last_saved_in_BNC": True,
+            "should_use_wide_rows": True,
+        }
+        tile_id, tile = self.objects.create_object_from_dict(
+            "Index/Tables/Tile-{}",
+            tile_dict,
+            TSTArchives.Tile,
+        )
+        tile.rowInfos.extend(row_infos)
+
+        base_data_store = self.objects[table_id].base_data_store
+        tile_ref = TSTArchives.TileStorage.Tile()
+        tile_ref.tileid = tile_idx
+        tile_ref.tile.MergeFrom(TSPMessages.Reference(identifier=tile_id))
+        base_data_store.tiles.tiles.append(tile_ref)
+        base_data_store.tiles.tile_size = MAX_TILE_SIZE
+
+        self.add_component_metadata(tile_id, "CalculationEngine", "Tables/Tile-{}")
+
     def create_string_table(self):
         table_strings_id, table_strings = self.objects.create_object_from_dict(
             "Index/Tables/DataList-{}",
@@ -1312,60 +1824,85 @@ class _NumbersModel(Cacheable):
 
     def table_height(self, table_id: int) -> int:
         """Return the height of a table in points."""
-        height = 0.0
-        for row in range(self.number_of_rows(table_id)):
-            height += self.row_height(table_id, row)
-        return floor(height)
+        (_, offsets, _, _) = self._header_sizes(table_id, TableAxis.ROW)
+        return floor(offsets[-1])
 
     def row_height(self, table_id: int, row: int, height: int | None = None) -> int:
         if height is not None:
             if table_id not in self._row_heights:
                 self._row_heights[table_id] = {}
             self._row_heights[table_id][row] = height
+            self._header_size_index.pop((table_id, TableAxis.ROW), None)
             return height
+        return self._header_size(table_id, TableAxis.ROW, row)
 
-        if table_id in self._row_heights and row in self._row_heights[table_id]:
-            return self._row_heights[table_id][row]
-
-        table_model = self.objects[table_id]
-        bds = self.objects[table_id].base_data_store
-        bucket_id = bds.rowHeaders.buckets[0].identifier
-        buckets = self.objects[bucket_id].headers
-        bucket_map = {x.index: x for x in buckets}
-        if row in bucket_map and bucket_map[row].size != 0.0:
-            height = round(bucket_map[row].size)
-        else:
-            height = round(table_model.default_row_height)
-
-        return height
+    def row_at_offset(self, table_id: int, offset: float) -> int | None:
+        """Return the row at a vertical offset in points from the top of a table."""
+        (_, offsets, _, _) = self._header_sizes(table_id, TableAxis.ROW)
+        return offset_to_index(offsets, offset)
 
     def table_width(self, table_id: int) -> int:
         """Return the width of a table in points."""
-        width = 0.0
-        for row in range(self.number_of_columns(table_id)):
-            width += self.col_width(table_id, row)
-        return round(width)
+        (_, offsets, _, _) = self._header_sizes(table_id, TableAxis.COLUMN)
+        return round(offsets[-1])
 
     def col_width(self, table_id: int, col: int, width: int | None = None) -> int:
         if width is not None:
             if table_id not in self._col_widths:
                 self._col_widths[table_id] = {}
             self._col_widths[table_id][col] = width
+            self._header_size_index.pop((table_id, TableAxis.COLUMN), None)
             return width
-
-        if table_id in self._col_widths and col in self._col_widths[table_id]:
-            return self._col_widths[table_id][col]
+        return self._header_size(table_id, TableAxis.COLUMN, col)
+
+    def col_at_offset(self, table_id: int, offset: float) -> int | None:
+        """Return the column at a horizontal offset in points from the left of a table."""
+        (_, offsets, _, _) = self._header_sizes(table_id, TableAxis.COLUMN)
+        return offset_to_index(offsets, offset)
+
+    def _header_size(self, table_id: int, axis: TableAxis, idx: int) -> int:
+        (sizes, _, bucket_sizes, default_size) = self._header_sizes(table_id, axis)
+        if idx < len(sizes):
+            return sizes[idx]
+        overrides = self._row_heights if axis == TableAxis.ROW else self._col_widths
+        if idx in overrides.get(table_id, {}):
+            return overrides[table_id][idx]
+        return round(bucket_sizes.get(idx) or default_size)
+
+    def _header_sizes(self, table_id: int, axis: TableAxis) -> tuple:
+        """
+        Return the sizes of the rows or columns of a table and the offset of
+        each from the start of the table, along with the header bucket sizes
+        and default size they were built from. The sizes are rebuilt when the
+        table is resized or a size is changed.
+        """
+        if axis == TableAxis.ROW:
+            count = self.number_of_rows(table_id)
+        else:
+            count = self.number_of_columns(table_id)
+        index = self._header_size_index.get((table_id, axis))
+        if index is not None and len(index[0]) == count:
+            return index
 
         table_model = self.objects[table_id]
-        bds = self.objects[table_id].base_data_store
-        bucket_id = bds.columnHeaders.identifier
-        buckets = self.objects[bucket_id].headers
-        bucket_map = {x.index: x for x in buckets}
-        if col in bucket_map and bucket_map[col].size != 0.0:
-            width = round(bucket_map[col].size)
+        bds = table_model.base_data_store
+        if axis == TableAxis.ROW:
+            headers = self.objects[bds.rowHeaders.buckets[0].identifier].headers
+            default_size = table_model.default_row_height
+            overrides = self._row_heights.get(table_id, {})
         else:
-            width = round(table_model.default_column_width)
-        return width
+            headers = self.objects[bds.columnHeaders.identifier].headers
+            default_size = table_model.default_column_width
+            overrides = self._col_widths.get(table_id, {})
+
+        bucket_sizes = {x.index: x.size for x in headers}
+        sizes = [
+            overrides[idx] if idx in overrides else round(bucket_sizes.get(idx) or default_size)
+            for idx in range(count)
+        ]
+        index = (sizes, [0, *accumulate(sizes)], bucket_sizes, default_size)
+        self._header_size_index[(table_id, axis)] = index
+        return index
 
     def num_header_rows(self, table_id: int, num_headers: int | None = None) -> int:
         """Return/set the number of header rows."""
@@ -1396,12 +1933,7 @@ class _NumbersModel(Cacheable):
     def last_table_offset(self, sheet_id):
         """Y offset of the last table in a sheet."""
         table_id = self.table_ids(sheet_id)[-1]
-        y_offset = next(
-            self.objects[self.table_info_id(x)].super.geometry.position.y
-            for x in self.table_ids(sheet_id)
-            if x == table_id
-        )
-
+        (_, y_offset) = self.table_coordinates(table_id)
         return self.table_height(table_id) + y_offset
 
     def create_drawable(
@@ -1887,28 +2419,50 @@ class _NumbersModel(Cacheable):
         have changes that require a cell style.
         """
         cell_styles = {}
-        for _, cells in enumerate(data):
-            for _, cell in enumerate(cells):
-                if cell._style is not None and cell._style._update_cell_style:
-                    fingerprint = (
-                        str(cell.style.alignment.vertical)
-                        + str(cell.style.first_indent)
-                        + str(cell.style.left_indent)
-                        + str(cell.style.right_indent)
-                        + str(cell.style.text_inset)
-                        + str(cell.style.text_wrap)
-                    )
-                    if cell._style.bg_color is not None:
-                        fingerprint = fingerprint + (
-                            str(cell.style.bg_color.r)
-                            + str(cell.style.bg_color.g)
-                            + str(cell.style.bg_color.b)
-                        )
-                    if cell._style.bg_image is not None:
-                        fingerprint += cell._style.bg_image.filename
-                    if fingerprint not in cell_styles:
-                        cell_styles[fingerprint] = self.add_cell_style(cell._style)
-                    cell._style._cell_style_obj_id = cell_styles[fingerprint]
+        updated_styles = set()
+        for cells in data:
+            for cell in cells:
+                style = cell._style
+                if style is None or not style._update_cell_style or id(style) in updated_styles:
+                    continue
+                updated_styles.add(id(style))
+                key = style._cell_style_key
+                if key not in cell_styles:
+                    cell_styles[key] = self.add_cell_style(style)
+                style._cell_style_obj_id = cell_styles[key]
+
+    def update_style_keys(self, table_id: int, data: list) -> None:
+        """
+        Set the table style keys of every styled cell, looking up each distinct
+        paragraph and cell style in the table's style list once.
+        """
+        styled_cells = []
+        style_refcounts = Counter()
+        for cells in data:
+            for cell in cells:
+                style = cell._style
+                if style is None:
+                    continue
+                styled_cells.append(cell)
+                if style._text_style_obj_id is not None:
+                    style_refcounts[style._text_style_obj_id] += 1
+                if style._cell_style_obj_id is not None:
+                    style_refcounts[style._cell_style_obj_id] += 1
+        if not styled_cells:
+            return
+
+        component_id = self._table_styles.id(table_id)
+        references = [TSPMessages.Reference(identifier=obj_id) for obj_id in style_refcounts]
+        keys = self._table_styles.lookup_keys(table_id, references, style_refcounts.values())
+        style_keys = dict(zip(style_refcounts.keys(), keys, strict=True))
+        for obj_id in style_refcounts:
+            self.add_component_reference(obj_id, component_id=component_id)
+
+        for cell in styled_cells:
+            if cell._style._text_style_obj_id is not None:
+                cell._text_style_id = style_keys[cell._style._text_style_obj_id]
+            if cell._style._cell_style_obj_id is not None:
+                cell._cell_style_id = style_keys[cell._style._cell_style_obj_id]
 
     def add_cell_style(self, style: Style) -> int:
         if style.bg_image is not None:
@@ -2156,18 +2710,42 @@ class _NumbersModel(Cacheable):
         """
         if cell._text_style_id is not None:
             return self.table_style(cell._table_id, cell._text_style_id)
+        return self.objects[self.default_text_style_id(cell)]
 
+    def default_text_style_id(self, cell: Cell) -> int:
+        """
+        Return the object ID of the default header, footer or body
+        text style that applies to a cell's position in its table.
+        """
         table_model = self.objects[cell._table_id]
         if cell.row in range(table_model.number_of_header_rows):
-            return self.objects[table_model.header_row_text_style.identifier]
+            return table_model.header_row_text_style.identifier
         if cell.col in range(table_model.number_of_header_columns):
-            return self.objects[table_model.header_column_text_style.identifier]
+            return table_model.header_column_text_style.identifier
         if table_model.number_of_footer_rows > 0:
             start_row_num = table_model.number_of_rows - table_model.number_of_footer_rows
             end_row_num = start_row_num + table_model.number_of_footer_rows
             if cell.row in range(start_row_num, end_row_num):
-                return self.objects[table_model.footer_row_text_style.identifier]
-        return self.objects[table_model.body_text_style.identifier]
+                return table_model.footer_row_text_style.identifier
+        return table_model.body_text_style.identifier
+
+    def cell_style(self, cell: Cell) -> Style:
+        """
+        Return the resolved style for a cell. Styles are interned by the cell's
+        cell style and text style so that every cell sharing the same pair of
+        archives shares a single resolved :class:`Style`. Shared styles cannot
+        be modified; cells take a copy of their style when it is first read.
+        """
+        if cell._text_style_id is not None:
+            text_style_key = (cell._text_style_id, None)
+        else:
+            text_style_key = (None, self.default_text_style_id(cell))
+        key = (cell._table_id, cell._cell_style_id, text_style_key)
+        if key not in self._cell_styles:
+            style = Style.from_storage(cell, self)
+            style.__dict__["_interned"] = (self._cell_styles, key)
+            self._cell_styles[key] = style
+        return self._cell_styles[key]
 
     def cell_alignment(self, cell: Cell) -> Alignment:
         style = self.cell_text_style(cell)
@@ -2305,32 +2883,12 @@ class _NumbersModel(Cacheable):
             return "dashes"
         return "none"
 
-    def cell_for_stroke(self, table_id: int, side: str, row: int, col: int) -> object:
-        data = self._table_data[table_id]
-        if row < 0 or col < 0:
+    def cell_border(self, table_id: int, row: int, col: int, side: str) -> Border | None:
+        """Return the border for one side of a cell, or ``None`` if there is none."""
+        self.extract_strokes(table_id)
+        if self.merge_cells(table_id).is_merged_edge(row, col, side):
             return None
-        if row >= len(data) or col >= len(data[row]):
-            return None
-        cell = self._table_data[table_id][row][col]
-        if isinstance(cell, MergedCell):
-            if (
-                (side == "top" and row == cell.row_start)
-                or (side == "right" and col == cell.col_end)
-                or (side == "bottom" and row == cell.row_end)
-                or (side == "left" and col == cell.col_start)
-            ):
-                return cell
-        elif cell.is_merged:
-            # No borders for merged edges of anchor cells
-            if (
-                side in ["top", "left"]
-                or (side == "right" and cell.size[1] == 1)
-                or (side == "bottom" and cell.size[0] == 1)
-            ):
-                return cell
-        else:
-            return cell
-        return None
+        return self._table_borders[table_id].get(row, col, side)
 
     def set_cell_border(
         self,
@@ -2339,40 +2897,41 @@ class _NumbersModel(Cacheable):
         col: int,
         side: str,
         border_value: Border,
+        length: int = 1,
     ) -> None:
-        """Set the 2 borders adjacent to a stroke if within the table range."""
+        """Set the borders on one side of a run of cells, shared with adjacent cells."""
         self._update_strokes[table_id] = True
-        if side == "top":
-            bottom_cell = self.cell_for_stroke(table_id, "bottom", row - 1, col)
-            if (cell := self.cell_for_stroke(table_id, "top", row, col)) is not None:
-                cell._border.top = border_value
-            if bottom_cell is not None:
-                bottom_cell._border.bottom = border_value
-        elif side == "right":
-            left_cell = self.cell_for_stroke(table_id, "left", row, col + 1)
-            if (cell := self.cell_for_stroke(table_id, "right", row, col)) is not None:
-                cell._border.right = border_value
-            if left_cell is not None:
-                left_cell._border.left = border_value
-        elif side == "bottom":
-            top_cell = self.cell_for_stroke(table_id, "top", row + 1, col)
-            if (cell := self.cell_for_stroke(table_id, "bottom", row, col)) is not None:
-                cell._border.bottom = border_value
-            if top_cell is not None:
-                top_cell._border.top = border_value
-        else:  # left border
-            right_cell = self.cell_for_stroke(table_id, "right", row, col - 1)
-            if (cell := self.cell_for_stroke(table_id, "left", row, col)) is not None:
-                cell._border.left = border_value
-            if right_cell is not None:
-                right_cell._border.right = border_value
+        self._table_borders[table_id].set(row, col, side, border_value, length)
+
+    def insert_border_lines(self, table_id: int, axis: str, start: int, count: int) -> None:
+        """Move borders to account for rows or columns inserted into a table."""
+        self.extract_strokes(table_id)
+        table_borders = self._table_borders[table_id]
+        if not table_borders:
+            return
+        self._update_strokes[table_id] = True
+        if axis == "rows":
+            table_borders.insert_rows(start, count, self.number_of_rows(table_id))
+        else:
+            table_borders.insert_columns(start, count, self.number_of_columns(table_id))
+
+    def delete_border_lines(self, table_id: int, axis: str, start: int, count: int) -> None:
+        """Move borders to account for rows or columns deleted from a table."""
+        self.extract_strokes(table_id)
+        table_borders = self._table_borders[table_id]
+        if not table_borders:
+            return
+        self._update_strokes[table_id] = True
+        if axis == "rows":
+            table_borders.delete_rows(start, count)
+        else:
+            table_borders.delete_columns(start, count)
 
     def extract_strokes_in_layers(
         self,
-        table_id: int,
         layer_ids: list,
         side: str,
-    ) -> list[tuple[int, int, int, int, str, Border]]:
+    ) -> list[tuple[int, int, int, str, Border, int]]:
         strokes = []
         for layer_id in layer_ids:
             stroke_layer = self.objects[layer_id.identifier]
@@ -2383,33 +2942,14 @@ class _NumbersModel(Cacheable):
                     style=self.stroke_type(stroke_run),
                 )
                 if side in ["top", "bottom"]:
-                    start_row = stroke_layer.row_column_index
-                    start_column = stroke_run.origin
-                    for col in range(start_column, start_column + stroke_run.length):
-                        strokes.append(
-                            (
-                                stroke_run.order,
-                                table_id,
-                                start_row,
-                                col,
-                                side,
-                                border_value,
-                            ),
-                        )
+                    row = stroke_layer.row_column_index
+                    col = stroke_run.origin
                 else:
-                    start_row = stroke_run.origin
-                    start_column = stroke_layer.row_column_index
-                    for row in range(start_row, start_row + stroke_run.length):
-                        strokes.append(
-                            (
-                                stroke_run.order,
-                                table_id,
-                                row,
-                                start_column,
-                                side,
-                                border_value,
-                            ),
-                        )
+                    row = stroke_run.origin
+                    col = stroke_layer.row_column_index
+                strokes.append(
+                    (stroke_run.order, row, col, side, border_value, stroke_run.length),
+                )
         return strokes
 
     @cache()
@@ -2420,31 +2960,20 @@ class _NumbersModel(Cacheable):
             return
         sidecar_obj = self.objects[stroke_sidecar_id]
         strokes = []
+        strokes.extend(self.extract_strokes_in_layers(sidecar_obj.top_row_stroke_layers, "top"))
         strokes.extend(
-            self.extract_strokes_in_layers(table_id, sidecar_obj.top_row_stroke_layers, "top"),
+            self.extract_strokes_in_layers(sidecar_obj.left_column_stroke_layers, "left"),
         )
         strokes.extend(
-            self.extract_strokes_in_layers(table_id, sidecar_obj.left_column_stroke_layers, "left"),
+            self.extract_strokes_in_layers(sidecar_obj.right_column_stroke_layers, "right"),
         )
         strokes.extend(
-            self.extract_strokes_in_layers(
-                table_id,
-                sidecar_obj.right_column_stroke_layers,
-                "right",
-            ),
+            self.extract_strokes_in_layers(sidecar_obj.bottom_row_stroke_layers, "bottom"),
         )
-        strokes.extend(
-            self.extract_strokes_in_layers(
-                table_id,
-                sidecar_obj.bottom_row_stroke_layers,
-                "bottom",
-            ),
-        )
-        for _, table_id, row, col, side, border_value in sorted(
-            strokes,
-            key=lambda value: value[0],
-        ):
-            self.set_cell_border(table_id, row, col, side, border_value)
+        # Later strokes overwrite earlier ones where runs overlap
+        table_borders = self._table_borders[table_id]
+        for _, row, col, side, border_value, length in sorted(strokes, key=lambda x: x[0]):
+            table_borders.set(row, col, side, border_value, length)
 
     def create_stroke(self, origin: int, length: int, border_value: Border):
         line_cap = TSDArchives.StrokeArchive.LineCap.ButtCap
@@ -2503,8 +3032,8 @@ class _NumbersModel(Cacheable):
             ),
         )
 
-    def update_cell_borders(self, table_id: int, data: list) -> None:
-        """Consolidate identical strokes and then generate stoke archives."""
+    def update_cell_borders(self, table_id: int) -> None:
+        """Generate stroke archives from the runs in the table's border index."""
         if table_id not in self._update_strokes:
             return
 
@@ -2520,73 +3049,62 @@ class _NumbersModel(Cacheable):
             clear_field_container(sidecar_obj.left_column_stroke_layers)
             clear_field_container(sidecar_obj.right_column_stroke_layers)
 
-        # Horizontal strokes (all but bottom of table)
-        for row in range(num_rows):
-            col = 0
-            while col < num_cols:
-                border = data[row][col]._border.top
-                if border is not None:
-                    length = 1
-                    while col + length < num_cols and data[row][col + length]._border.top == border:
-                        length += 1
-                    self.add_stroke(table_id, row, col, "top", border, length)
-                    col += length
-                else:
-                    col += 1
-
-        # Bottom horizontal stroke
-        row = num_rows - 1
-        col = 0
-        while col < num_cols:
-            border = data[row][col]._border.bottom
-            if border is not None:
-                length = 1
-                while col + length < num_cols and data[row][col + length]._border.bottom == border:
-                    length += 1
-                self.add_stroke(table_id, row, col, "bottom", border, length)
-                col += length
-            else:
-                col += 1
-
-        # Vertical strokes (all but right hand side of table)
-        for col in range(num_cols):
-            row = 0
-            while row < num_rows:
-                border = data[row][col]._border.left
-                if border is not None:
-                    length = 1
-                    while (
-                        row + length < num_rows and data[row + length][col]._border.left == border
-                    ):
-                        length += 1
-                    self.add_stroke(table_id, row, col, "left", border, length)
-                    row += length
-                else:
-                    row += 1
+        # Edges inside merged cells are never drawn
+        horizontal_masks = defaultdict(list)
+        vertical_masks = defaultdict(list)
+        for row_start, col_start, row_end, col_end in self.merge_cells(table_id).ranges():
+            for row in range(row_start + 1, row_end + 1):
+                horizontal_masks[row].append((col_start, col_end + 1))
+            for col in range(col_start + 1, col_end + 1):
+                vertical_masks[col].append((row_start, row_end + 1))
+
+        def visible_runs(runs: BorderRuns, masks: list, limit: int) -> list:
+            if masks:
+                runs = runs.copy()
+                for start, end in masks:
+                    runs.set(start, end, None)
+            return [
+                (max(start, 0), min(end, limit) - max(start, 0), border)
+                for start, end, border in runs.runs()
+                if start < limit and end > 0
+            ]
 
-        # Right hand side of table
-        col = num_cols - 1
-        row = 0
-        while row < num_rows:
-            border = data[row][col]._border.right
-            if border is not None:
-                length = 1
-                while row + length < num_rows and data[row + length][col]._border.right == border:
-                    length += 1
-                self.add_stroke(table_id, row, col, "right", border, length)
-                row += length
+        table_borders = self._table_borders[table_id]
+        # Horizontal strokes are the tops of each row plus the bottom of the last row
+        for row in range(num_rows + 1):
+            runs = visible_runs(
+                table_borders.horizontal_runs(row),
+                horizontal_masks.get(row),
+                num_cols,
+            )
+            if row < num_rows:
+                self.add_stroke_layer(table_id, "top", row, runs)
             else:
-                row += 1
+                self.add_stroke_layer(table_id, "bottom", num_rows - 1, runs)
+
+        # Vertical strokes are the lefts of each column plus the right of the last column
+        for col in range(num_cols + 1):
+            runs = visible_runs(
+                table_borders.vertical_runs(col),
+                vertical_masks.get(col),
+                num_rows,
+            )
+            if col < num_cols:
+                self.add_stroke_layer(table_id, "left", col, runs)
+            else:
+                self.add_stroke_layer(table_id, "right", num_cols - 1, runs)
 
-    def add_stroke(
+    def add_stroke_layer(
         self,
         table_id: int,
-        row: int,
-        col: int,
         side: str,
-        border_value: Border,
-        length: int,
+        row_column_index: int,
+        runs: list[tuple[int, int, Border]],
     ) -> None:
+        """Add a stroke layer for a row or column from ``(origin, length, border)`` runs."""
+        if not runs:
+            return
+
         table_obj = self.objects[table_id]
         sidecar_obj = self.objects[table_obj.stroke_sidecar.identifier]
         sidecar_obj.row_count = table_obj.number_of_rows
@@ -2595,38 +3113,23 @@ class _NumbersModel(Cacheable):
 
         if side == "top":
             layer_ids = sidecar_obj.top_row_stroke_layers
-            row_column_index = row
-            origin = col
         elif side == "right":
             layer_ids = sidecar_obj.right_column_stroke_layers
-            row_column_index = col
-            origin = row
         elif side == "bottom":
             layer_ids = sidecar_obj.bottom_row_stroke_layers
-            row_column_index = row
-            origin = col
         else:  # left border
             layer_ids = sidecar_obj.left_column_stroke_layers
-            row_column_index = col
-            origin = row
 
-        stroke_layer = None
-        for layer_id in layer_ids:
-            if self.objects[layer_id.identifier].row_column_index == row_column_index:
-                stroke_layer = self.objects[layer_id.identifier]
-        if stroke_layer is not None:
-            stroke_layer.stroke_runs.append(self.create_stroke(origin, length, border_value))
-            stroke_layer.stroke_runs.sort(key=lambda x: x.origin)
-        else:
-            stroke_layer_id, stroke_layer = self.objects.create_object_from_dict(
-                "CalculationEngine",
-                {
-                    "row_column_index": row_column_index,
-                },
-                TSTArchives.StrokeLayerArchive,
-            )
+        stroke_layer_id, stroke_layer = self.objects.create_object_from_dict(
+            "CalculationEngine",
+            {
+                "row_column_index": row_column_index,
+            },
+            TSTArchives.StrokeLayerArchive,
+        )
+        for origin, length, border_value in runs:
             stroke_layer.stroke_runs.append(self.create_stroke(origin, length, border_value))
-            layer_ids.append(TSPMessages.Reference(identifier=stroke_layer_id))
+        layer_ids.append(TSPMessages.Reference(identifier=stroke_layer_id))
 
     def store_image(self, data: bytes, filename: str) -> None:
         """Store image data in the file store."""
@@ -2838,6 +3341,13 @@ def clear_field_container(obj) -> None:
         _ = obj.pop()
 
 
+def offset_to_index(offsets: list[int], offset: float) -> int | None:
+    """Return the index of the row or column spanning an offset, using their start offsets."""
+    if offset < 0 or offset >= offsets[-1]:
+        return None
+    return bisect_right(offsets, offset) - 1
+
+
 def field_references(obj: object) -> dict:
     """Return a dict of all fields in an object that are references to other objects."""
     return {
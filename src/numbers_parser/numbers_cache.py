@@ -2,11 +2,19 @@ from collections import defaultdict
 from functools import wraps
 
 
+def _method_cache() -> defaultdict:
+    return defaultdict(dict)
+
+
 class Cacheable:
-    def __new__(cls, *_args, **_kwargs):
-        obj = object.__new__(cls)
-        obj._cache = defaultdict(lambda: defaultdict(dict))
-        return obj
+    def __getattr__(self, name: str):
+        # The cache is created on first use so that objects which are never
+        # queried, such as cells written in bulk, do not each allocate one
+        if name != "_cache":
+            msg = f"'{type(self).__name__}' object has no attribute '{name}'"
+            raise AttributeError(msg)
+        self._cache = defaultdict(_method_cache)
+        return self._cache
 
 
 def cache(num_args=1):
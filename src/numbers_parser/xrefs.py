@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import re
-from collections import defaultdict
-from dataclasses import dataclass, field, replace
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from enum import IntEnum
 
 from numbers_parser.constants import OPERATOR_PRECEDENCE
@@ -48,6 +48,27 @@ class CellRangeType(IntEnum):
     NAMED_ROW_COLUMN = 6
 
 
+class RefContext:
+    """
+    Table and sheet names shared by all the references rendered in one pass
+    over a document, so that they are looked up once rather than for each
+    reference. Named row and column ranges are refreshed when the context is
+    created.
+    """
+
+    def __init__(self, model) -> None:
+        model.name_ref_cache.refresh()
+        self.table_names = model.table_names()
+        self.table_name_unique = {
+            name: self.table_names.count(name) == 1 for name in self.table_names
+        }
+        self.table_sheet_ids = {
+            table_id: sheet_id
+            for sheet_id in model.sheet_ids()
+            for table_id in model.table_ids(sheet_id)
+        }
+
+
 @dataclass
 class CellRange:
     model: object = None
@@ -65,6 +86,7 @@ class CellRange:
     _ref_error: bool = False
     _do_init: bool = True
     _table_names: list[str] = field(init=False, default=None, repr=False)
+    context: RefContext = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if (self.row_start is not None and self.row_start < 0) or (
@@ -72,28 +94,26 @@ class CellRange:
         ):
             self._ref_error = True
         else:
+            if self.context is None:
+                self.context = RefContext(self.model)
             self._initialize_table_data()
-            self.model.name_ref_cache.refresh()
             self._set_sheet_ids()
 
     def _initialize_table_data(self):
-        self._table_names = self.model.table_names()
-        self.table_name_unique = {
-            name: self._table_names.count(name) == 1 for name in self._table_names
-        }
+        self._table_names = self.context.table_names
+        self.table_name_unique = self.context.table_name_unique
 
     def _set_sheet_ids(self):
         """Determine the sheet IDs for the referenced tables."""
         if self.to_table_id is None:
             self.to_table_id = self.from_table_id
-        self.from_sheet_id = self.model.table_id_to_sheet_id(self.from_table_id)
-        self.to_sheet_id = self.model.table_id_to_sheet_id(self.to_table_id)
+        self.from_sheet_id = self.context.table_sheet_ids.get(self.from_table_id)
+        self.to_sheet_id = self.context.table_sheet_ids.get(self.to_table_id)
 
     def expand_ref(self, ref: str, is_abs: bool = False, no_prefix=False) -> str:
         if self._ref_error:
             return "#REF!"
 
-        self.model.name_ref_cache.refresh()
         is_document_unique = (
             ref.scope == RefScope.DOCUMENT if isinstance(ref, ScopedNameRef) else False
         )
@@ -131,7 +151,6 @@ class CellRange:
         if self._ref_error:
             return "#REF!"
 
-        self.model.name_ref_cache.refresh()
         # Handle row-only ranges
         if self.col_start is None:
             row_range = self.model.name_ref_cache.row_ranges[self.to_table_id]
@@ -259,8 +278,19 @@ class ScopedNameRefCache:
         self.col_ranges = {}
         self._dirty_cache = True
         self.table_names = []
-
-    def mark_dirty(self):
+        # Names are recalculated only for the tables and axes that change;
+        # counts of each name in the document and each sheet are updated as
+        # names are recalculated
+        self._axis_names = {}
+        self._axis_mutations = Counter()
+        self._doc_name_counts = Counter()
+        self._sheet_name_counts = defaultdict(Counter)
+        self._axis_sheet_ids = {}
+
+    def mark_dirty(self, table_id: int | None = None, axis: TableAxis | None = None):
+        if table_id is not None:
+            for table_axis in TableAxis if axis is None else [axis]:
+                self._axis_mutations[(table_id, table_axis)] += 1
         self._dirty_cache = True
 
     def refresh(self):
@@ -268,101 +298,130 @@ class ScopedNameRefCache:
             self.calculate_named_ranges()
             self._dirty_cache = False
 
-    @staticmethod
-    def _exact_count(pool: list, value: int | str | bool):
-        return sum(1 for x in pool if type(x) is type(value) and x == value)
-
-    def _row_data(self, table_id: int, row: int) -> int | str | bool | None:
-        num_header_cols = self.model.num_header_cols(table_id)
-        return self.model._table_data[table_id][row][num_header_cols - 1].formatted_value
-
-    def _column_data(self, table_id: int, col: int) -> int | str | bool | None:
-        num_header_rows = self.model.num_header_rows(table_id)
-        return self.model._table_data[table_id][num_header_rows - 1][col].formatted_value
-
-    def _calculate_name_scopes(
+    def _header_names(
         self,
-        sheet_id: int,
         table_id: int,
         axis: TableAxis,
-    ) -> dict[int, str | None]:
-        num_header_rows = self.model.num_header_rows(table_id)
-        num_header_cols = self.model.num_header_cols(table_id)
-
+        first_offset: int,
+        range_end: int,
+    ) -> list[str]:
+        """Return the formatted values of the header cells that name rows or columns."""
+        data = self.model._table_data[table_id]
         if axis == TableAxis.ROW:
-            data_lookup = self._row_data
-            range_start = num_header_rows
-            range_end = self.model.number_of_rows(table_id)
-            first_offset = num_header_rows
-        else:
-            data_lookup = self._column_data
-            range_start = num_header_cols
-            range_end = self.model.number_of_columns(table_id)
-            first_offset = num_header_cols
-
-        if (axis == TableAxis.ROW and num_header_cols == 0) or (
-            axis == TableAxis.COLUMN and num_header_rows == 0
-        ):
-            return dict.fromkeys(range(range_end))
+            # Rows appended by a TableWriter are not held in memory and have no names
+            num_header_cols = self.model.num_header_cols(table_id)
+            num_stored_rows = min(range_end, len(data))
+            cells = [data[idx][num_header_cols - 1] for idx in range(first_offset, num_stored_rows)]
+            names = self._cell_names(table_id, cells)
+            return names + [None] * (range_end - max(first_offset, num_stored_rows))
+        num_header_rows = self.model.num_header_rows(table_id)
+        cells = data[num_header_rows - 1][first_offset:range_end]
+        return self._cell_names(table_id, cells)
 
-        scopes = {}
+    def _cell_names(self, table_id: int, cells: list) -> list[str]:
+        """
+        Return the formatted values of header cells. Unformatted text, which
+        is most header labels, is its own formatted value; only the remaining
+        cells are formatted.
+        """
         names = []
-        all_names = [data_lookup(table_id, idx) for idx in range(range_start, range_end)]
-        for idx in range(range_end):
-            if idx < first_offset:
-                names.append(None)
-                scopes[idx] = None
+        formatted_cells = []
+        for idx, cell in enumerate(cells):
+            if isinstance(cell.value, str) and not cell._has_format():
+                names.append(cell.value)
             else:
-                name = data_lookup(table_id, idx)
-                if self._exact_count(all_names, name) > 1:
-                    names.append(None)
-                    scopes[idx] = None
-                else:
-                    names.append(name)
-                    scopes[idx] = name
-
-        for name in names:
-            self.doc_name_refs[name] += 1
-            self.sheet_name_refs[sheet_id][name] += 1
+                names.append(None)
+                formatted_cells.append((idx, cell))
+        if formatted_cells:
+            formatted = self.model.formatted_values(table_id, [[x[1] for x in formatted_cells]])
+            for (idx, _), name in zip(formatted_cells, formatted[0], strict=True):
+                names[idx] = name
+        return names
+
+    def _axis_shape(self, table_id: int, axis: TableAxis) -> tuple[int, int, int, int]:
+        num_header_rows = self.model.num_header_rows(table_id)
+        num_header_cols = self.model.num_header_cols(table_id)
+        mutations = self._axis_mutations[(table_id, axis)]
+        if axis == TableAxis.ROW:
+            num_rows = self.model.number_of_rows(table_id)
+            return (num_header_rows, num_header_cols, num_rows, mutations)
+        num_cols = self.model.number_of_columns(table_id)
+        return (num_header_cols, num_header_rows, num_cols, mutations)
 
-        return scopes
+    def _calculate_name_scopes(self, table_id: int, axis: TableAxis) -> list[str | None]:
+        """
+        Return the name of each row or column of a table, or None for headers
+        and for names that are not unique in the table.
+        """
+        (first_offset, num_names_headers, range_end, _) = self._axis_shape(table_id, axis)
+        if num_names_headers == 0:
+            return [None] * range_end
+
+        names = self._header_names(table_id, axis, first_offset, range_end)
+        name_counts = Counter((type(name), name) for name in names)
+        return [None] * first_offset + [
+            name if name_counts[(type(name), name)] == 1 else None for name in names
+        ]
+
+    def _update_axis_names(self, sheet_id: int, table_id: int, axis: TableAxis) -> list:
+        shape = self._axis_shape(table_id, axis)
+        if (table_id, axis) in self._axis_names:
+            (prev_shape, prev_names) = self._axis_names[(table_id, axis)]
+            if prev_shape == shape:
+                return prev_names
+            self._remove_name_counts(sheet_id, prev_names)
+
+        names = self._calculate_name_scopes(table_id, axis)
+        self._axis_names[(table_id, axis)] = (shape, names)
+        names_in_use = [name for name in names if name is not None]
+        self._doc_name_counts.update(names_in_use)
+        self._sheet_name_counts[sheet_id].update(names_in_use)
+        return names
+
+    def _remove_name_counts(self, sheet_id: int, names: list) -> None:
+        names_in_use = [name for name in names if name is not None]
+        self._doc_name_counts.subtract(names_in_use)
+        self._sheet_name_counts[sheet_id].subtract(names_in_use)
 
     def _calculate_scope_types(
         self,
         sheet_id: int,
         table_id: int,
         axis: TableAxis,
-        scopes: dict[int, CellRange | None],
-    ):
+        names: list[str | None],
+    ) -> dict[int, ScopedNameRef | None]:
         """
         For any locally unique row/column names, tag whether they are table-unique,
         sheet-unique or document-unique names.
         """
-        if axis == TableAxis.ROW:
-            axis_range = range(self.model.number_of_rows(table_id))
-        else:
-            axis_range = range(self.model.number_of_columns(table_id))
-
         table_name = self.model.table_name(table_id)
-        for idx in axis_range:
-            name = scopes[idx]
-            scope = ScopedNameRef(name, axis=axis, table_id=table_id, offset=idx)
+        table_scope = RefScope.TABLE if self._table_name_counts[table_name] == 1 else RefScope.NONE
+        sheet_name_counts = self._sheet_name_counts[sheet_id]
+        scopes = {}
+        for idx, name in enumerate(names):
             if name is None:
+                scopes[idx] = None
                 continue
-            if name in self.doc_name_refs:
-                scopes[idx] = replace(scope, scope=RefScope.DOCUMENT)
+            if self._doc_name_counts[name] == 1:
+                scope_type = RefScope.DOCUMENT
+            elif sheet_name_counts[name] == 1:
+                scope_type = RefScope.SHEET
+            else:
+                scope_type = table_scope
+            scopes[idx] = ScopedNameRef(
+                name,
+                axis=axis,
+                table_id=table_id,
+                offset=idx,
+                scope=scope_type,
+            )
+            if scope_type == RefScope.DOCUMENT:
                 self.doc_name_refs[name] = scopes[idx]
-            elif name in self.sheet_name_refs[sheet_id]:
-                scopes[idx] = replace(scope, scope=RefScope.SHEET)
+            elif scope_type == RefScope.SHEET:
                 self.sheet_name_refs[sheet_id][name] = scopes[idx]
             else:
-                scope_type = (
-                    RefScope.TABLE
-                    if self._exact_count(self.table_names, table_name) == 1
-                    else RefScope.NONE
-                )
-                scopes[idx] = replace(scope, scope=scope_type)
                 self.table_name_refs[table_id][name] = scopes[idx]
+        return scopes
 
     def _calculate_table_name_maps(self) -> dict[str, int]:
         self.sheet_name_to_id = {self.model.sheet_name(sid): sid for sid in self.model.sheet_ids()}
@@ -370,7 +429,7 @@ class ScopedNameRefCache:
         self.unique_table_name_to_id = {
             self.model.table_name(tid): tid
             for tid in self.model.table_ids()
-            if self.table_names.count(self.model.table_name(tid)) == 1
+            if self._table_name_counts[self.model.table_name(tid)] == 1
         }
         self.sheet_table_name_to_id = {
             self.model.sheet_name(sid): {
@@ -382,56 +441,51 @@ class ScopedNameRefCache:
     def calculate_named_ranges(self):
         """
         Find the globally unique row and column headers and the table unique
-        row and column headers for use in range references. Returns a dict
-        mapping table ID to lists of rows and columns and their names if
-        they are unique.
+        row and column headers for use in range references. Names are only
+        recalculated for tables and axes that have changed since the last
+        calculation.
         """
-        self.doc_name_refs = defaultdict(int)
-        self.sheet_name_refs = {}
         self.table_names = self.model.table_names()
+        self._table_name_counts = Counter(self.table_names)
         self._calculate_table_name_maps()
 
+        table_sheet_ids = {
+            table_id: sheet_id
+            for sheet_id in self.model.sheet_ids()
+            for table_id in self.model.table_ids(sheet_id)
+        }
+        for table_id, axis in list(self._axis_names):
+            if table_id not in table_sheet_ids:
+                (_, names) = self._axis_names.pop((table_id, axis))
+                self._remove_name_counts(self._axis_sheet_ids[table_id], names)
+        self._axis_sheet_ids = table_sheet_ids
+
+        self.doc_name_refs = {}
+        self.sheet_name_refs = {}
+        self.table_name_refs = {}
         self.row_ranges = {}
         self.col_ranges = {}
-        for sheet_id in self.model.sheet_ids():
-            self.sheet_name_refs[sheet_id] = defaultdict(int)
-            for table_id in self.model.table_ids(sheet_id):
-                self.table_name_refs[table_id] = defaultdict(int)
-                self.row_ranges[table_id] = self._calculate_name_scopes(
-                    sheet_id,
-                    table_id,
-                    TableAxis.ROW,
-                )
-                self.col_ranges[table_id] = self._calculate_name_scopes(
-                    sheet_id,
-                    table_id,
-                    TableAxis.COLUMN,
-                )
-
-        # Re-init the list of document-scoped names if they are unique
-        self.doc_name_refs = {
-            name: None for name, count in self.doc_name_refs.items() if count == 1
+        # All name counts must be up to date before any scopes are tagged
+        names = {
+            (table_id, axis): self._update_axis_names(sheet_id, table_id, axis)
+            for table_id, sheet_id in table_sheet_ids.items()
+            for axis in TableAxis
         }
-
-        for sheet_id in self.model.sheet_ids():
-            # Re-init the list of sheet-scoped names if they are unique
-            self.sheet_name_refs[sheet_id] = {
-                name: None for name, count in self.sheet_name_refs[sheet_id].items() if count == 1
-            }
-
-            for table_id in self.model.table_ids(sheet_id):
-                self._calculate_scope_types(
-                    sheet_id,
-                    table_id,
-                    TableAxis.ROW,
-                    self.row_ranges[table_id],
-                )
-                self._calculate_scope_types(
-                    sheet_id,
-                    table_id,
-                    TableAxis.COLUMN,
-                    self.col_ranges[table_id],
-                )
+        for table_id, sheet_id in table_sheet_ids.items():
+            self.sheet_name_refs.setdefault(sheet_id, {})
+            self.table_name_refs[table_id] = {}
+            self.row_ranges[table_id] = self._calculate_scope_types(
+                sheet_id,
+                table_id,
+                TableAxis.ROW,
+                names[(table_id, TableAxis.ROW)],
+            )
+            self.col_ranges[table_id] = self._calculate_scope_types(
+                sheet_id,
+                table_id,
+                TableAxis.COLUMN,
+                names[(table_id, TableAxis.COLUMN)],
+            )
 
 
 # Cell reference conversion from  https://github.com/jmcnamara/XlsxWriter
@@ -377,3 +377,118 @@ def test_resave_borders(configurable_save_file):
 
     doc.save(configurable_save_file)
     run_border_tests(configurable_save_file)
+
+
+def test_border_runs(configurable_save_file):
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=20, num_cols=10)
+    table = doc.sheets[0].tables[0]
+    solid = Border(2.0, RGB(29, 177, 0), "solid")
+    dashes = Border(1.0, RGB(0, 162, 255), "dashes")
+
+    table.set_cell_border("B3", "top", solid, 8)
+    table.set_cell_border("D2", "bottom", dashes, 2)
+    table.set_cell_border("A5", "left", solid, 10)
+    assert table.cell("C3").border.top == solid
+    assert table.cell("C2").border.bottom == solid
+    assert table.cell("D3").border.top == dashes
+    assert table.cell("E2").border.bottom == dashes
+    assert table.cell("F3").border.top == solid
+    assert table.cell("A1").border.top is None
+
+    # Borders belong to grid lines so they survive writes and move with inserts
+    table.write("C3", "value")
+    assert table.cell("C3").border.top == solid
+    table.add_row(2, start_row=1)
+    table.add_column(1, start_col=0)
+    assert table.cell("D5").border.top == solid
+    assert table.cell("E5").border.top == dashes
+    assert table.cell("B7").border.left == solid
+    assert table.cell("B16").border.left == solid
+    assert table.cell("B17").border.left is None
+    table.delete_row(1, start_row=0)
+    table.delete_column(1, start_col=0)
+    assert table.cell("C4").border.top == solid
+    assert table.cell("C3").border.bottom == solid
+
+    table.merge_cells("C4:D5")
+    assert table.cell("C4").border.top == solid
+    assert table.cell("D4").border.left is None
+    assert table.cell("C5").border.top is None
+
+    doc.save(configurable_save_file)
+    new_doc = Document(configurable_save_file)
+    table = new_doc.sheets[0].tables[0]
+    top_borders = [table.cell(3, col).border.top for col in range(10)]
+    assert top_borders == [None, solid, solid, dashes, dashes, solid, solid, solid, solid, None]
+    assert table.cell("A6").border.left == solid
+    assert table.cell("A15").border.left == solid
+    assert table.cell("A16").border.left is None
+    assert table.cell("D4").border.left is None
+
+
+def test_insert_without_borders(configurable_save_file):
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=4, num_cols=4)
+    table = doc.sheets[0].tables[0]
+    solid = Border(2.0, RGB(29, 177, 0), "solid")
+
+    table.set_cell_border("A4", "bottom", solid, 4)
+    table.set_cell_border("A2", "top", solid, 4)
+    table.set_cell_border("D1", "right", solid, 4)
+    table.add_row()
+    table.add_row(start_row=1)
+    table.add_column()
+    table.add_column(start_col=1)
+    # Inserted rows and columns only share the edge of the one that moved
+    # after them; appended rows and columns only share the edge of the last
+    # row or column
+    moved_edge = [solid, None, solid, solid, solid, None]
+    assert [table.cell(1, col).border.top for col in range(6)] == [None] * 6
+    assert [table.cell(1, col).border.bottom for col in range(6)] == moved_edge
+    assert [table.cell(2, col).border.top for col in range(6)] == moved_edge
+    assert [table.cell(4, col).border.bottom for col in range(6)] == moved_edge
+    assert [table.cell(5, col).border.top for col in range(6)] == moved_edge
+    assert [table.cell(5, col).border.bottom for col in range(6)] == [None] * 6
+    assert [table.cell(row, 1).border.left for row in range(6)] == [None] * 6
+    assert [table.cell(row, 4).border.right for row in range(6)] == moved_edge
+    assert [table.cell(row, 5).border.left for row in range(6)] == moved_edge
+    assert [table.cell(row, 5).border.right for row in range(6)] == [None] * 6
+
+    doc.save(configurable_save_file)
+    new_doc = Document(configurable_save_file)
+    table = new_doc.sheets[0].tables[0]
+    assert [table.cell(1, col).border.top for col in range(6)] == [None] * 6
+    assert [table.cell(2, col).border.top for col in range(6)] == moved_edge
+    assert [table.cell(4, col).border.bottom for col in range(6)] == moved_edge
+    assert [table.cell(5, col).border.bottom for col in range(6)] == [None] * 6
+    assert [table.cell(row, 4).border.right for row in range(6)] == moved_edge
+    assert [table.cell(row, 5).border.right for row in range(6)] == [None] * 6
+
+
+def test_range_borders(configurable_save_file):
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=8, num_cols=8)
+    table = doc.sheets[0].tables[0]
+    solid = Border(2.0, RGB(29, 177, 0), "solid")
+    dashes = Border(1.0, RGB(0, 162, 255), "dashes")
+
+    table.set_cell_border("B2:D3", "bottom", solid)
+    table.set_cell_border(slice(0, 4), 5, ["left", "right"], dashes)
+    table.merge_cells("C6:D6")
+    with pytest.warns(RuntimeWarning) as record:
+        table.set_cell_border("B6:E6", "right", solid)
+    assert len(record) == 1
+    assert "right edge of [5,2] is merged; border not set" in str(record[0])
+
+    with pytest.raises(TypeError, match="length cannot be used with a range"):
+        table.set_cell_border("A1:A2", "left", solid, 2)
+
+    doc.save(configurable_save_file)
+    new_doc = Document(configurable_save_file)
+    table = new_doc.sheets[0].tables[0]
+    assert [table.cell(1, col).border.bottom for col in range(5)] == [None] + [solid] * 3 + [None]
+    assert [table.cell(2, col).border.bottom for col in range(5)] == [None] + [solid] * 3 + [None]
+    assert [table.cell(row, 5).border.left for row in range(5)] == [dashes] * 4 + [None]
+    assert [table.cell(row, 5).border.right for row in range(5)] == [dashes] * 4 + [None]
+    assert table.cell("B6").border.right == solid
+    assert table.cell("C6").border.right is None
+    assert table.cell("D6").border.right == solid
+    assert table.cell("E6").border.right == solid
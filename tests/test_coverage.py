@@ -1,7 +1,12 @@
-from datetime import datetime
+import math
+import random
+import warnings
+from datetime import datetime, timedelta
+from struct import pack, unpack
 from unittest.mock import patch
 
 import pytest
+from sigfig import round as sigfig
 
 from numbers_parser import (
     Cell,
@@ -21,10 +26,15 @@ from numbers_parser.cell import (
     _decode_number_format,
     _float_to_n_digit_fraction,
     _format_decimal,
+    _pack_decimal128,
+    _round_significant_digits,
+    _unpack_decimal128,
+    _unpack_storage_values,
 )
 from numbers_parser.constants import (
     DECIMAL_PLACES_AUTO,
     EMPTY_STORAGE_BUFFER,
+    EPOCH,
     NegativeNumberStyle,
 )
 from numbers_parser.experimental import (
@@ -34,6 +44,7 @@ from numbers_parser.experimental import (
     experimental_features,
 )
 from numbers_parser.generated import TSKArchives_pb2 as TSKArchives
+from numbers_parser.generated import TSTArchives_pb2 as TSTArchives
 from numbers_parser.model import _decode_date_format
 from numbers_parser.numbers_uuid import NumbersUUID
 from numbers_parser.xrefs import xl_col_to_name, xl_col_to_offset, xl_range, xl_rowcol_to_cell
@@ -125,6 +136,78 @@ def test_cell_storage(tmp_path):
     assert str(e.value) == "Pre-BNC storage is unsupported"
 
 
+def test_round_significant_digits():
+    rng = random.Random(42)  # noqa: S311
+    values = [0.0, -0.0, 0.1 + 0.2, 1 / 3, 2**60 + 1, -(10**20) - 5, 123456789012345678]
+    values += [unpack("<d", rng.getrandbits(64).to_bytes(8, "little"))[0] for _ in range(5000)]
+    values += [rng.uniform(-1, 1) * 10 ** rng.randint(-20, 20) for _ in range(5000)]
+    values += [float(f"{rng.randint(10**14, 10**15)}5e{rng.randint(-25, 5)}") for _ in range(5000)]
+    values += [rng.randint(-(10**20), 10**20) for _ in range(1000)]
+    values = [x for x in values if x - x == 0]
+    for value in values:
+        rounded = _round_significant_digits(value)
+        expected = sigfig(value, sigfigs=15, warn=False)
+        assert rounded == expected
+        assert type(rounded) is type(expected)
+
+    assert math.isnan(_round_significant_digits(math.nan))
+    assert _round_significant_digits(math.inf) == math.inf
+    assert _round_significant_digits(-math.inf) == -math.inf
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert math.isnan(Cell._from_value(0, 0, math.nan).value)
+        assert Cell._from_value(0, 0, -math.inf).value == -math.inf
+
+    values = [float(x) for x in range(-200, 200)] + [1e-300, 1e300, 5e-324, 0.3]
+    values += [round(rng.uniform(-1e4, 1e4), rng.randint(0, 10)) for _ in range(5000)]
+    assert [_unpack_decimal128(_pack_decimal128(x)) for x in values] == values
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_bulk_storage_decode(use_numpy):
+    numbers = [0.0, -0.0, 1.0, -1.5, 1e-300, 1e300, 2**60 + 1, 0.1 + 0.2]
+    numbers += [(i * 7919.0137) % 2e6 - 1e6 for i in range(500)]
+    numbers += [(i * 104729**3) % 10**12 - 10**11 for i in range(100)]
+    seconds = [0.0, -1.0, 0.5, 1e-7, 123456789.123456, 252423993600.0 * 2]
+    seconds += [float((i * 982451653) % 10**10 - 10**9) for i in range(500)]
+    seconds += [(i * 7919.0137) % 2e9 - 1e9 for i in range(100)]
+
+    buffers = []
+    expected = []
+    for value in numbers:
+        d128 = _pack_decimal128(value)
+        header = bytes([5, TSTArchives.numberCellType, 0, 0, 0, 0, 0, 0])
+        buffers.append(header + pack("<i", 0x1) + d128)
+        expected.append((_unpack_decimal128(d128), None))
+    for value in seconds:
+        header = bytes([5, TSTArchives.dateCellType, 0, 0, 0, 0, 0, 0])
+        buffers.append(header + pack("<i", 0x6) + pack("<d", 1.0) + pack("<d", value))
+        try:
+            expected.append((None, EPOCH + timedelta(seconds=value)))
+        except OverflowError:
+            buffers.pop()
+
+    numpy = pytest.importorskip("numpy") if use_numpy else None
+    with patch("numbers_parser.cell.np", numpy):
+        decoded = _unpack_storage_values(buffers)
+    assert decoded == expected
+    assert [str(x[0]) for x in decoded] == [str(x[0]) for x in expected]
+
+    doc = Document("tests/data/test-1.numbers")
+    table = doc.sheets[0].tables[0]
+    for row in table.iter_rows():
+        for cell in row:
+            if hasattr(cell, "_buffer"):
+                scalar = Cell._from_storage(
+                    table._table_id,
+                    cell.row,
+                    cell.col,
+                    cell._buffer,
+                    doc._model,
+                )
+                assert scalar.value == cell.value
+
+
 def test_formatting_exceptions():
     doc = Document("tests/data/test-custom-formats.numbers")
 
@@ -183,6 +266,15 @@ def test_datalists():
     assert doc._model._table_strings.lookup_key(table_id, "TEST") == 19
     assert doc._model._table_strings.lookup_value(table_id, 19).string == "TEST"
 
+    values = ["TEST", "NEW_1", "NEW_1", "NEW_2"]
+    keys = doc._model._table_strings.lookup_keys(table_id, values, [1, 1, 2, 1])
+    assert keys == [19, 20, 20, 21]
+    assert doc._model._table_strings.lookup_value(table_id, 19).refcount == 3
+    assert doc._model._table_strings.lookup_value(table_id, 20).string == "NEW_1"
+    assert doc._model._table_strings.lookup_value(table_id, 20).refcount == 3
+    assert doc._model._table_strings.lookup_key(table_id, "NEW_2") == 21
+    assert doc._model._table_strings.lookup_value(table_id, 21).refcount == 2
+
 
 def test_merge(configurable_save_file):
     doc = Document()
@@ -1,9 +1,11 @@
+from array import array
 from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
 import pytest
 
-from numbers_parser import Document, EmptyCell
-from numbers_parser.constants import MAX_COL_COUNT, MAX_ROW_COUNT
+from numbers_parser import CellType, Document, EmptyCell, NumberCell
+from numbers_parser.constants import MAX_COL_COUNT, MAX_ROW_COUNT, MAX_SHIFT_LOG_SIZE
 
 
 def test_edit_cell_values(configurable_save_file):
@@ -80,3 +82,242 @@ def test_large_table(configurable_save_file):
     assert len(data[299]) == 300
     assert table.cell(0, 0).value == "wide"
     assert table.cell(299, 299).value == "wide"
+
+
+def test_write_block(configurable_save_file):
+    doc = Document(num_rows=4, num_cols=3)
+    table = doc.sheets[0].tables[0]
+
+    table.write_block(
+        1,
+        0,
+        [
+            ["Alice", 31, 1.5, True],
+            ["Bob", None, 2.25],
+            ["Carol", 30, 3.0, False, datetime(2024, 1, 31)],
+            ["Dave"],
+            ["Eve", 19, 4.5, None, None, timedelta(hours=2)],
+        ],
+    )
+    table.write_block("B1", [["Age", "Score"]])
+    table.write_column(3, ["Member", None, "Guest"])
+    table.write_column(6, [1, 2, 3], start_row=3)
+
+    assert table.num_rows == 6
+    assert table.num_cols == 7
+    assert isinstance(table.cell(2, 1), EmptyCell)
+    assert isinstance(table.cell(4, 4), EmptyCell)
+
+    with pytest.raises(IndexError) as e:
+        table.write_block(MAX_ROW_COUNT - 1, 0, [[1], [2]])
+    assert "exceeds maximum row" in str(e.value)
+    with pytest.raises(ValueError, match="determine cell type from type"):
+        table.write_column(0, [object()])
+    assert table.num_rows == 6
+
+    doc.save(configurable_save_file)
+
+    doc = Document(configurable_save_file)
+    table = doc.sheets[0].tables[0]
+    assert table.rows(values_only=True) == [
+        [None, "Age", "Score", "Member", None, None, None],
+        ["Alice", 31, 1.5, True, None, None, None],
+        ["Bob", None, 2.25, "Guest", None, None, None],
+        ["Carol", 30, 3.0, False, datetime(2024, 1, 31), None, 1],
+        ["Dave", None, None, None, None, None, 2],
+        ["Eve", 19, 4.5, None, None, timedelta(hours=2), 3],
+    ]
+
+    with pytest.warns(RuntimeWarning) as record:
+        table.write_column(2, [0.1 + 0.2], start_row=4)
+    assert "rounded to 15 significant digits" in str(record[0].message)
+
+
+def test_write_block_cells():
+    values = [
+        ["Alice", 31, 1.5, True, Decimal("2.5")],
+        [datetime(2024, 1, 31), timedelta(hours=2), 0.1 + 0.2, None, 2**70],
+    ]
+    doc = Document(num_rows=2, num_cols=5)
+    table = doc.sheets[0].tables[0]
+    for row, row_values in enumerate(values):
+        for col, value in enumerate(row_values):
+            if isinstance(value, float) and value == 0.1 + 0.2:
+                with pytest.warns(RuntimeWarning):
+                    table.write(row, col, value, style="Heading")
+            elif value is not None:
+                table.write(row, col, value, style="Heading")
+
+    block_doc = Document(num_rows=2, num_cols=5)
+    block_table = block_doc.sheets[0].tables[0]
+    with pytest.warns(RuntimeWarning):
+        block_table.write_block(0, 0, values, style="Heading")
+
+    grown_doc = Document(num_rows=1, num_cols=1)
+    grown_table = grown_doc.sheets[0].tables[0]
+    with pytest.warns(RuntimeWarning):
+        grown_table.write_block(0, 0, [*values, ["Dave"]], style="Heading")
+    assert grown_table.num_rows == 3
+    assert grown_table.num_cols == 5
+    assert isinstance(grown_table.cell(1, 3), EmptyCell)
+    assert all(isinstance(grown_table.cell(2, col), EmptyCell) for col in range(1, 5))
+
+    cells = [cell for row in table.iter_rows() for cell in row]
+    block_cells = [cell for row in block_table.iter_rows() for cell in row]
+    grown_cells = [cell for row in grown_table.iter_rows(max_row=1) for cell in row]
+    for cell, block_cell, grown_cell in zip(cells, block_cells, grown_cells, strict=True):
+        for new_cell in (block_cell, grown_cell):
+            assert type(new_cell) is type(cell)
+            assert type(new_cell.value) is type(cell.value)
+            assert (new_cell.row, new_cell.col) == (cell.row, cell.col)
+            assert new_cell.value == cell.value
+            assert new_cell.style.name == cell.style.name
+            assert new_cell.formatted_value == cell.formatted_value
+
+
+def test_write_typed_column(configurable_save_file):
+    doc = Document(num_rows=3, num_cols=3)
+    table = doc.sheets[0].tables[0]
+
+    table.write_column(0, array("d", [1.5, 2.5, 3.5]))
+    table.write_column(1, [7, "8", Decimal("9.25")], cell_type=CellType.NUMBER)
+    table.write_column(2, [1, 2.5, None], cell_type=CellType.TEXT)
+    table.write(0, 3, Decimal("0.1"))
+    assert type(table.cell(0, 3).value) is float
+    assert type(table.cell(2, 1).value) is float
+    table.write_column(4, [0, 1, 2], cell_type=CellType.BOOL)
+    dates = [datetime(2024, 1, 31), datetime(2024, 2, 29), None]
+    table.write_column(5, dates, cell_type=CellType.DATE)
+
+    with pytest.raises(ValueError, match="type int as a DATE cell"):
+        table.write_column(5, [1], cell_type=CellType.DATE)
+    with pytest.raises(ValueError, match="type str as a BOOL cell"):
+        table.write_column(4, ["False", "0"], cell_type=CellType.BOOL)
+    with pytest.raises(ValueError, match="type float as a BOOL cell"):
+        table.write_column(4, [1.0], cell_type=CellType.BOOL)
+    with pytest.raises(ValueError, match="type datetime as a NUMBER cell"):
+        table.write_column(1, [datetime(2024, 1, 31)], cell_type=CellType.NUMBER)
+    with pytest.raises(ValueError, match="type str as a NUMBER cell"):
+        table.write_column(1, ["eight"], cell_type=CellType.NUMBER)
+    with pytest.raises(ValueError, match="as EMPTY cells"):
+        table.write_column(5, [1], cell_type=CellType.EMPTY)
+    with pytest.raises(ValueError, match="one-dimensional"):
+        table.write_column(5, memoryview(bytes(4)).cast("B", shape=[2, 2]))
+
+    doc.save(configurable_save_file)
+
+    doc = Document(configurable_save_file)
+    table = doc.sheets[0].tables[0]
+    assert table.rows(values_only=True) == [
+        [1.5, 7, "1", 0.1, False, datetime(2024, 1, 31)],
+        [2.5, 8, "2.5", None, True, datetime(2024, 2, 29)],
+        [3.5, 9.25, None, None, True, None],
+    ]
+
+
+def test_write_numpy_column(configurable_save_file):
+    np = pytest.importorskip("numpy")
+
+    doc = Document(num_rows=3, num_cols=3)
+    table = doc.sheets[0].tables[0]
+
+    table.write_column(0, np.array([1.5, 2.5, 3.5]), cell_type=CellType.NUMBER)
+    table.write_column(1, np.arange(3))
+    table.write(0, 2, np.int32(12345))
+    dates = np.array(["2024-01-31", "NaT", "2024-03-01T12:00"], dtype="datetime64[ns]")
+    table.write_column(3, dates, cell_type=CellType.DATE)
+    table.write_column(4, np.array([90, 3600], dtype="timedelta64[s]"), start_row=1)
+    table.write_column(2, np.array([np.nan, 7.0, np.nan]))
+    table.write_column(5, np.array(["a", np.nan, "c"], dtype=object))
+    table.write_column(6, np.array([True, False, True]), cell_type=CellType.BOOL)
+    assert isinstance(table.cell(0, 2), NumberCell)
+    assert [type(table.cell(0, col).value) for col in range(3)] == [float, int, int]
+
+    with pytest.raises(ValueError, match="one-dimensional"):
+        table.write_column(0, np.zeros((2, 2)))
+
+    types_table = Document(num_rows=2, num_cols=2).sheets[0].tables[0]
+    types_table.write(0, 0, np.float64(2.5))
+    types_table.write_block(1, 0, [[np.int64(7), np.float64(0.5)]])
+    assert types_table.rows(values_only=True) == [[2.5, None], [7, 0.5]]
+    assert [type(cell.value) for cell in types_table.rows()[1]] == [int, float]
+    assert type(types_table.cell(0, 0).value) is float
+    types_table.write_column(1, [np.int64(2**53 + 1), np.int8(7)], cell_type=CellType.NUMBER)
+    assert types_table.cell(0, 1).value == 2**53 + 1
+    assert type(types_table.cell(1, 1).value) is int
+
+    doc.save(configurable_save_file)
+
+    doc = Document(configurable_save_file)
+    table = doc.sheets[0].tables[0]
+    assert table.rows(values_only=True) == [
+        [1.5, 0, 12345, datetime(2024, 1, 31), None, "a", True],
+        [2.5, 1, 7, None, timedelta(seconds=90), None, False],
+        [3.5, 2, None, datetime(2024, 3, 1, 12), timedelta(hours=1), "c", True],
+    ]
+
+
+def test_write_far_cell():
+    doc = Document(num_rows=2, num_cols=2)
+    table = doc.sheets[0].tables[0]
+    table.write(2, 1, "near")
+    table.write(5000, 20, "far")
+
+    assert table.num_rows == 5001
+    assert table.num_cols == 21
+    assert table.cell(5000, 20).value == "far"
+    assert table.cell(2, 1).value == "near"
+    cell = table.cell(4999, 19)
+    assert isinstance(cell, EmptyCell)
+    assert (cell.row, cell.col) == (4999, 19)
+    assert all(len(row) == 21 for row in table.rows())
+
+    table.add_row(start_row=1)
+    table.add_column(start_col=1)
+    assert table.cell(5001, 21).value == "far"
+    assert (table.cell(5001, 21).row, table.cell(5001, 21).col) == (5001, 21)
+    assert (table.cell(3, 2).row, table.cell(3, 2).col) == (3, 2)
+    assert (table.cell(1, 1).row, table.cell(1, 1).col) == (1, 1)
+
+    cell = table.cell(5001, 21)
+    table.delete_row(start_row=0, num_rows=2)
+    table.delete_column(start_col=0)
+    table.add_row(start_row=0, num_rows=3)
+    assert (cell.row, cell.col) == (5002, 20)
+    assert table.cell(5002, 20) is cell
+    assert all(
+        (cell.row, cell.col) == (row, col)
+        for row, cells in enumerate(table.rows())
+        for col, cell in enumerate(cells)
+    )
+
+
+def test_coordinates_after_many_inserts():
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=2000, num_cols=20)
+    table = doc.sheets[0].tables[0]
+    other_table = doc.sheets[0].add_table(num_rows=10, num_cols=10)
+    other_cell = other_table.cell(9, 9)
+    cell = table.cell(1999, 19)
+    for _ in range(2000):
+        table.add_row(start_row=1)
+    for _ in range(MAX_SHIFT_LOG_SIZE):
+        table.add_row(start_row=0)
+        table.delete_row(start_row=0)
+
+    # The log is compacted while inserting and replaced by a renumber on read
+    shifts = doc._model.coordinate_shifts(table._table_id)
+    assert len(shifts._shifts) <= MAX_SHIFT_LOG_SIZE
+    assert (cell.row, cell.col) == (3999, 19)
+    assert len(shifts._shifts) == 0
+    assert all(
+        (cell.row, cell.col) == (row, col)
+        for row, cells in enumerate(table.rows())
+        for col, cell in enumerate(cells)
+    )
+    assert (other_cell.row, other_cell.col) == (9, 9)
+    assert len(doc._model.coordinate_shifts(other_table._table_id)._shifts) == 0
+
+    table.add_row(start_row=0)
+    table.delete_column(start_col=0)
+    assert (cell.row, cell.col) == (4000, 18)
+    assert len(shifts._shifts) == 2
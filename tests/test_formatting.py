@@ -11,6 +11,7 @@ from numbers_parser import (
     NegativeNumberStyle,
     PaddingType,
 )
+from numbers_parser.cell import _compile_date_format, _FormatterMemo
 from numbers_parser.constants import CHECKBOX_FALSE_VALUE, CHECKBOX_TRUE_VALUE, STAR_RATING_VALUE
 
 DATE_FORMAT_REF = [
@@ -354,6 +355,64 @@ def test_date_formatting():
                 check.equal(date, ref)
 
 
+def test_compiled_formatters():
+    doc = Document("tests/data/date_formats.numbers")
+    table = doc.sheets[0].tables[0]
+    cells = [row[6] for row in table.iter_rows(min_row=1) if not isinstance(row[6], EmptyCell)]
+    model = doc._model
+    formatters = {
+        model.table_formatter(cell._table_id, cell._date_format_id, "date") for cell in cells
+    }
+    assert len(formatters) == len({cell._date_format_id for cell in cells})
+    for cell in cells:
+        formatter = model.table_formatter(cell._table_id, cell._date_format_id, "date")
+        assert formatter(cell) == cell.formatted_value
+
+    assert _compile_date_format("EEEE d MMMM") is _compile_date_format("EEEE d MMMM")
+    assert _compile_date_format("'at' h:mm a")(datetime(2023, 4, 1, 13, 5)) == "at 1:05 pm"
+    assert _compile_date_format("''yyyy''")(datetime(2023, 4, 1)) == "'2023'"
+
+
+def test_formatted_rows():
+    for filename in ["custom-format-stress.numbers", "test-custom-formats.numbers"]:
+        doc = Document(f"tests/data/{filename}")
+        for sheet in doc.sheets:
+            table = sheet.tables[0]
+            ref = [tuple(cell.formatted_value for cell in row) for row in table.iter_rows()]
+            assert list(table.formatted_rows()) == ref
+
+    table = Document("tests/data/custom-format-stress.numbers").sheets[0].tables[0]
+    ref = [
+        tuple(cell.formatted_value for cell in row)
+        for row in table.iter_rows(min_row=2, max_row=5, min_col=7, max_col=8)
+    ]
+    assert list(table.formatted_rows(min_row=2, max_row=5, min_col=7, max_col=8)) == ref
+    with pytest.raises(IndexError):
+        _ = list(table.formatted_rows(min_row=-1))
+
+
+def test_formatter_memo():
+    doc = Document()
+    table = doc.sheets[0].tables[0]
+    for row in range(10):
+        table.write(row, 0, float(row % 3) - 1.0)
+        table.set_cell_formatting(row, 0, "currency", currency_code="EUR")
+    formatted = [table.cell(row, 0).formatted_value for row in range(10)]
+    assert formatted[:3] == ["€-1.00", "€0.00", "€1.00"]
+    assert formatted[3:6] == formatted[:3]
+
+    cell = table.cell(0, 0)
+    memo = doc._model.table_formatter(cell._table_id, cell._currency_format_id, "number")
+    info = memo.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (5, 5, 2)
+
+    memo = _FormatterMemo(str, "_d128", maxsize=2)
+    for value in [1.0, 2.0, 3.0, 1.0, -0.0, 0.0]:
+        cell._d128 = value
+        assert memo(cell) == str(value)
+    assert memo.cache_info() == (0, 6, 2, 2)
+
+
 def test_custom_formatting(pytestconfig):
     if pytestconfig.getoption("max_check_fails") is not None:
         max_check_fails = pytestconfig.getoption("max_check_fails")
@@ -955,6 +1014,50 @@ def test_write_interactive_formats(configurable_save_file):
     run_test_interactive_formats(configurable_save_file)
 
 
+def test_range_formatting(configurable_save_file):
+    doc = Document(num_rows=100, num_cols=4)
+    table = doc.sheets[0].tables[0]
+    table.write_column(0, [x + 0.5 for x in range(100)])
+    table.write_column(1, ["Cat", "Dog", 100.0], start_row=1)
+    table.write_column(2, [datetime(2024, 1, 31), datetime(2024, 2, 29)])
+    long_date = doc.add_custom_format(name="Long Date", type="datetime", format="d MMMM")
+
+    table.set_cell_formatting("A1:A100", "number", decimal_places=3)
+    table.set_cell_formatting(slice(1, 4), 1, "popup", popup_values=["Cat", "Dog", 100.0])
+    table.set_cell_formatting("C1:C4", "custom", format=long_date)
+    table.write_column(3, [1, None, 2.5, 3.25, None])
+    table.merge_cells("D4:D5")
+    table.set_cell_formatting(slice(0, None), 3, "number", decimal_places=2)
+
+    with pytest.raises(TypeError, match="cannot use tickbox formatting for cells of type Number"):
+        table.set_cell_formatting("A1:B2", "tickbox")
+    with pytest.raises(TypeError, match="cannot use number formatting for cells of type EmptyCell"):
+        table.set_cell_formatting("D2", "number")
+    with pytest.raises(TypeError, match="cannot use number formatting for cells of type DateCell"):
+        table.set_cell_formatting("C1:D3", "number")
+    with pytest.raises(IndexError, match="'Dog' does not match any popup values"):
+        table.set_cell_formatting("B2:B3", "popup", popup_values=["Cat"])
+
+    table_id = table._table_id
+    format_ids = {table.cell(row, 0)._num_format_id for row in range(100)}
+    assert len(format_ids) == 1
+    table_formats = doc._model._table_formats
+    assert table_formats.lookup_value(table_id, format_ids.pop()).refcount == 100
+    control_ids = {table.cell(row, 1)._control_id for row in range(1, 4)}
+    assert len(control_ids) == 1
+    assert doc._model._control_specs.lookup_value(table_id, control_ids.pop()).refcount == 3
+
+    doc.save(configurable_save_file)
+    new_doc = Document(configurable_save_file)
+    table = new_doc.sheets[0].tables[0]
+    assert table.cell("A1").formatted_value == "0.500"
+    assert table.cell("A100").formatted_value == "99.500"
+    assert [table.cell(row, 1).formatted_value for row in range(1, 4)] == ["Cat", "Dog", "100.0"]
+    assert len({table.cell(row, 1)._control_id for row in range(1, 4)}) == 1
+    assert table.cell("C2").formatted_value == "29 February"
+    assert [table.cell(row, 3).formatted_value for row in range(4)] == ["1.00", "", "2.50", "3.25"]
+
+
 def test_no_space_date_formats():
     doc = Document("tests/data/date-format-nospace.numbers")
     for row in doc.default_table.rows():
@@ -2,6 +2,7 @@ import pytest
 import pytest_check as check
 
 from numbers_parser import Document, UnsupportedWarning
+from numbers_parser.xrefs import TableAxis
 
 TABLE_1_FORMULAS = [
     [None, "A1", "$B$1=1"],
@@ -61,6 +62,201 @@ def test_table_functions():
     compare_tables(table, TABLE_2_FORMULAS)
 
 
+def test_formula_templates():
+    doc = Document("tests/data/duration_112.numbers")
+    table = doc.sheets[0].tables[0]
+    cells = [cell for row in table.rows() for cell in row if cell._formula_id is not None]
+    formulas = [cell.formula for cell in cells]
+
+    table_formulas = doc._model.table_formulas(table._table_id)
+    assert set(table_formulas._templates) == {cell._formula_id for cell in cells}
+    assert len(table_formulas._templates) < len(cells)
+
+    all_formulas = doc._model.formula_ast(table._table_id)
+    for cell, formula in zip(cells, formulas, strict=True):
+        template = table_formulas.compile(all_formulas[cell._formula_id], cell.row, cell.col)
+        assert template.render(cell.row, cell.col) == formula
+
+
+def test_bulk_formulas():
+    doc = Document("tests/data/test-all-formulas.numbers")
+    all_formulas = doc.formulas()
+    for sheet in doc.sheets:
+        for table in sheet.tables:
+            ref = {
+                (cell.row, cell.col): cell.formula
+                for row in table.rows()
+                for cell in row
+                if cell.formula is not None
+            }
+            assert table.formulas() == ref
+            assert all_formulas[(sheet.name, table.name)] == ref
+    assert len(all_formulas) == sum(len(sheet.tables) for sheet in doc.sheets)
+
+
+def test_formula_dependencies():
+    doc = Document("tests/data/test-all-formulas.numbers")
+    table = doc.sheets["Math"].tables["Tests"]
+    data = doc.sheets["Math"].tables["Data"]
+
+    assert table.cell(40, 1).formula == "GCD(5,2,(Data::A1:E1))"
+    assert table.precedents(40, 1) == data.rows()[0][:5]
+    assert table.precedents(39, 1) == [data.cell("A1"), data.cell("A2")]
+    assert table.precedents("A1") == []
+
+    dependents = data.dependents("B3")
+    assert [(cell.row, cell.col) for cell in dependents] == [(140, 1), (142, 1), (143, 1)]
+    assert all(table.cell(cell.row, cell.col) is cell for cell in dependents)
+    assert len(data.dependents("E1")) == 12
+    assert "MULTINOMIAL({1,2},Data::E1,Data::A1:D1)" in [
+        cell.formula for cell in data.dependents("E1")
+    ]
+    assert data.dependents("G3") == []
+
+    table.write(140, 1, 0)
+    assert [(cell.row, cell.col) for cell in data.dependents("B3")] == [(142, 1), (143, 1)]
+
+
+def test_recalculate(configurable_save_file):
+    doc = Document("tests/data/test-10.numbers")
+    table = doc.sheets[0].tables[0]
+    assert doc.recalculate() == 0
+
+    table.write("A1", 10)
+    with pytest.warns(UnsupportedWarning) as record:
+        assert doc.recalculate() == 9
+    assert len(record) == 1
+    assert str(record[0].message) == (
+        "Table 1@[6,1]: cannot recalculate formula: MEDIAN is unsupported"
+    )
+    assert [table.cell(row, 1).value for row in range(6)] == [10, 12, 20, 8, 5, 12]
+    assert table.cell("B7").value == 1.5
+    assert table.cell("B8").value == 6
+    assert table.cell("C1").value is False
+    assert table.cell("C2").value == "212"
+    assert table.cell("B2").formula == "A1+A2"
+
+    table.write("A2", 2)
+    with pytest.warns(UnsupportedWarning):
+        assert doc.recalculate() == 0
+
+    table.write("A8", 10)
+    assert doc.recalculate() == 1
+    assert table.cell("C8").value is False
+
+    doc.save(configurable_save_file)
+    doc = Document(configurable_save_file)
+    table = doc.sheets[0].tables[0]
+    assert table.cell("B3").value == 20
+    assert table.cell("C2").value == "212"
+    assert table.cell("C8").value is False
+    assert table.cell("B6").formula == "SUM(A1:A2)"
+
+
+def test_recalculate_after_insert():
+    doc = Document("tests/data/test-10.numbers")
+    table = doc.sheets[0].tables[0]
+    table.write("A8", 10)
+    table.add_row(start_row=0)
+    assert doc.recalculate() == 1
+    assert table.cell("C9").value is False
+
+    table.write("A9", 5)
+    table.add_column(start_col=0)
+    table.delete_row(start_row=0)
+    assert doc.recalculate() == 1
+    assert table.cell("D8").value is True
+
+    table.write("B8", 10)
+    table.delete_row(start_row=7)
+    assert doc.recalculate() == 0
+
+    # Written cells are recorded without indexing formula references, and
+    # only if the document has formulas
+    doc = Document("tests/data/test-10.numbers")
+    table = doc.sheets[0].tables[0]
+    table.write_block(8, 0, [[1, 2], [3, None]])
+    table.write("A8", 10)
+    assert doc._model.formula_dependencies._referenced_tables is None
+    assert len(doc._model.recalculator._changed_cells) == 4
+    table.delete_row(start_row=7)
+    table.add_row(start_row=0)
+    assert doc.recalculate() == 0
+    assert not doc._model.recalculator._changed_cells
+
+    doc = Document()
+    table = doc.sheets[0].tables[0]
+    table.write_block(0, 0, [[1, 2], [3, 4]])
+    table.write("C1", 5)
+    assert not doc._model.recalculator._changed_cells
+
+
+def test_header_name_updates():
+    doc = Document("tests/data/create-formulas.numbers")
+    table = doc.sheets["Main Sheet"].tables["Reference Tests"]
+    animals = doc.sheets["Main Sheet"].tables["Animal Table 3"]
+    assert table.cell(36, 0).formula == "COUNTA(Animal Table 3::safari)"
+
+    animals.write(1, 1, "zoo")
+    assert table.cell(36, 0).formula == "COUNTA(zoo)"
+    animals.write(1, 1, "pet")
+    assert table.cell(36, 0).formula == "COUNTA(Animal Table 3::2:2)"
+
+    name_ref_cache = doc._model.name_ref_cache
+    assert name_ref_cache._axis_names[(animals._table_id, TableAxis.ROW)][1][1] is None
+    assert name_ref_cache._doc_name_counts["zoo"] == 0
+
+    doc = Document()
+    table = doc.default_table
+    name_ref_cache = doc._model.name_ref_cache
+    table.write(0, 1, 1.5)
+    name_ref_cache.refresh()
+    assert name_ref_cache.col_ranges[table._table_id][1].name == "1.5"
+
+    table.set_cell_formatting(0, 1, "number", decimal_places=3)
+    name_ref_cache.refresh()
+    assert name_ref_cache.col_ranges[table._table_id][1].name == "1.500"
+
+    # Inserts and deletes that leave the shape of the table unchanged
+    for row in range(1, table.num_rows):
+        table.write(row, 0, f"name{row}")
+    name_ref_cache.refresh()
+    assert name_ref_cache.row_ranges[table._table_id][1].name == "name1"
+    table.add_row(start_row=1)
+    table.delete_row(start_row=6)
+    name_ref_cache.refresh()
+    row_ranges = name_ref_cache.row_ranges[table._table_id]
+    assert [row_ranges[row].name for row in range(1, 8)] == [
+        "",
+        "name1",
+        "name2",
+        "name3",
+        "name4",
+        "name6",
+        "name7",
+    ]
+    table.add_column(start_col=1)
+    table.delete_column(start_col=3)
+    name_ref_cache.refresh()
+    assert name_ref_cache.col_ranges[table._table_id][1] is None
+    assert name_ref_cache.col_ranges[table._table_id][2].name == "1.500"
+
+    for filename in ["create-formulas.numbers", "test-custom-formats.numbers"]:
+        doc = Document(f"tests/data/{filename}")
+        name_ref_cache = doc._model.name_ref_cache
+        name_ref_cache.refresh()
+        for sheet in doc.sheets:
+            for table in sheet.tables:
+                for row, name_ref in name_ref_cache.row_ranges[table._table_id].items():
+                    if name_ref is not None:
+                        cell = table.cell(row, table.num_header_cols - 1)
+                        assert name_ref.name == cell.formatted_value
+                for col, name_ref in name_ref_cache.col_ranges[table._table_id].items():
+                    if name_ref is not None:
+                        cell = table.cell(table.num_header_rows - 1, col)
+                        assert name_ref.name == cell.formatted_value
+
+
 def test_exceptions(configurable_save_file):
     def get_formula(doc):
         table_id = doc.sheets[0].tables[0]._table_id
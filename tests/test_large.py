@@ -1,4 +1,5 @@
 from random import randint
+from time import perf_counter
 
 import pytest
 
@@ -86,3 +87,23 @@ def test_profiling_styles(configurable_save_file):
             table.write(row, col, xl_rowcol_to_cell(row, col), style=style)
 
     doc.save(configurable_save_file)
+
+
+@pytest.mark.experimental
+def test_profiling_write_block():
+    data = [[f"ROW{row}", row, row * 2, row % 2 == 0, "X", row + 0.5] * 2 for row in range(10000)]
+
+    table = Document(num_rows=1, num_cols=1).default_table
+    start = perf_counter()
+    for row, row_values in enumerate(data):
+        for col, value in enumerate(row_values):
+            table.write(row, col, value)
+    loop_time = perf_counter() - start
+
+    table = Document(num_rows=1, num_cols=1).default_table
+    start = perf_counter()
+    table.write_block(0, 0, data)
+    block_time = perf_counter() - start
+
+    assert table.rows(values_only=True) == data
+    assert loop_time / block_time >= 10.0
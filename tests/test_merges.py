@@ -1,3 +1,5 @@
+import pytest
+
 from numbers_parser import Document
 
 XXX_TABLE_1_REF = [
@@ -77,3 +79,57 @@ def test_all_merged_ranges():
     assert table.merge_ranges == ["A2:B2", "B5:E5", "B6:B8", "C4:E4", "D7:E8"]
     table = sheets[1].tables[0]
     assert table.merge_ranges == ["A1:B1", "B4:C5"]
+
+
+def test_merge_index():
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=1200, num_cols=60)
+    table = doc.sheets[0].tables[0]
+    table.merge_cells(["B2:AY1001", "A1003:C1003", "D1003:D1010", "E1004:F1005"])
+    assert table.merge_ranges == ["A1003:C1003", "B2:AY1001", "D1003:D1010", "E1004:F1005"]
+
+    merge_cells = doc._model.merge_cells(table._table_id)
+    assert merge_cells.is_merge_anchor((1, 1))
+    assert not merge_cells.is_merge_reference((1, 1))
+    assert merge_cells.rect((1000, 50)) == (1, 1, 1000, 50)
+    assert merge_cells.rect((1009, 3)) == (1002, 3, 1009, 3)
+    assert merge_cells.size((1003, 4)) == (2, 2)
+    for row_col in [(0, 0), (1, 0), (1, 51), (1001, 1), (1002, 4), (1005, 4), (1010, 3)]:
+        assert not merge_cells.get(row_col)
+
+    assert table.cell("B2").is_merged
+    assert table.cell("B2").size == (1000, 50)
+    assert table.cell("B1001").merge_range == "B2:AY1001"
+    assert table.cell("AY2").col_end == 50
+    assert table.cell("C1003").rect == (1002, 0, 1002, 2)
+    assert table.cell("A1").size == (1, 1)
+    assert table.cell("A1").merge_range is None
+    assert table.cell("A1").row_start is None
+    assert sum(type(c).__name__ == "MergedCell" for row in table.iter_rows() for c in row) == (
+        1000 * 50 - 1 + 2 + 7 + 3
+    )
+
+
+def test_merge_overlaps(tmp_path):
+    doc = Document(num_header_rows=0, num_header_cols=0, num_rows=10, num_cols=10)
+    table = doc.sheets[0].tables[0]
+    table.write("B2", "keep")
+    table.merge_cells(["B2:C3", "D2:D5"])
+
+    with pytest.raises(ValueError, match=r"merge range C3:E3 overlaps B2:C3"):
+        table.merge_cells(["A8:B9", "C3:E3"])
+    with pytest.raises(ValueError, match=r"merge range F6:H6 overlaps F1:F9"):
+        table.merge_cells(["F1:F9", "F6:H6"])
+    with pytest.raises(IndexError, match=r"merge range A9:K10 out of range"):
+        table.merge_cells(["A8:B8", "A9:K10"])
+    assert table.merge_ranges == ["B2:C3", "D2:D5"]
+    assert not table.cell("A8").is_merged
+
+    table.merge_cells(["B2:C3", "E2:F2", "B4:C4", "F3:E5"])
+    assert table.merge_ranges == ["B2:C3", "B4:C4", "D2:D5", "E2:F2", "E3:F5"]
+    assert table.cell("B2").value == "keep"
+
+    doc.save(tmp_path / "merges.numbers")
+    table = Document(tmp_path / "merges.numbers").sheets[0].tables[0]
+    assert table.merge_ranges == ["B2:C3", "B4:C4", "D2:D5", "E2:F2", "E3:F5"]
+    assert table.cell("E3").size == (3, 2)
+    assert table.cell("F5").merge_range == "E3:F5"
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Optional
 
 import pytest
@@ -120,6 +121,99 @@ def test_create_table(configurable_save_file):
     assert table.cell("D2").value == "lamb"
 
 
+def test_table_writer(configurable_save_file):
+    data = [["Name", "Count", "Ratio", "Flag", "Date"]]
+    data += [
+        [f"Row {i % 50}", i, i / 4, i % 3 == 0, datetime(2024, 1, 1 + i % 28)] for i in range(600)
+    ]
+    data[10][2] = None
+    data[20] = data[20][:2]
+
+    doc = Document()
+    sheet = doc.sheets[0]
+    with sheet.add_table_writer("Streamed", num_cols=5) as writer:
+        for row in data:
+            writer.append_row(row)
+        assert writer.num_rows == 601
+
+        with pytest.raises(IndexError) as e:
+            writer.append_row(range(6))
+        assert str(e.value) == "row has 6 values but table has 5 columns"
+
+    with pytest.raises(ValueError, match="closed table writer"):
+        writer.append_row([1])
+    with pytest.raises(IndexError) as e:
+        _ = sheet.add_table_writer("Streamed")
+    assert "table 'Streamed' already exists" in str(e.value)
+
+    assert writer.table.name == "Streamed"
+    assert writer.table.num_rows == 601
+    assert writer.table.cell(0, 4).value == "Date"
+    assert next(writer.table.iter_rows(max_row=0, values_only=True))[0] == "Name"
+    with pytest.raises(IndexError) as e:
+        _ = writer.table.cell(1, 0)
+    assert "can only be read after saving and loading" in str(e.value)
+    with pytest.raises(IndexError) as e:
+        _ = writer.table.rows()
+    assert "row 600 of table 'Streamed' was written by a table writer" in str(e.value)
+
+    table = sheet.add_table("Written", num_rows=1, num_cols=5)
+    table.write_block(0, 0, data)
+    doc.save(configurable_save_file)
+
+    doc = Document(configurable_save_file)
+    model = doc._model
+    streamed = doc.sheets[0].tables["Streamed"]
+    written = doc.sheets[0].tables["Written"]
+    assert streamed.num_rows == 601
+    assert streamed.rows(values_only=True) == written.rows(values_only=True)
+    assert streamed.cell(1, 0).value == "Row 0"
+    assert streamed.cell(600, 4).value == datetime(2024, 1, 1 + 599 % 28)
+    assert isinstance(streamed.cell(20, 3), EmptyCell)
+
+    streamed_tiles = model.table_tiles(streamed._table_id)
+    written_tiles = model.table_tiles(written._table_id)
+    assert len(streamed_tiles) == 3
+    assert [str(x) for x in streamed_tiles] == [str(x) for x in written_tiles]
+
+
+def test_table_writer_values(configurable_save_file):
+    np = pytest.importorskip("numpy")
+    data = [
+        [1.2345678901234567, Decimal("2.5"), np.float64(0.1)],
+        [np.int64(7), Decimal("1.23456789012345678"), -9.87654321098765432e-5],
+    ]
+
+    doc = Document()
+    sheet = doc.sheets[0]
+    with sheet.add_table_writer("Streamed", num_cols=3, num_header_rows=0) as writer:
+        for row in data:
+            with pytest.warns(RuntimeWarning):
+                writer.append_row(row)
+    with pytest.raises(IndexError) as e:
+        _ = writer.table.cell(0, 0)
+    assert "can only be read after saving and loading" in str(e.value)
+
+    table = sheet.add_table("Written", num_rows=1, num_cols=3)
+    with pytest.warns(RuntimeWarning):
+        table.write_block(0, 0, data)
+    doc.save(configurable_save_file)
+    doc.save(configurable_save_file)
+
+    doc = Document(configurable_save_file)
+    model = doc._model
+    streamed = doc.sheets[0].tables["Streamed"]
+    written = doc.sheets[0].tables["Written"]
+    assert streamed.rows(values_only=True) == written.rows(values_only=True)
+    assert streamed.cell(0, 0).value == 1.23456789012346
+    assert streamed.cell(1, 1).value == 1.23456789012346
+    assert type(streamed.cell(1, 0).value) is float
+
+    streamed_tiles = model.table_tiles(streamed._table_id)
+    written_tiles = model.table_tiles(written._table_id)
+    assert [str(x) for x in streamed_tiles] == [str(x) for x in written_tiles]
+
+
 def test_create_sheet(configurable_save_file):
     doc = Document()
     sheets = doc.sheets
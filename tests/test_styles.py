@@ -235,6 +235,49 @@ def test_header_styles():
     assert not table.cell("E9").style.bold
 
 
+def test_table_styles():
+    doc = Document("tests/data/test-styles.numbers")
+    table = doc.sheets["Headers"].tables[0]
+    styles = table.styles()
+    assert len(styles) == table.num_rows
+    assert all(len(row) == table.num_cols for row in styles)
+    assert styles[1][1] == table.cell("B2").style
+    assert styles[1][1].bg_color == RGB(29, 177, 0)
+    assert styles[1][2].bg_color == [RGB(136, 250, 78), RGB(1, 113, 0)]
+
+    # Cells sharing a style resolve it once but each has its own copy
+    model = table._model
+    assert model.cell_style(table.cell("E5")) is model.cell_style(table.cell("E6"))
+    assert table.cell("E5").style is not table.cell("E6").style
+    style_e5 = table.cell("E5").style
+    _ = table.cell("E6").style
+    style_e5.bold = True
+    assert table.cell("E5").style.bold
+    assert not table.cell("E6").style.bold
+    assert table.styles()[4][4] is style_e5
+
+    with pytest.warns(UnsupportedWarning) as record:
+        styles[6][4].bold = True
+    assert "shared cell style cannot be modified" in str(record[0])
+    assert not table.cell("E7").style.bold
+
+    doc = Document("tests/data/test-styles.numbers")
+    table = doc.sheets["Headers"].tables[0]
+    table.cell("C2").style.bg_color[0] = RGB(0, 0, 0)
+    assert table.cell("C6").style.bg_color == [RGB(136, 250, 78), RGB(1, 113, 0)]
+
+
+def test_cell_style_key():
+    style = Style(bg_color=RGB(1, 2, 3))
+    key = style._cell_style_key
+    assert style._cell_style_key is key
+    style.bold = True
+    assert style._cell_style_key is key
+    style.bg_color = [RGB(1, 2, 3), RGB(4, 5, 6)]
+    assert style._cell_style_key != key
+    assert hash(style._cell_style_key) is not None
+
+
 def test_style_exceptions():
     doc = Document()
     table = doc.sheets[0].tables[0]
@@ -419,6 +462,61 @@ def test_empty_styles(configurable_save_file):
                 assert new_table.cell(row, col).style.name == body_style
 
 
+def test_shared_style_keys(configurable_save_file):
+    doc = Document(num_rows=20, num_cols=5)
+    table = doc.sheets[0].tables[0]
+    shaded = doc.add_style(name="Shaded", bg_color=RGB(29, 177, 0), bold=True)
+    for row in range(1, 20):
+        table.write(row, 1, row, style=shaded)
+    doc.save(configurable_save_file)
+
+    new_doc = Document(configurable_save_file)
+    new_table = new_doc.sheets[0].tables[0]
+    model = new_doc._model
+    cells = [new_table.cell(row, 1) for row in range(1, 20)]
+    assert all(cell.style.name == "Shaded" for cell in cells)
+    assert all(cell.style.bg_color == RGB(29, 177, 0) for cell in cells)
+    assert len({cell._cell_style_id for cell in cells}) == 1
+    assert len({cell._text_style_id for cell in cells}) == 1
+
+    style_keys = {cells[0]._cell_style_id, cells[0]._text_style_id}
+    styles = model._table_styles
+    refcounts = [styles.lookup_value(new_table._table_id, key).refcount for key in style_keys]
+    assert refcounts == [19, 19]
+
+    component = model.metadata_component(styles.id(new_table._table_id))
+    object_ids = [x.object_identifier for x in component.external_references]
+    style_ids = [
+        styles.lookup_value(new_table._table_id, key).reference.identifier for key in style_keys
+    ]
+    assert all(object_ids.count(x) == 1 for x in style_ids)
+
+
+def test_range_styles(configurable_save_file):
+    doc = Document(num_rows=6, num_cols=4)
+    table = doc.sheets[0].tables[0]
+    shaded = doc.add_style(name="Shaded", bg_color=RGB(29, 177, 0))
+    table.set_cell_style("B2:C3", shaded)
+    table.set_cell_style(slice(4, None), 3, "Heading Red")
+    table.set_cell_style("E7:D8", "Caption")
+
+    assert all(table.cell(row, col).style is shaded for row in (1, 2) for col in (1, 2))
+    assert table.cell("A2").style.name != "Shaded"
+    assert table.cell("D4").style.name != "Heading Red"
+    assert [table.cell(row, 3).style.name for row in (4, 5)] == ["Heading Red"] * 2
+    assert table.num_rows == 8
+    assert table.num_cols == 5
+    with pytest.raises(IndexError, match="style 'Invalid' does not exist"):
+        table.set_cell_style("A1:B2", "Invalid")
+
+    doc.save(configurable_save_file)
+    new_doc = Document(configurable_save_file)
+    table = new_doc.sheets[0].tables[0]
+    assert table.cell("C3").style.bg_color == RGB(29, 177, 0)
+    assert table.cell("D6").style.name == "Heading Red"
+    assert table.cell("E8").style.name == "Caption"
+
+
 def test_add_bg_image(configurable_save_file):
     doc = Document()
     table = doc.sheets[0].tables[0]
@@ -39,6 +39,36 @@ def test_row_col_sizes(configurable_save_file):
     assert table.width == 348
 
 
+def test_offset_lookup():
+    doc = Document("tests/data/test-1.numbers")
+    table = doc.sheets[0].tables[0]
+
+    assert table.row_at_offset(0) == 0
+    assert table.row_at_offset(19.5) == 0
+    assert table.row_at_offset(20) == 1
+    assert table.row_at_offset(table.height - 1) == table.num_rows - 1
+    assert table.row_at_offset(table.height) is None
+    assert table.row_at_offset(-1) is None
+    assert table.col_at_offset(98) == 1
+    assert table.col_at_offset(table.width) is None
+
+    table.row_height(0, 40)
+    assert table.row_at_offset(20) == 0
+    assert table.row_at_offset(40) == 1
+
+    height = table.height
+    table.add_row(num_rows=2)
+    assert table.height == height + 2 * table.row_height(table.num_rows - 1)
+    assert table.row_at_offset(height) == table.num_rows - 2
+    table.delete_row(num_rows=2)
+    assert table.height == height
+
+    width = table.width
+    table.add_column()
+    assert table.width == width + table.col_width(table.num_cols - 1)
+    assert table.col_at_offset(width) == table.num_cols - 1
+
+
 def test_header_size(configurable_save_file):
     doc = Document()
     table = doc.sheets[0].tables[0]